@@ -14,6 +14,9 @@ from pathlib import Path
 import os
 from datetime import timedelta
 
+from core.caches import cache_from_url
+from core.databases import database_from_url
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 MEDIA_DIR = os.path.join(BASE_DIR, "media")
@@ -56,6 +59,8 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.middleware.CurrentShopMiddleware",
+    "core.middleware.ReplicaPinMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -84,12 +89,34 @@ WSGI_APPLICATION = "app.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
+# DATABASE_URL selects the primary database (see core.databases for the
+# URL forms) and DATABASE_REPLICA_URLS, a comma-separated list, its read
+# replicas. Connections are kept open for DATABASE_CONN_MAX_AGE seconds
+# and checked before they are reused.
+DATABASE_OPTIONS = {
+    "CONN_MAX_AGE": int(os.environ.get("DATABASE_CONN_MAX_AGE", 60)),
+    "CONN_HEALTH_CHECKS": True,
+}
 DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+    "default": database_from_url(
+        os.environ.get("DATABASE_URL", f"sqlite:///{BASE_DIR / 'db.sqlite3'}"),
+        **DATABASE_OPTIONS,
+    ),
 }
+DATABASE_REPLICAS = []
+for number, url in enumerate(
+    filter(None, os.environ.get("DATABASE_REPLICA_URLS", "").split(",")), start=1
+):
+    # Tests read the test database through the replica aliases.
+    DATABASES[f"replica{number}"] = database_from_url(
+        url, TEST={"MIRROR": "default"}, **DATABASE_OPTIONS
+    )
+    DATABASE_REPLICAS.append(f"replica{number}")
+DATABASE_ROUTERS = ["core.routers.PrimaryReplicaRouter"]
+# Seconds a user's reads stay on the primary after they wrote, pinned in a
+# cache that must be shared by all workers (see CACHES).
+DATABASE_REPLICA_PIN_CACHE_ALIAS = "default"
+DATABASE_REPLICA_PIN_SECONDS = 10
 
 AUTH_USER_MODEL = "core.User"
 # Password validation
@@ -137,14 +164,101 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = MEDIA_DIR
+# Uploads are stored once under the hash of their content, see core.storage.
+DEFAULT_FILE_STORAGE = "core.storage.ContentAddressedStorage"
+# How core.views.serve_media hands file bodies to the web server: None
+# sends them from Python, "x-sendfile" (Apache, lighttpd) or
+# "x-accel-redirect" (nginx, under MEDIA_ACCEL_REDIRECT_PREFIX) offload them.
+MEDIA_SENDFILE = os.environ.get("MEDIA_SENDFILE") or None
+MEDIA_ACCEL_REDIRECT_PREFIX = "/protected-media/"
+# Cache lifetime of media files whose name is not a content hash.
+MEDIA_CACHE_MAX_AGE = 60 * 60
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "core.authentication.StatelessJWTAuthentication",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.KeysetPagination",
+    "PAGE_SIZE": 50,
 }
+# Seconds a user's default shop stays cached for request.shop, in a cache
+# that must be shared by all workers (see CACHES), or a shop login would only
+# reach the worker that handled it.
+CURRENT_SHOP_CACHE_ALIAS = "default"
+CURRENT_SHOP_CACHE_TIMEOUT = 300
+# Upper bound for the ?page_size= query parameter of list endpoints.
+PAGINATION_MAX_PAGE_SIZE = 500
+# Rows fetched per database round trip by ?export= streaming responses.
+EXPORT_CHUNK_SIZE = 2000
+# Rows validated and written per transaction by the product import, and the
+# number of row errors it reports in full.
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_MAX_ERRORS = 1000
+# Lower bounds of the price buckets counted by ?facets=true on product lists.
+PRODUCT_PRICE_BUCKETS = ("0", "10", "50", "100", "500", "1000")
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=50),
 }
+# Seconds before each worker reloads the revoked tokens made by others.
+JWT_REVOCATION_REFRESH_INTERVAL = 30
+
+# Number of ids a worker reserves at once from a core.Sequence counter, on
+# the SEQUENCE_DATABASE connection. A second connection to the primary
+# commits each block on its own, whatever transaction asked for it. SQLite
+# has a single writer, which that transaction may hold, so there blocks are
+# reserved on the default connection, outside transactions only.
+SEQUENCE_BLOCK_SIZE = 50
+SEQUENCE_DATABASE = "default"
+if DATABASES["default"]["ENGINE"] != "core.backends.sqlite3":
+    DATABASES["sequences"] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+    SEQUENCE_DATABASE = "sequences"
+
+# How long a cart item holds its stock before release_expired_reservations
+# gives it back.
+CART_RESERVATION_TTL = timedelta(minutes=30)
+
+# CACHE_URL selects the cache shared by all workers (see core.caches for the
+# URL forms). The current shop, read-your-writes pins and serialized
+# representations live there, and every worker must see the same entries,
+# so deployments need a shared backend such as Redis or Memcached. The
+# per-process locmem:// default under DEBUG is for development and tests
+# only; `manage.py check --deploy` warns about it.
+CACHES = {
+    "default": cache_from_url(
+        os.environ.get(
+            "CACHE_URL", "locmem://" if DEBUG else "redis://127.0.0.1:6379/0"
+        )
+    ),
+}
+
+# Serialized products and shops (core.cache.RepresentationCache). ALIAS is
+# the cache shared by all workers, which must be a shared backend for
+# invalidations to reach every worker; each worker also keeps up to
+# LOCAL_MAX_ENTRIES entries in memory.
+REPRESENTATION_CACHE = {
+    "ALIAS": "default",
+    "LOCAL_MAX_ENTRIES": 10000,
+    "TIMEOUT": 60 * 60,
+}
+
+# Renditions of uploaded product images, rendered by core.images in a pool
+# of IMAGE_WORKERS processes after the upload commits (0 renders inline).
+IMAGE_WORKERS = 2
+IMAGE_RENDITIONS = {
+    "thumbnail": {"size": (150, 150), "format": "JPEG", "quality": 80},
+    "medium": {"size": (600, 600), "format": "JPEG", "quality": 85},
+    "webp": {"size": (1200, 1200), "format": "WEBP", "quality": 80},
+}
+
+# Lists spanning many shops can query each shop concurrently (core.fanout)
+# on a pool of FANOUT_MAX_WORKERS threads (0 runs them inline), leaving out
+# the shops that take longer than FANOUT_TIMEOUT seconds. find-product fans
+# out once the shop has FIND_PRODUCT_FANOUT_MIN_SHOPS connected shops; unset,
+# it always runs one query, which is cheaper unless the shops are large.
+FANOUT_MAX_WORKERS = 8
+FANOUT_TIMEOUT = float(os.environ.get("FANOUT_TIMEOUT", 2.0))
+FIND_PRODUCT_FANOUT_MIN_SHOPS = (
+    int(os.environ.get("FIND_PRODUCT_FANOUT_MIN_SHOPS", 0)) or None
+)
@@ -1,11 +1,13 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
-from django.conf.urls.static import static
+from django.urls import path, include, re_path
 from django.conf import settings
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularSwaggerView,
 )
+from core.views import serve_media
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -18,4 +20,9 @@ urlpatterns = [
         name="api-docs",
     ),
     path("order/", include("order.urls")),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    re_path(
+        r"^%s(?P<path>.+)$" % re.escape(settings.MEDIA_URL.lstrip("/")),
+        serve_media,
+        name="media",
+    ),
+]
@@ -0,0 +1,50 @@
+"""
+Time OrderAV.post for carts of different sizes and count its queries.
+
+    python -m benchmarks.bench_checkout --sizes 1 100 10000
+"""
+import argparse
+
+from benchmarks.common import Timer, benchmark_database, create_shop
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import models
+
+
+def run(user, shop, size, repeat):
+    product = models.Product.objects.create(
+        title="Bench product", shop=shop, price=1, quantity=10**9
+    )
+    client = APIClient()
+    client.force_authenticate(user=user)
+    timer, queries = Timer(), 0
+    for _ in range(repeat):
+        items = models.OrderItems.objects.bulk_create(
+            models.OrderItems(user=user, shop=shop, product=product)
+            for _ in range(size)
+        )
+        payload = {"orderitem": [item.id for item in items]}
+        with CaptureQueriesContext(connection) as captured, timer.measure():
+            res = client.post(reverse("order:order_create"), payload, format="json")
+        assert res.status_code == 201, res.data
+        queries = len(captured)
+    print(f"cart={size:6d} queries={queries:3d} {timer.summary()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    with benchmark_database():
+        user, shop = create_shop()
+        for size in args.sizes:
+            run(user, shop, size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
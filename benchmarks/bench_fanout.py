@@ -0,0 +1,68 @@
+"""
+Time find-product over many large friend shops, as one query and fanned
+out shop by shop.
+
+    python -m benchmarks.bench_fanout --shops 16 --products 20000
+"""
+import argparse
+
+from benchmarks.common import Timer, benchmark_database, create_shop
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import models
+
+
+def seed(shop, shops, products):
+    for number in range(shops):
+        friend = models.Shop.objects.create(name=f"Friend {number}", user=shop.user)
+        models.UserGroup.objects.create(
+            sender=shop, receiver=friend, status="accepted"
+        )
+        models.Product.objects.bulk_create(
+            models.Product(
+                title=f"Product {index}",
+                slug=f"friend-{number}-{index}",
+                shop=friend,
+                price=index % 1000,
+                quantity=index % 3,
+            )
+            for index in range(products)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--shops", type=int, default=16)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    with benchmark_database():
+        user, shop = create_shop()
+        seed(shop, args.shops, args.products)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        url = reverse("store:find_product")
+        params = {"sort": "-price", "in_stock": "true", "page_size": 50}
+        modes = {
+            "single": {"FIND_PRODUCT_FANOUT_MIN_SHOPS": None},
+            "fanout": {
+                "FIND_PRODUCT_FANOUT_MIN_SHOPS": 1,
+                "FANOUT_MAX_WORKERS": args.workers,
+            },
+        }
+        for mode, overrides in modes.items():
+            timer = Timer()
+            with override_settings(**overrides):
+                for _ in range(args.repeat):
+                    with timer.measure():
+                        res = client.get(url, params)
+                    assert res.status_code == 200, res.data
+            print(f"{mode}: {timer.summary()}")
+
+
+if __name__ == "__main__":
+    main()
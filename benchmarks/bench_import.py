@@ -0,0 +1,45 @@
+"""
+Time a bulk product import through the API, then re-import it as updates.
+
+    python -m benchmarks.bench_import --rows 100000
+"""
+import argparse
+import time
+
+from benchmarks.common import benchmark_database, create_shop
+
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+
+def catalog(rows):
+    lines = ["external_sku,title,price,quantity"]
+    lines += [f"SKU{number},Product number {number},9.99,5" for number in range(rows)]
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+    with benchmark_database():
+        user, _ = create_shop()
+        client = APIClient()
+        client.force_authenticate(user=user)
+        body = catalog(args.rows)
+        for label in ("insert", "update"):
+            start = time.perf_counter()
+            res = client.generic(
+                "POST", reverse("store:product_import"), body, content_type="text/csv"
+            )
+            elapsed = time.perf_counter() - start
+            assert res.status_code == 200, res.data
+            print(
+                f"{label}: rows={args.rows} created={res.data['created']} "
+                f"updated={res.data['updated']} errors={res.data['error_count']} "
+                f"{elapsed:.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Hammer OrderAV.post from many threads and check order ids stay unique.
+
+    python -m benchmarks.bench_order_ids --threads 1 4 16 --orders 200
+
+On SQLite the orders run in IMMEDIATE transactions, which wait for the
+write lock when they begin. The default deferred transactions read
+first and then fail with "database is locked" when another thread
+committed in between. Requests that still fail, with an error status or
+an OperationalError, are counted in `errors`.
+"""
+import argparse
+import threading
+import time
+
+from benchmarks.common import Timer, benchmark_database, create_shop
+
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import models
+
+
+def place_orders(user, item_ids, timer, errors):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    url = reverse("order:order_create")
+    try:
+        for item_id in item_ids:
+            try:
+                with timer.measure():
+                    res = client.post(url, {"orderitem": [item_id]})
+            except OperationalError as error:
+                errors.append(str(error))
+                continue
+            if res.status_code != 201:
+                errors.append(res.status_code)
+    finally:
+        connection.close()
+
+
+def run(threads, orders):
+    user, shop = create_shop(f"bench{threads}@example.com")
+    product = models.Product.objects.create(
+        title="Bench product", shop=shop, price=1, quantity=10**9
+    )
+    items = models.OrderItems.objects.bulk_create(
+        models.OrderItems(user=user, shop=shop, product=product)
+        for _ in range(threads * orders)
+    )
+    item_ids = [item.id for item in items]
+    timer, errors = Timer(), []
+    workers = [
+        threading.Thread(
+            target=place_orders,
+            args=(user, item_ids[i::threads], timer, errors),
+        )
+        for i in range(threads)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    order_ids = list(
+        models.Order.objects.filter(shop=shop).values_list("order_id", flat=True)
+    )
+    assert len(order_ids) == len(set(order_ids)), "duplicate order ids"
+    print(
+        f"threads={threads:3d} orders={len(order_ids):6d} errors={len(errors):4d} "
+        f"throughput={len(order_ids) / elapsed:8.1f}/s {timer.summary()}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--orders", type=int, default=100, help="orders per thread")
+    args = parser.parse_args()
+    database = settings.DATABASES["default"]
+    if connection.vendor == "sqlite":
+        database.setdefault("OPTIONS", {}).setdefault("transaction_mode", "IMMEDIATE")
+    with benchmark_database():
+        for threads in args.threads:
+            run(threads, args.orders)
+
+
+if __name__ == "__main__":
+    main()
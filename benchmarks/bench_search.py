@@ -0,0 +1,51 @@
+"""
+Time product searches against a large index.
+
+    python -m benchmarks.bench_search --products 1000000
+"""
+import argparse
+import random
+
+from benchmarks.common import Timer, benchmark_database, create_shop
+
+from core import models, search
+
+WORDS = (
+    "blue red black white green denim cotton wool leather silk shirt jeans "
+    "jacket shoes boots scarf hat socks dress skirt sweater coat belt bag"
+).split()
+
+
+def seed(shop, count, batch_size=10000):
+    for start in range(0, count, batch_size):
+        models.Product.objects.bulk_create(
+            models.Product(
+                title=" ".join(random.sample(WORDS, 3)),
+                slug=f"bench-{number}",
+                shop=shop,
+                price=1,
+                quantity=1,
+            )
+            for number in range(start, min(start + batch_size, count))
+        )
+    search.rebuild()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    with benchmark_database():
+        _, shop = create_shop()
+        seed(shop, args.products)
+        for query in ("shirt", "blu sh", "denim jacket", "le"):
+            timer = Timer()
+            for _ in range(args.repeat):
+                with timer.measure():
+                    search.search_product_ids(query, limit=50)
+            print(f"q={query!r:15} {timer.summary()}")
+
+
+if __name__ == "__main__":
+    main()
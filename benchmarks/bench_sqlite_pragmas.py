@@ -0,0 +1,108 @@
+"""
+Compare the throughput of a read/write mix on SQLite under three profiles:
+SQLite's own defaults (rollback journal), the tuned pragmas of
+core.backends.sqlite3, and the tuned pragmas with BEGIN IMMEDIATE.
+
+    python -m benchmarks.bench_sqlite_pragmas --threads 8 --seconds 5
+"""
+import argparse
+import random
+import threading
+import time
+
+from benchmarks.common import Timer, benchmark_database, create_shop
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+
+from core import models
+
+PROFILES = {
+    # SQLite's defaults, which is what the stock Django backend runs with.
+    "default": {
+        "pragmas": {
+            "journal_mode": "DELETE",
+            "synchronous": "FULL",
+            "mmap_size": 0,
+            "cache_size": -2000,
+            "temp_store": "DEFAULT",
+        },
+    },
+    "tuned": {},
+    "immediate": {"transaction_mode": "IMMEDIATE"},
+}
+
+
+def read(shop):
+    list(models.Product.objects.filter(shop=shop).order_by("-created_at")[:50])
+
+
+def write(product_ids):
+    with transaction.atomic():
+        product = models.Product.objects.get(pk=random.choice(product_ids))
+        models.Product.objects.filter(pk=product.pk).update(
+            quantity=F("quantity") + 1
+        )
+
+
+def worker(shop, product_ids, write_ratio, deadline, timers, errors):
+    try:
+        while time.monotonic() < deadline:
+            kind = "write" if random.random() < write_ratio else "read"
+            try:
+                with timers[kind].measure():
+                    if kind == "write":
+                        write(product_ids)
+                    else:
+                        read(shop)
+            except OperationalError:
+                errors[kind] += 1
+    finally:
+        connection.close()
+
+
+def run(profile, args):
+    settings.DATABASES["default"]["OPTIONS"] = dict(PROFILES[profile])
+    with benchmark_database():
+        _, shop = create_shop()
+        for number in range(args.products):
+            models.Product.objects.create(
+                title=f"Product {number}", shop=shop, price=1, quantity=1
+            )
+        product_ids = list(models.Product.objects.values_list("id", flat=True))
+        connection.close()
+        timers = {"read": Timer(), "write": Timer()}
+        errors = {"read": 0, "write": 0}
+        deadline = time.monotonic() + args.seconds
+        threads = [
+            threading.Thread(
+                target=worker,
+                args=(shop, product_ids, args.write_ratio, deadline, timers, errors),
+            )
+            for _ in range(args.threads)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    done = sum(len(timer.samples) for timer in timers.values())
+    print(f"{profile}: {done / args.seconds:.0f} ops/s")
+    for kind, timer in timers.items():
+        print(f"  {kind:5} errors={errors[kind]} {timer.summary()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--profile", choices=list(PROFILES), action="append")
+    args = parser.parse_args()
+    for profile in args.profile or list(PROFILES):
+        run(profile, args)
+
+
+if __name__ == "__main__":
+    main()
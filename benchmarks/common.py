@@ -0,0 +1,75 @@
+"""
+Helpers shared by the benchmark scripts.
+
+Every benchmark runs against a throw-away database created from the
+project's migrations, so it never touches db.sqlite3. Run them from the
+project root, for example::
+
+    python -m benchmarks.bench_order_ids --threads 16
+"""
+import contextlib
+import os
+import statistics
+import tempfile
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+
+@contextlib.contextmanager
+def benchmark_database():
+    """Create a migrated, file-backed test database and drop it afterwards."""
+    test_settings = settings.DATABASES["default"].setdefault("TEST", {})
+    if connection.vendor == "sqlite" and not test_settings.get("NAME"):
+        # Threads need a real file; the in-memory test database is per connection.
+        test_settings["NAME"] = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def create_shop(email="bench@example.com"):
+    """Create a user with a default shop and return both."""
+    from core import models
+
+    user = models.User.objects.create_user(email, "bench1234")
+    shop = models.Shop.objects.create(name="Bench Store", user=user, default=True)
+    return user, shop
+
+
+class Timer:
+    """Collect wall-clock durations of repeated operations."""
+
+    def __init__(self):
+        self.samples = []
+
+    @contextlib.contextmanager
+    def measure(self):
+        start = time.perf_counter()
+        yield
+        self.samples.append(time.perf_counter() - start)
+
+    def summary(self):
+        samples = sorted(self.samples)
+        if not samples:
+            return "no samples"
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        return (
+            f"n={len(samples)} mean={statistics.mean(samples) * 1000:.2f}ms "
+            f"p50={statistics.median(samples) * 1000:.2f}ms p99={p99 * 1000:.2f}ms"
+        )
@@ -0,0 +1,148 @@
+"""
+Compare request latency of the product list under WSGI and ASGI with many
+concurrent slow clients.
+
+Both handlers are driven in-process by the same closed-loop clients, each
+sending its next request when the previous response has been read, and
+reading every response body for --client-delay seconds:
+
+* wsgi: the synchronous /store/product-list/ on the WSGI handler, served
+  by a pool of --workers threads, like a threaded WSGI server. A worker
+  stays busy while its client reads.
+* asgi: the async /store/async/product-list/ on the ASGI handler, in one
+  event loop. A slow read only delays that request's send().
+
+    python -m benchmarks.loadtest_p99 --clients 500 --workers 32
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from wsgiref.util import setup_testing_defaults
+
+from benchmarks.common import Timer, benchmark_database, create_shop
+
+from django.core.asgi import get_asgi_application
+from django.core.wsgi import get_wsgi_application
+from django.urls import reverse
+
+from core import models
+from user.serializers import TokenObtainPairSerializer
+
+
+def seed(products):
+    user, shop = create_shop()
+    models.Product.objects.bulk_create(
+        models.Product(
+            title=f"Product {number}",
+            slug=f"product-{number}",
+            shop=shop,
+            price=number % 100,
+            quantity=1,
+        )
+        for number in range(products)
+    )
+    return str(TokenObtainPairSerializer.get_token(user).access_token)
+
+
+def wsgi_client(url, token, args):
+    application = get_wsgi_application()
+    parts = urlsplit(url)
+
+    def request():
+        environ = {
+            "PATH_INFO": parts.path,
+            "QUERY_STRING": parts.query,
+            "HTTP_AUTHORIZATION": f"Bearer {token}",
+            "SERVER_NAME": "testserver",
+        }
+        setup_testing_defaults(environ)
+        response = application(environ, lambda status, headers: None)
+        try:
+            for _ in response:
+                time.sleep(args.client_delay)
+        finally:
+            response.close()
+
+    pool = ThreadPoolExecutor(args.workers)
+
+    async def send():
+        await asyncio.get_running_loop().run_in_executor(pool, request)
+
+    return send
+
+
+def asgi_client(url, token, args):
+    application = get_asgi_application()
+    parts = urlsplit(url)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": parts.path,
+        "raw_path": parts.path.encode(),
+        "query_string": parts.query.encode(),
+        "root_path": "",
+        "headers": [
+            (b"host", b"testserver"),
+            (b"authorization", f"Bearer {token}".encode()),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+
+    async def send():
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def respond(message):
+            if message["type"] == "http.response.body":
+                await asyncio.sleep(args.client_delay)
+
+        await application(dict(scope), receive, respond)
+
+    return send
+
+
+async def run_clients(send, args):
+    timer = Timer()
+
+    async def client():
+        for _ in range(args.requests):
+            with timer.measure():
+                await send()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.clients)))
+    return timer, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--client-delay", type=float, default=0.05)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--mode", choices=["wsgi", "asgi"], action="append")
+    args = parser.parse_args()
+    with benchmark_database():
+        token = seed(args.products)
+        clients = {
+            "wsgi": (wsgi_client, reverse("store:product_list")),
+            "asgi": (asgi_client, reverse("store:async_product_list")),
+        }
+        for mode in args.mode or list(clients):
+            make_client, url = clients[mode]
+            send = make_client(f"{url}?page_size=20", token, args)
+            timer, elapsed = asyncio.run(run_clients(send, args))
+            print(
+                f"{mode}: {len(timer.samples) / elapsed:.0f} req/s {timer.summary()}"
+            )
+
+
+if __name__ == "__main__":
+    main()
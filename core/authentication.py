@@ -0,0 +1,138 @@
+"""
+JWT authentication that avoids loading the user on read requests.
+"""
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+# Claim with the issue time in fractions of a second. "iat" is truncated to
+# whole seconds, which cannot tell a token issued just after a revocation
+# from one issued just before it.
+ISSUED_AT_CLAIM = "issued_at"
+
+
+class RevocationList:
+    """In-memory copy of the TokenRevocation table, reloaded periodically.
+
+    Revocations made by this process apply at once; those made by other
+    processes apply within JWT_REVOCATION_REFRESH_INTERVAL seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._jtis = frozenset()
+        self._users = {}
+
+    @property
+    def refresh_interval(self):
+        return getattr(settings, "JWT_REVOCATION_REFRESH_INTERVAL", 30)
+
+    def is_revoked(self, token):
+        self._refresh()
+        return self._matches(token)
+
+    async def ais_revoked(self, token):
+        """is_revoked() for async code, reloading in a thread when it is due."""
+        if self._is_stale(time.monotonic()):
+            await sync_to_async(self._refresh)()
+        return self._matches(token)
+
+    def _matches(self, token):
+        if token.get(jwt_settings.JTI_CLAIM) in self._jtis:
+            return True
+        revoked_at = self._users.get(token.get(jwt_settings.USER_ID_CLAIM))
+        if revoked_at is None:
+            return False
+        issued_at = token.get(ISSUED_AT_CLAIM)
+        if issued_at is not None:
+            return issued_at <= revoked_at
+        # Older tokens only have whole seconds; revoke the whole second.
+        return token.get("iat", 0) <= revoked_at
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def _is_stale(self, now):
+        loaded_at = self._loaded_at
+        return loaded_at is None or now - loaded_at >= self.refresh_interval
+
+    def _refresh(self):
+        now = time.monotonic()
+        with self._lock:
+            if not self._is_stale(now):
+                return
+            self._loaded_at = now
+        from core.models import TokenRevocation
+
+        jtis, users = set(), {}
+        rows = TokenRevocation.objects.filter(expires_at__gt=timezone.now())
+        for jti, user_id, revoked_at in rows.values_list(
+            "jti", "user_id", "revoked_at"
+        ):
+            if jti:
+                jtis.add(jti)
+            else:
+                users[user_id] = max(users.get(user_id, 0), revoked_at.timestamp())
+        self._jtis, self._users = frozenset(jtis), users
+
+
+revocations = RevocationList()
+
+
+class RevocableJWTAuthentication(JWTAuthentication):
+    """JWT authentication that rejects revoked tokens."""
+
+    def authenticate(self, request):
+        validated_token = self.get_request_token(request)
+        if validated_token is None:
+            return None
+        if revocations.is_revoked(validated_token):
+            raise InvalidToken(_("Token has been revoked"))
+        return self.get_token_user(request, validated_token), validated_token
+
+    def get_request_token(self, request):
+        """Return the validated token of the Authorization header, if any."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        return self.get_validated_token(raw_token)
+
+    def get_token_user(self, request, validated_token):
+        return self.get_user(validated_token)
+
+
+class StatelessJWTAuthentication(RevocableJWTAuthentication):
+    """Trust the signed claims of the token on read requests.
+
+    GET, HEAD and OPTIONS requests get a TokenUser carrying the user id,
+    is_staff and is_superuser from the token, so they run no user query.
+    Other requests load the user from the database.
+    """
+
+    def get_token_user(self, request, validated_token):
+        if request.method in SAFE_METHODS:
+            return TokenUser(validated_token)
+        return self.get_user(validated_token)
+
+    async def aauthenticate(self, request):
+        """authenticate() for async views, which only serve reads."""
+        validated_token = self.get_request_token(request)
+        if validated_token is None:
+            return None
+        if await revocations.ais_revoked(validated_token):
+            raise InvalidToken(_("Token has been revoked"))
+        return TokenUser(validated_token), validated_token
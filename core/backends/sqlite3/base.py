@@ -0,0 +1,54 @@
+"""
+SQLite backend tuned for serving a small deployment from one file.
+
+Every new connection runs PRAGMAS, updated with the "pragmas" entry of
+OPTIONS. WAL journaling lets readers carry on while a writer commits,
+and the busy timeout makes writers wait for each other instead of
+failing with "database is locked".
+
+The "transaction_mode" entry of OPTIONS ("DEFERRED", "IMMEDIATE" or
+"EXCLUSIVE") is the BEGIN used by atomic blocks. IMMEDIATE takes the
+write lock when the transaction starts. A deferred transaction that
+reads and then writes fails at once if another connection committed in
+between, without waiting for the busy timeout.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    "journal_mode": "WAL",
+    # With WAL, a crash loses at most the last commits, never consistency.
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    # Negative sizes are in KiB.
+    "cache_size": -64 * 1024,
+    "busy_timeout": 5000,
+    "temp_store": "MEMORY",
+}
+
+TRANSACTION_MODES = ("DEFERRED", "IMMEDIATE", "EXCLUSIVE")
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**PRAGMAS, **params.pop("pragmas", {})}
+        mode = params.pop("transaction_mode", None)
+        if mode is not None and mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"transaction_mode must be one of {', '.join(TRANSACTION_MODES)}."
+            )
+        self.transaction_mode = mode and mode.upper()
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode:
+            self.cursor().execute(f"BEGIN {self.transaction_mode}")
+        else:
+            super()._start_transaction_under_autocommit()
@@ -0,0 +1,99 @@
+"""
+Read-through cache for serialized model representations.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class RepresentationCache:
+    """Cache serializer output per object, in process memory and a shared cache.
+
+    Entries are stored under the object's `uid` together with its
+    `updated_at`, and an entry only counts as a hit while the version still
+    matches. Any save therefore makes old entries miss in every process,
+    and the post_save/post_delete hooks drop them early.
+    """
+
+    def __init__(self, namespace, serializer_class, shared=None):
+        self.namespace = namespace
+        self.serializer_class = serializer_class
+        self._shared = shared
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def options(self):
+        return settings.REPRESENTATION_CACHE
+
+    @property
+    def shared(self):
+        """The cache shared between processes, from REPRESENTATION_CACHE["ALIAS"]."""
+        if self._shared is not None:
+            return self._shared
+        return caches[self.options["ALIAS"]]
+
+    def key(self, uid):
+        return f"repr:{self.namespace}:{uid}"
+
+    @staticmethod
+    def version(instance):
+        return instance.updated_at.isoformat()
+
+    def get(self, instance):
+        return self.get_many([instance])[0]
+
+    def get_many(self, instances):
+        """Return the representations of `instances`, rendering only the misses."""
+        found, missing = {}, {}
+        for instance in instances:
+            key = self.key(instance.uid)
+            entry = self._local_get(key)
+            if entry and entry[0] == self.version(instance):
+                found[key] = entry[1]
+            else:
+                missing[key] = instance
+
+        if missing:
+            shared = self.shared.get_many(list(missing))
+            rendered = {}
+            for key, instance in missing.items():
+                entry = shared.get(key)
+                if not entry or entry[0] != self.version(instance):
+                    entry = (
+                        self.version(instance),
+                        dict(self.serializer_class(instance).data),
+                    )
+                    rendered[key] = entry
+                self._local_set(key, entry)
+                found[key] = entry[1]
+            if rendered:
+                self.shared.set_many(rendered, self.options["TIMEOUT"])
+
+        return [found[self.key(instance.uid)] for instance in instances]
+
+    def invalidate(self, uid):
+        key = self.key(uid)
+        with self._lock:
+            self._local.pop(key, None)
+        self.shared.delete(key)
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def _local_get(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                self._local.move_to_end(key)
+            return entry
+
+    def _local_set(self, key, entry):
+        with self._lock:
+            self._local[key] = entry
+            self._local.move_to_end(key)
+            while len(self._local) > self.options["LOCAL_MAX_ENTRIES"]:
+                self._local.popitem(last=False)
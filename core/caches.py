@@ -0,0 +1,49 @@
+"""
+CACHES entries built from cache URLs, for use in the settings.
+
+    redis://:password@host:6379/0     rediss:// for TLS
+    memcached://host1:11211,host2:11211
+    db://cache_table                  after manage.py createcachetable
+    file:///var/tmp/app-cache
+    locmem://                         per process, for development only
+
+Query string parameters become OPTIONS of the cache, except for Redis,
+which reads them from the URL itself.
+"""
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+BACKENDS = {
+    "redis": "django.core.cache.backends.redis.RedisCache",
+    "rediss": "django.core.cache.backends.redis.RedisCache",
+    "memcached": "django.core.cache.backends.memcached.PyMemcacheCache",
+    "db": "django.core.cache.backends.db.DatabaseCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "dummy": "django.core.cache.backends.dummy.DummyCache",
+}
+
+# Backends whose entries other worker processes cannot see.
+PROCESS_LOCAL = {BACKENDS["locmem"], BACKENDS["dummy"]}
+
+
+def cache_from_url(url, **extra):
+    """Return the settings of the cache at `url`, updated with `extra`."""
+    parts = urlsplit(url)
+    if parts.scheme not in BACKENDS:
+        raise ValueError(f"Unsupported cache URL scheme: {parts.scheme!r}")
+    config = {"BACKEND": BACKENDS[parts.scheme]}
+    if parts.scheme in ("redis", "rediss"):
+        config["LOCATION"] = url
+    else:
+        if parts.scheme == "file":
+            location = unquote(parts.path)
+        else:
+            location = unquote(parts.netloc + parts.path.rstrip("/"))
+        if location:
+            config["LOCATION"] = location.split(",") if "," in location else location
+        options = dict(parse_qsl(parts.query))
+        if options:
+            config["OPTIONS"] = options
+    config.update(extra)
+    return config
+
@@ -0,0 +1,35 @@
+"""
+System checks for the deployment settings.
+"""
+from django.conf import settings
+from django.core.checks import Warning, register
+
+from core.caches import PROCESS_LOCAL
+
+
+def shared_cache_aliases():
+    """Return the cache aliases that hold state every worker must see."""
+    return {
+        "default",
+        settings.CURRENT_SHOP_CACHE_ALIAS,
+        settings.DATABASE_REPLICA_PIN_CACHE_ALIAS,
+        settings.REPRESENTATION_CACHE["ALIAS"],
+    }
+
+
+@register(deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    """Warn when state shared by the workers lives in a per-process cache."""
+    return [
+        Warning(
+            f"CACHES[{alias!r}] is not shared between worker processes.",
+            hint=(
+                "The current shop, read-your-writes pins and cached "
+                "representations would differ per worker. Set CACHE_URL to "
+                "a Redis or Memcached server."
+            ),
+            id="core.W001",
+        )
+        for alias in sorted(shared_cache_aliases())
+        if settings.CACHES[alias]["BACKEND"] in PROCESS_LOCAL
+    ]
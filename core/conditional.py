@@ -0,0 +1,106 @@
+"""
+HTTP conditional GET for API resources.
+
+Responses carry an ETag, and details a Last-Modified date, computed from
+the `updated_at` columns rather than from the body, so a client whose
+copy is current gets a 304 before anything is serialized:
+
+* a detail is validated by the `updated_at` of its row and of the related
+  rows its representation embeds;
+* a list is validated by one aggregate query over the rows it pages
+  through: MAX(updated_at), including embedded relations, COUNT and
+  SUM(id). COUNT and SUM notice rows leaving the list, which MAX alone
+  does not, so lists only send an ETag.
+
+Every write to the rows covered must therefore move `updated_at`,
+including queryset updates such as the stock changes of core.inventory
+(see core.models.ProductQuerySet).
+"""
+import hashlib
+from calendar import timegm
+
+from django.db.models import Count, Max, Sum
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(request, *parts):
+    """Return a weak ETag for `parts`, as seen by this user at this URL."""
+    user_id = getattr(request.user, "pk", None)
+    key = [
+        request.build_absolute_uri(),
+        request.META.get("HTTP_ACCEPT", ""),
+        str(user_id),
+        *map(str, parts),
+    ]
+    digest = hashlib.blake2b("\n".join(key).encode(), digest_size=16).hexdigest()
+    return f"W/{quote_etag(digest)}"
+
+
+def list_state(queryset, related=()):
+    """Return (last modified, count, id sum) of `queryset` with one query.
+
+    `related` names the forward relations, e.g. "shop__user", whose rows are
+    embedded in the representation and count as modifications.
+    """
+    fields = ["updated_at", *(f"{name}__updated_at" for name in related)]
+    aggregates = {f"max_{index}": Max(field) for index, field in enumerate(fields)}
+    state = queryset.order_by().aggregate(
+        count=Count("pk"), id_sum=Sum("pk"), **aggregates
+    )
+    modified = [state[name] for name in aggregates if state[name] is not None]
+    return max(modified, default=None), state["count"], state["id_sum"]
+
+
+def instance_modified(instance, related=()):
+    """Return the last modification of `instance` and its `related` rows."""
+    modified = [instance.updated_at]
+    for name in related:
+        obj = instance
+        for attribute in name.split("__"):
+            obj = getattr(obj, attribute, None)
+        if obj is not None:
+            modified.append(obj.updated_at)
+    return max(modified)
+
+
+def conditional_response(request, respond, etag, last_modified=None):
+    """Return 304 if the client's copy matches, otherwise `respond()`.
+
+    Either way the response carries the validators and revalidation headers.
+    """
+    validators = HttpResponse()
+    validators["ETag"] = etag
+    if last_modified is not None:
+        validators["Last-Modified"] = http_date(timegm(last_modified.utctimetuple()))
+    # Private to the user, and to be revalidated on every use.
+    validators["Cache-Control"] = "private, no-cache"
+    patch_vary_headers(validators, ("Authorization",))
+
+    timestamp = last_modified and timegm(last_modified.utctimetuple())
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp, response=validators
+    )
+    if response is not validators:
+        return response
+    response = respond()
+    if 200 <= response.status_code < 300:
+        for name, value in validators.items():
+            if name not in ("Content-Type", "Vary"):
+                response[name] = value
+        patch_vary_headers(response, ("Authorization",))
+    return response
+
+
+def conditional_list(request, queryset, respond, related=()):
+    """conditional_response() for a list of the rows of `queryset`."""
+    etag = make_etag(request, *list_state(queryset, related))
+    return conditional_response(request, respond, etag)
+
+
+def conditional_detail(request, instance, respond, related=()):
+    """conditional_response() for the representation of `instance`."""
+    last_modified = instance_modified(instance, related)
+    etag = make_etag(request, instance.pk, last_modified.isoformat())
+    return conditional_response(request, respond, etag, last_modified)
@@ -0,0 +1,94 @@
+"""
+Scatter-gather over shards: run one query per shard concurrently, then
+merge the sorted results.
+
+Every shard gets the same deadline, so a request waits for the slowest
+shard rather than for all of them in turn, and never longer than
+FANOUT_TIMEOUT. Shards that miss the deadline are left out and reported.
+With FANOUT_MAX_WORKERS = 0 the shards run one after another in the
+calling thread, which the tests rely on.
+"""
+import asyncio
+import contextvars
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the thread pool shared by this process, creating it if needed."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.FANOUT_MAX_WORKERS, thread_name_prefix="fanout"
+            )
+        return _executor
+
+
+def _run_in_worker(call):
+    # Worker threads hold their own connections; drop broken or old ones.
+    close_old_connections()
+    try:
+        return call()
+    finally:
+        close_old_connections()
+
+
+def gather(calls, timeout=None):
+    """Run the callables of `calls`, a {shard: callable}, concurrently.
+
+    Return ({shard: result}, [shards that timed out]). Exceptions raised by
+    a shard propagate. The calls see the context variables of the caller,
+    so they route their reads like it.
+    """
+    timeout = settings.FANOUT_TIMEOUT if timeout is None else timeout
+    if not settings.FANOUT_MAX_WORKERS:
+        return {shard: call() for shard, call in calls.items()}, []
+    executor = get_executor()
+    futures = {
+        executor.submit(contextvars.copy_context().run, _run_in_worker, call): shard
+        for shard, call in calls.items()
+    }
+    done, pending = wait(futures, timeout=timeout)
+    for future in pending:
+        # A running query cannot be interrupted; its result is dropped.
+        future.cancel()
+    return (
+        {futures[future]: future.result() for future in done},
+        [futures[future] for future in pending],
+    )
+
+
+async def agather(calls, timeout=None):
+    """gather() for async code, running each shard in a thread of its own."""
+    timeout = settings.FANOUT_TIMEOUT if timeout is None else timeout
+    if not settings.FANOUT_MAX_WORKERS:
+        return {shard: await sync_to_async(call)() for shard, call in calls.items()}, []
+    tasks = {
+        asyncio.ensure_future(
+            sync_to_async(_run_in_worker, thread_sensitive=False)(call)
+        ): shard
+        for shard, call in calls.items()
+    }
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    return (
+        {tasks[task]: task.result() for task in done},
+        [tasks[task] for task in pending],
+    )
+
+
+def merge(results, key, reverse=False, limit=None):
+    """k-way merge of lists each already sorted by `key` into one list."""
+    merged = heapq.merge(*results, key=key, reverse=reverse)
+    return list(islice(merged, limit))
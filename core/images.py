@@ -0,0 +1,154 @@
+"""
+Background rendering of image renditions (thumbnail, medium, WebP).
+
+Resizing is CPU bound, so renditions are rendered with Pillow in a process
+pool instead of on the request thread. Every file is written under a
+temporary name and moved into place with os.replace(), so readers never see
+a half written image.
+"""
+import logging
+import multiprocessing
+import os
+import posixpath
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS_DIR = "__renditions__"
+EXTENSIONS = {"JPEG": "jpg", "WEBP": "webp", "PNG": "png"}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def rendition_name(source_name, rendition, fmt):
+    """Return the storage name of one rendition of `source_name`."""
+    directory, filename = posixpath.split(source_name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(
+        directory, RENDITIONS_DIR, f"{stem}.{rendition}.{EXTENSIONS[fmt]}"
+    )
+
+
+def render_derivatives(root, source_name, renditions):
+    """Render `renditions` of the image `source_name` stored under `root`.
+
+    Runs in a worker process, so it takes and returns plain data only:
+    {rendition: {"name": ..., "width": ..., "height": ...}}.
+    """
+    rendered = {}
+    with Image.open(os.path.join(root, source_name)) as source:
+        source = ImageOps.exif_transpose(source)
+        for rendition, options in renditions.items():
+            fmt = options.get("format", "JPEG")
+            image = source.copy()
+            image.thumbnail(options["size"])
+            if fmt == "JPEG" and image.mode != "RGB":
+                image = image.convert("RGB")
+            elif image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA")
+            name = rendition_name(source_name, rendition, fmt)
+            _save_atomic(
+                image, os.path.join(root, name), fmt, options.get("quality", 85)
+            )
+            rendered[rendition] = {
+                "name": name,
+                "width": image.width,
+                "height": image.height,
+            }
+    return rendered
+
+
+def _save_atomic(image, path, fmt, quality):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            image.save(tmp_file, format=fmt, quality=quality)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def get_executor():
+    """Return the process pool shared by this process, creating it if needed."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def schedule_renditions(instance, field_name="image"):
+    """Render the renditions of an image field once the transaction commits."""
+    model, pk = type(instance), instance.pk
+    source_name = getattr(instance, field_name).name
+    transaction.on_commit(partial(submit, model, pk, source_name, field_name))
+
+
+def submit(model, pk, source_name, field_name="image"):
+    """Render the renditions of `source_name` and store them on the row.
+
+    With IMAGE_WORKERS = 0 the work runs inline, which the tests rely on.
+    """
+    storage = model._meta.get_field(field_name).storage
+    args = (storage.location, source_name, settings.IMAGE_RENDITIONS)
+    if not settings.IMAGE_WORKERS:
+        future = Future()
+        try:
+            future.set_result(render_derivatives(*args))
+        except Exception as exc:
+            future.set_exception(exc)
+        store_renditions(model, pk, source_name, field_name, future)
+        return future
+    future = get_executor().submit(render_derivatives, *args)
+    future.add_done_callback(
+        partial(_store_from_worker, model, pk, source_name, field_name)
+    )
+    return future
+
+
+def store_renditions(model, pk, source_name, field_name, future):
+    """Save rendered sizes, unless the image was replaced in the meantime."""
+    try:
+        sizes = future.result()
+    except Exception:
+        logger.exception("Could not render renditions of %s", source_name)
+        return
+    model._default_manager.filter(pk=pk, **{field_name: source_name}).update(
+        **{
+            f"{field_name}_renditions": {"source": source_name, "sizes": sizes},
+            "updated_at": timezone.now(),
+        }
+    )
+
+
+def _store_from_worker(model, pk, source_name, field_name, future):
+    # Done callbacks run on the pool's management thread, which would
+    # otherwise keep its database connection open forever.
+    try:
+        store_renditions(model, pk, source_name, field_name, future)
+    finally:
+        connections.close_all()
+
+
+def current_renditions(instance, field_name="image"):
+    """Return the rendered sizes of the field's current image, or {}."""
+    image = getattr(instance, field_name, None)
+    renditions = getattr(instance, f"{field_name}_renditions", None) or {}
+    if not image or renditions.get("source") != image.name:
+        return {}
+    return renditions["sizes"]
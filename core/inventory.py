@@ -0,0 +1,163 @@
+"""
+Stock reservation for cart items and orders.
+
+Stock is taken with conditional UPDATEs (`quantity = quantity - n WHERE
+quantity >= n`), one statement for all products involved, so no product
+row is locked for longer than that statement and stock can never go
+negative.
+
+A cart item moves through three states:
+
+* not reserved: ``stock_reserved=False``
+* held until a deadline: ``stock_reserved=True, reserved_until=<time>``
+* sold: ``stock_reserved=True, reserved_until=None``
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Exists, F, IntegerField, OuterRef, Value, When
+from django.utils import timezone
+
+from core import models
+
+
+class InsufficientStock(Exception):
+    """Raised when some products do not have enough stock left."""
+
+    def __init__(self, product_ids):
+        super().__init__(f"Not enough stock for products {product_ids}")
+        self.product_ids = product_ids
+
+
+class AlreadyOrdered(Exception):
+    """Raised when some cart items are already sold or part of an order."""
+
+    def __init__(self, item_ids):
+        super().__init__(f"Cart items {item_ids} are already ordered")
+        self.item_ids = item_ids
+
+
+class _Shortage(Exception):
+    pass
+
+
+def _per_product(quantities):
+    return Case(
+        *(When(id=pk, then=Value(count)) for pk, count in quantities.items()),
+        output_field=IntegerField(),
+    )
+
+
+def take_stock(quantities):
+    """Decrement stock for {product_id: quantity}, for all products or none."""
+    quantities = {pk: count for pk, count in quantities.items() if count}
+    if not quantities:
+        return
+    needed = _per_product(quantities)
+    products = models.Product.objects.filter(id__in=quantities)
+    try:
+        with transaction.atomic():
+            updated = products.filter(quantity__gte=needed).update(
+                quantity=F("quantity") - needed
+            )
+            if updated != len(quantities):
+                raise _Shortage
+    except _Shortage:
+        short = products.filter(quantity__lt=needed).values_list("id", flat=True)
+        raise InsufficientStock(sorted(short))
+
+
+def return_stock(quantities):
+    """Increment stock for {product_id: quantity}."""
+    quantities = {pk: count for pk, count in quantities.items() if count}
+    if quantities:
+        models.Product.objects.filter(id__in=quantities).update(
+            quantity=F("quantity") + _per_product(quantities)
+        )
+
+
+def _quantities(rows):
+    quantities = Counter()
+    for product_id, quantity in rows:
+        quantities[product_id] += quantity
+    return quantities
+
+
+def reserve_items(items):
+    """Hold stock for new cart items until CART_RESERVATION_TTL has passed."""
+    items = [item for item in items if not item.stock_reserved]
+    with transaction.atomic(savepoint=False):
+        take_stock(_quantities((item.product_id, item.quantity) for item in items))
+        reserved_until = timezone.now() + settings.CART_RESERVATION_TTL
+        models.OrderItems.objects.filter(id__in=[item.id for item in items]).update(
+            stock_reserved=True, reserved_until=reserved_until
+        )
+    for item in items:
+        item.stock_reserved, item.reserved_until = True, reserved_until
+
+
+def commit_items(item_ids):
+    """Turn the reservations of ordered items into sales.
+
+    Items whose reservation was already released are reserved again; if
+    any of them is out of stock, nothing is committed. Items already sold
+    or linked to an order raise AlreadyOrdered, so the same cart cannot be
+    ordered twice.
+    """
+    ordered = models.Order.orderitem.through.objects.filter(
+        orderitems_id=OuterRef("pk")
+    )
+    with transaction.atomic(savepoint=False):
+        # Lock every item, so release_expired cannot hand back their stock
+        # and a concurrent order cannot take them while they are being sold.
+        rows = list(
+            models.OrderItems.objects.select_for_update()
+            .filter(id__in=item_ids)
+            .annotate(ordered=Exists(ordered))
+            .values_list(
+                "id",
+                "product_id",
+                "quantity",
+                "stock_reserved",
+                "reserved_until",
+                "ordered",
+            )
+        )
+        taken = sorted(
+            pk
+            for pk, _, _, reserved, until, ordered in rows
+            if ordered or (reserved and until is None)
+        )
+        if taken:
+            raise AlreadyOrdered(taken)
+        take_stock(
+            _quantities(
+                (product_id, quantity)
+                for _, product_id, quantity, reserved, _, _ in rows
+                if not reserved
+            )
+        )
+        models.OrderItems.objects.filter(id__in=item_ids).update(
+            stock_reserved=True, reserved_until=None
+        )
+
+
+def release_expired(now=None, batch_size=1000):
+    """Give back the stock of cart items whose reservation has expired."""
+    now = now or timezone.now()
+    released = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                models.OrderItems.objects.select_for_update(skip_locked=True)
+                .filter(stock_reserved=True, reserved_until__lt=now)
+                .values_list("id", "product_id", "quantity")[:batch_size]
+            )
+            return_stock(_quantities(row[1:] for row in rows))
+            models.OrderItems.objects.filter(id__in=[row[0] for row in rows]).update(
+                stock_reserved=False, reserved_until=None
+            )
+        released += len(rows)
+        if len(rows) < batch_size:
+            return released
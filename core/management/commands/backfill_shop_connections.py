@@ -0,0 +1,44 @@
+"""
+Fill the ShopConnection table from accepted groupings.
+"""
+from django.core.management.base import BaseCommand
+
+from core import models
+
+
+def backfill(UserGroup, ShopConnection, batch_size=1000):
+    """Create the missing connection rows; return the number of rows written.
+
+    Takes the models as arguments, so migrations can pass their historical
+    versions.
+    """
+    groups = (
+        UserGroup.objects.filter(status="accepted")
+        .values_list("sender_id", "receiver_id")
+        .iterator(chunk_size=batch_size)
+    )
+    batch, total = [], 0
+    for sender_id, receiver_id in groups:
+        batch.append(ShopConnection(shop_id=sender_id, friend_id=receiver_id))
+        batch.append(ShopConnection(shop_id=receiver_id, friend_id=sender_id))
+        if len(batch) >= batch_size:
+            total += _flush(ShopConnection, batch)
+    return total + _flush(ShopConnection, batch)
+
+
+def _flush(ShopConnection, batch):
+    count = len(batch)
+    ShopConnection.objects.bulk_create(batch, ignore_conflicts=True)
+    batch.clear()
+    return count
+
+
+class Command(BaseCommand):
+    help = "Create the missing ShopConnection rows for accepted groupings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = backfill(models.UserGroup, models.ShopConnection, options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {total} connection rows."))
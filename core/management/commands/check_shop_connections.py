@@ -0,0 +1,49 @@
+"""
+Compare the ShopConnection table against accepted groupings.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core import models
+
+
+class Command(BaseCommand):
+    help = (
+        "Report ShopConnection rows that disagree with accepted groupings. "
+        "Safe to run while the site is serving traffic."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Re-sync every pair that was found inconsistent.",
+        )
+
+    def handle(self, *args, **options):
+        expected = set()
+        groups = models.UserGroup.objects.filter(status="accepted").values_list(
+            "sender_id", "receiver_id"
+        )
+        for sender_id, receiver_id in groups.iterator():
+            expected.add((sender_id, receiver_id))
+            expected.add((receiver_id, sender_id))
+
+        actual = set(
+            models.ShopConnection.objects.values_list("shop_id", "friend_id").iterator()
+        )
+
+        # Both sides were read without locking, so a pair can look wrong only
+        # because a grouping changed in between. Every pair is reported by its
+        # unordered key and repairing it re-reads the groupings.
+        pairs = {tuple(sorted(pair)) for pair in expected ^ actual}
+        for shop_id, friend_id in sorted(pairs):
+            self.stdout.write(f"Inconsistent connection: {shop_id} <-> {friend_id}")
+            if options["repair"]:
+                models.ShopConnection.objects.sync_pair(shop_id, friend_id)
+
+        if not pairs:
+            self.stdout.write(self.style.SUCCESS("Shop connections are consistent."))
+        elif options["repair"]:
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(pairs)} pairs."))
+        else:
+            raise CommandError(f"Found {len(pairs)} inconsistent pairs.")
@@ -0,0 +1,125 @@
+"""
+Delete stored files that no row refers to any more.
+"""
+import os
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from core import images, models
+from core.storage import BLOB_DIR, ContentAddressedStorage
+
+
+class Command(BaseCommand):
+    help = "Delete unreferenced files from the content-addressed media storage."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours",
+            type=float,
+            default=24,
+            help="Keep files that were unreferenced or written more recently.",
+        )
+        parser.add_argument(
+            "--recount",
+            action="store_true",
+            help="Recompute every reference count from the database first.",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["recount"]:
+            self.recount()
+        cutoff = timezone.now() - timedelta(hours=options["grace_hours"])
+        dry_run = options["dry_run"]
+        deleted = 0
+
+        unreferenced = models.MediaBlob.objects.filter(
+            ref_count=0, updated_at__lt=cutoff
+        ).values_list("name", flat=True)
+        for name in unreferenced.iterator():
+            if dry_run:
+                self.stdout.write(name)
+                deleted += 1
+            elif self.delete_unreferenced(name, cutoff):
+                deleted += 1
+
+        # Files written by uploads whose transaction rolled back never got
+        # a MediaBlob row.
+        known = set(models.MediaBlob.objects.values_list("name", flat=True))
+        for name, modified in self.stored_files():
+            if name not in known and modified < cutoff:
+                if dry_run:
+                    self.stdout.write(name)
+                # Skip the files an upload claimed since they were listed.
+                elif default_storage.get_modified_time(name) >= cutoff:
+                    continue
+                else:
+                    self.delete_file(name)
+                deleted += 1
+
+        verb = "Would delete" if dry_run else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {deleted} unreferenced files."))
+
+    def delete_unreferenced(self, name, cutoff):
+        """Delete the blob `name` and its file if it is still unreferenced."""
+        with transaction.atomic():
+            # An upload of the same content claims the row in the meantime,
+            # or waits for this lock and then finds the file gone.
+            blob = (
+                models.MediaBlob.objects.select_for_update()
+                .filter(name=name, ref_count=0, updated_at__lt=cutoff)
+                .first()
+            )
+            if blob is None:
+                return False
+            blob.delete()
+            self.delete_file(name)
+        return True
+
+    def recount(self):
+        counts = Counter()
+        for model, fields in models.BLOB_FIELDS.items():
+            for field in fields:
+                rows = model.objects.values_list(field).annotate(count=Count("pk"))
+                for name, count in rows:
+                    if ContentAddressedStorage.is_blob(name):
+                        counts[name] += count
+        models.MediaBlob.objects.bulk_create(
+            [models.MediaBlob(name=name) for name in counts], ignore_conflicts=True
+        )
+        now = timezone.now()
+        for blob in models.MediaBlob.objects.iterator():
+            if blob.ref_count != counts[blob.name]:
+                models.MediaBlob.objects.filter(pk=blob.pk).update(
+                    ref_count=counts[blob.name], updated_at=now
+                )
+
+    def stored_files(self):
+        """Yield (name, modified time) of every file in the blob directory."""
+        root = default_storage.path(BLOB_DIR)
+        for directory, subdirectories, filenames in os.walk(root):
+            if images.RENDITIONS_DIR in subdirectories:
+                subdirectories.remove(images.RENDITIONS_DIR)
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, default_storage.location)
+                modified = os.path.getmtime(path)
+                yield (
+                    name.replace(os.sep, "/"),
+                    datetime.fromtimestamp(modified, dt_timezone.utc),
+                )
+
+    def delete_file(self, name):
+        default_storage.delete(name)
+        stem = os.path.splitext(os.path.basename(name))[0]
+        renditions = os.path.join(os.path.dirname(name), images.RENDITIONS_DIR)
+        if default_storage.exists(renditions):
+            for filename in default_storage.listdir(renditions)[1]:
+                if filename.startswith(stem + "."):
+                    default_storage.delete(os.path.join(renditions, filename))
@@ -0,0 +1,16 @@
+"""
+Rebuild the product search index.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = "Index every product for search again."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            search.rebuild()
+        self.stdout.write(self.style.SUCCESS("Rebuilt the product search index."))
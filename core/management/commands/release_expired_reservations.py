@@ -0,0 +1,17 @@
+"""
+Give back the stock held by abandoned cart items.
+"""
+from django.core.management.base import BaseCommand
+
+from core import inventory
+
+
+class Command(BaseCommand):
+    help = "Release stock reservations older than CART_RESERVATION_TTL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        released = inventory.release_expired(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Released {released} reservations."))
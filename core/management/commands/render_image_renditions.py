@@ -0,0 +1,34 @@
+"""
+Render the missing renditions of product images.
+"""
+from concurrent.futures import wait
+
+from django.core.management.base import BaseCommand
+
+from core import images, models
+
+
+class Command(BaseCommand):
+    help = "Render the thumbnail, medium and WebP renditions of product images."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--force", action="store_true", help="Render up-to-date images again."
+        )
+
+    def handle(self, *args, **options):
+        products = (
+            models.Product.objects.exclude(image="")
+            .values_list("id", "image", "image_renditions")
+            .iterator(chunk_size=options["batch_size"])
+        )
+        futures = []
+        for pk, image, renditions in products:
+            if options["force"] or renditions.get("source") != image:
+                futures.append(images.submit(models.Product, pk, image))
+                if len(futures) >= options["batch_size"]:
+                    wait(futures)
+                    futures.clear()
+        wait(futures)
+        self.stdout.write(self.style.SUCCESS("Rendered product image renditions."))
@@ -0,0 +1,65 @@
+"""
+Move files uploaded before the content-addressed storage into it.
+"""
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models.functions import Now
+
+from core import models
+from core.storage import ContentAddressedStorage
+
+
+class Command(BaseCommand):
+    help = (
+        "Store uploads kept under their original names once, under the hash "
+        "of their content, and point the rows at the stored copies."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-files",
+            action="store_true",
+            help="Leave the original files in place.",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        moved = set()
+        for model, fields in models.BLOB_FIELDS.items():
+            for field in fields:
+                names = (
+                    model.objects.exclude(**{field: ""})
+                    .values_list(field, flat=True)
+                    .distinct()
+                )
+                for name in list(names):
+                    if ContentAddressedStorage.is_blob(name):
+                        continue
+                    if not default_storage.exists(name):
+                        self.stderr.write(f"Missing file: {name}")
+                        continue
+                    if dry_run:
+                        self.stdout.write(name)
+                    else:
+                        self.store(model, field, name)
+                    moved.add(name)
+
+        if not dry_run and not options["keep_files"]:
+            # Only once every field points at the stored copies.
+            for name in moved:
+                default_storage.delete(name)
+        verb = "Would store" if dry_run else "Stored"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(moved)} uploaded files."))
+        if moved and not dry_run:
+            self.stdout.write("Run render_image_renditions for the moved images.")
+
+    def store(self, model, field, name):
+        with default_storage.open(name) as content:
+            blob = default_storage.save(name, content)
+        with transaction.atomic():
+            count = model.objects.filter(**{field: name}).update(
+                **{field: blob, "updated_at": Now()}
+            )
+            models.MediaBlob.objects.acquire([blob] * count)
@@ -0,0 +1,68 @@
+"""
+Middleware for the store API.
+
+Both middlewares run in sync and async mode, so async views served under
+ASGI are not switched to a thread for them.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+from rest_framework.permissions import SAFE_METHODS
+
+from core import models
+from core.routers import pin_to_primary, request_user_id
+
+
+class CurrentShopMiddleware:
+    """Expose the shop the user is logged in to as `request.shop`.
+
+    The shop is resolved lazily, after DRF has authenticated the request,
+    and at most once per request. Async views call
+    Shop.objects.aget_default() instead.
+    """
+
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        request.shop = SimpleLazyObject(
+            lambda: models.Shop.objects.get_default(request.user)
+        )
+        return self.get_response(request)
+
+
+class ReplicaPinMiddleware:
+    """Pin a user to the primary database after a write request.
+
+    DRF authenticates inside the view, so the user is only known once the
+    response is ready.
+    """
+
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self.pin(request)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        self.pin(request)
+        return response
+
+    def pin(self, request):
+        if settings.DATABASE_REPLICAS and request.method not in SAFE_METHODS:
+            user_id = request_user_id(request)
+            if user_id is not None:
+                pin_to_primary(user_id)
@@ -0,0 +1,21 @@
+# Generated by Django 4.1.7 on 2026-10-17 23:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_alter_category_uid_alter_order_uid_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.1.7 on 2026-10-17 23:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShopConnection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('friend', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.shop')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='connections', to='core.shop')),
+            ],
+            options={
+                'unique_together': {('shop', 'friend')},
+            },
+        ),
+    ]
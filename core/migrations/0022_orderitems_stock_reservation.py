@@ -0,0 +1,23 @@
+# Generated by Django 4.1.7 on 2026-10-17 23:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_shopconnection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitems',
+            name='reserved_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='orderitems',
+            name='stock_reserved',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.1.7 on 2026-10-17 23:53
+
+from django.db import migrations, models
+
+
+def keep_one_default_shop(apps, schema_editor):
+    """Leave only the most recently updated default shop of every user."""
+    Shop = apps.get_model('core', 'Shop')
+    seen = set()
+    extra = []
+    for pk, user_id in (
+        Shop.objects.filter(default=True)
+        .order_by('user_id', '-updated_at', '-id')
+        .values_list('id', 'user_id')
+    ):
+        if user_id in seen:
+            extra.append(pk)
+        seen.add(user_id)
+    Shop.objects.filter(id__in=extra).update(default=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_orderitems_stock_reservation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orderitems',
+            index=models.Index(fields=['shop', 'created_at', 'id'], name='orderitems_shop_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['shop', 'created_at', 'id'], name='product_shop_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shop',
+            index=models.Index(fields=['user', 'default'], name='shop_user_default_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shop',
+            index=models.Index(fields=['category', 'created_at', 'id'], name='shop_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usergroup',
+            index=models.Index(fields=['receiver', 'status', 'created_at', 'id'], name='usergroup_receiver_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usergroup',
+            index=models.Index(fields=['sender', 'status', 'created_at', 'id'], name='usergroup_sender_idx'),
+        ),
+        migrations.RunPython(keep_one_default_shop, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='shop',
+            constraint=models.UniqueConstraint(condition=models.Q(('default', True)), fields=('user',), name='unique_default_shop_per_user'),
+        ),
+    ]
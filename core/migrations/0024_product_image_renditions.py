@@ -0,0 +1,18 @@
+# Generated by Django 4.1.7 on 2026-10-17 23:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+from core import search
+
+
+def create_index(apps, schema_editor):
+    backend = search.get_backend(schema_editor.connection.vendor)
+    if backend:
+        with schema_editor.connection.cursor() as cursor:
+            backend.create(cursor)
+            backend.index(cursor, "1 = 1", [])
+
+
+def drop_index(apps, schema_editor):
+    backend = search.get_backend(schema_editor.connection.vendor)
+    if backend:
+        with schema_editor.connection.cursor() as cursor:
+            backend.drop(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_tokenrevocation'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.1.7 on 2026-10-18 00:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_product_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['shop', 'price', 'id'], name='product_shop_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('quantity__gt', 0)), fields=['shop', 'created_at', 'id'], name='product_in_stock_idx'),
+        ),
+    ]
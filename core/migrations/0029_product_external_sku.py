@@ -0,0 +1,22 @@
+# Generated by Django 4.1.7 on 2026-10-18 00:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_product_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='external_sku',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='product',
+            constraint=models.UniqueConstraint(fields=('shop', 'external_sku'), name='unique_product_sku_per_shop'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.1.7 on 2026-10-18 00:25
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# Room kept at the end of a base slug for its numeric suffix, as in
+# core.slugs at the time of this migration.
+SUFFIX_LENGTH = 8
+
+
+def number_duplicate_slugs(apps, schema_editor):
+    """Give every product but the oldest of a shared slug a numbered one."""
+    Product = apps.get_model("core", "Product")
+    max_length = Product._meta.get_field("slug").max_length
+    duplicates = (
+        Product.objects.values("slug")
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)
+        .values_list("slug", flat=True)
+    )
+    for slug in list(duplicates):
+        # Shorten the base so the numbered slugs fit the column.
+        base = slug[: max_length - SUFFIX_LENGTH].strip("-") or "product"
+        taken = set(
+            Product.objects.filter(slug__startswith=f"{base}-").values_list(
+                "slug", flat=True
+            )
+        )
+        ids = Product.objects.filter(slug=slug).order_by("id").values_list(
+            "id", flat=True
+        )
+        number = 1
+        for product_id in list(ids)[1:]:
+            number += 1
+            while f"{base}-{number}" in taken:
+                number += 1
+            Product.objects.filter(id=product_id).update(slug=f"{base}-{number}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_product_external_sku'),
+    ]
+
+    operations = [
+        migrations.RunPython(number_duplicate_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='product',
+            name='slug',
+            field=models.SlugField(editable=False, unique=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.1.7 on 2026-10-18 02:10
+
+from django.db import migrations
+
+from core.management.commands.backfill_shop_connections import backfill
+
+
+def backfill_shop_connections(apps, schema_editor):
+    """Connect the shops of groupings accepted before ShopConnection existed."""
+    backfill(
+        apps.get_model("core", "UserGroup"), apps.get_model("core", "ShopConnection")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0030_product_unique_slug'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_shop_connections, migrations.RunPython.noop),
+    ]
@@ -1,15 +1,24 @@
 from django.conf import settings
-from django.db import models
+from django.core.cache import caches
+from django.db import models, transaction
+from django.db.models import ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, Now
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin,
 )
 import uuid
-from autoslug import AutoSlugField
 from versatileimagefield.fields import VersatileImageField
 from django.dispatch import receiver
-from django.db.models.signals import pre_save
+from django.utils import timezone
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from core import images, search
+from core.storage import ContentAddressedStorage
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+from core.sequences import SequenceAllocator, max_value_seed
+from core.slugs import SlugAllocator
 
 
 class BaseModelWithUID(models.Model):
@@ -21,6 +30,53 @@ class BaseModelWithUID(models.Model):
         abstract = True
 
 
+class Sequence(models.Model):
+    """Named counter that hands out blocks of unique integers."""
+
+    name = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class MediaBlobManager(models.Manager):
+    """Manager for reference counts of stored files."""
+
+    def acquire(self, names):
+        """Count one more reference to each stored file in `names`."""
+        names = [name for name in names if ContentAddressedStorage.is_blob(name)]
+        if names:
+            self.bulk_create(
+                [self.model(name=name) for name in set(names)], ignore_conflicts=True
+            )
+            for name in names:
+                self.filter(name=name).update(
+                    ref_count=F("ref_count") + 1, updated_at=timezone.now()
+                )
+
+    def release(self, names):
+        """Count one reference less to each stored file in `names`."""
+        for name in names:
+            if ContentAddressedStorage.is_blob(name):
+                self.filter(name=name, ref_count__gt=0).update(
+                    ref_count=F("ref_count") - 1, updated_at=timezone.now()
+                )
+
+
+class MediaBlob(models.Model):
+    """A file in ContentAddressedStorage and the number of rows using it."""
+
+    name = models.CharField(max_length=255, unique=True)
+    ref_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = MediaBlobManager()
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
+
+
 class Category(BaseModelWithUID):
     """Category object"""
 
@@ -65,6 +121,118 @@ class User(AbstractBaseUser, PermissionsMixin, BaseModelWithUID):
     USERNAME_FIELD = "email"
 
 
+class TokenRevocationManager(models.Manager):
+    """Manager for revoked JWTs."""
+
+    def revoke_token(self, token):
+        """Revoke one token, until it expires anyway."""
+        self.create(
+            jti=token[jwt_settings.JTI_CLAIM],
+            user_id=token[jwt_settings.USER_ID_CLAIM],
+            expires_at=datetime_from_epoch(token["exp"]),
+        )
+        self._forget()
+
+    def revoke_user(self, user_id):
+        """Revoke every token issued to the user so far."""
+        lifetime = max(
+            jwt_settings.ACCESS_TOKEN_LIFETIME, jwt_settings.REFRESH_TOKEN_LIFETIME
+        )
+        self.create(user_id=user_id, expires_at=timezone.now() + lifetime)
+        self._forget()
+
+    def _forget(self):
+        from core.authentication import revocations
+
+        revocations.invalidate()
+        transaction.on_commit(revocations.invalidate)
+
+
+class TokenRevocation(models.Model):
+    """A revoked token, or with no jti, all tokens issued to a user before."""
+
+    jti = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = TokenRevocationManager()
+
+    def __str__(self):
+        return f"{self.jti or 'all tokens'} of user {self.user_id}"
+
+
+CREDENTIAL_FIELDS = ("password", "is_active", "is_staff", "is_superuser")
+
+
+def _credentials(instance):
+    return {
+        name: instance.__dict__[name]
+        for name in CREDENTIAL_FIELDS
+        if name in instance.__dict__
+    }
+
+
+@receiver(post_init, sender=User)
+def remember_credentials(sender, instance, **kwargs):
+    instance._credentials = _credentials(instance)
+
+
+@receiver(post_save, sender=User)
+def revoke_changed_credentials(sender, instance, created, raw=False, **kwargs):
+    """Revoke the user's tokens when their password or claims change."""
+    previous, current = instance._credentials, _credentials(instance)
+    changed = any(current[name] != value for name, value in previous.items())
+    if changed and not (created or raw):
+        TokenRevocation.objects.revoke_user(instance.pk)
+    instance._credentials = current
+
+
+class ShopManager(models.Manager):
+    """Manager for shops.
+
+    The default shop of each user is cached in CURRENT_SHOP_CACHE_ALIAS,
+    which must be shared by all workers: a worker only drops the entries of
+    the cache it can reach, and the others would keep writing to the shop
+    the user left until the entry expires.
+    """
+
+    @property
+    def default_cache(self):
+        return caches[settings.CURRENT_SHOP_CACHE_ALIAS]
+
+    def get_default(self, user):
+        """Return the shop the user is logged in to, cached per user."""
+        key = self.default_cache_key(user.pk)
+        shop = self.default_cache.get(key)
+        if shop is None:
+            shop = self.get(user_id=user.pk, default=True)
+            self.default_cache.set(key, shop, settings.CURRENT_SHOP_CACHE_TIMEOUT)
+        return shop
+
+    async def aget_default(self, user):
+        """get_default() for async views."""
+        key = self.default_cache_key(user.pk)
+        shop = await self.default_cache.aget(key)
+        if shop is None:
+            shop = await self.aget(user_id=user.pk, default=True)
+            await self.default_cache.aset(
+                key, shop, settings.CURRENT_SHOP_CACHE_TIMEOUT
+            )
+        return shop
+
+    def forget_default(self, user_id):
+        """Drop the cached default shop, now and when the transaction commits."""
+        key = self.default_cache_key(user_id)
+        default_cache = self.default_cache
+        default_cache.delete(key)
+        transaction.on_commit(lambda: default_cache.delete(key))
+
+    @staticmethod
+    def default_cache_key(user_id):
+        return f"default-shop:{user_id}"
+
+
 class Shop(BaseModelWithUID):
     """Shop model"""
 
@@ -80,11 +248,31 @@ class Shop(BaseModelWithUID):
         blank=True,
         null=True,
     )
+    objects = ShopManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "default"], name="shop_user_default_idx"),
+            models.Index(fields=["category", "created_at", "id"], name="shop_category_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user"],
+                condition=Q(default=True),
+                name="unique_default_shop_per_user",
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
+@receiver(post_save, sender=Shop)
+@receiver(post_delete, sender=Shop)
+def forget_default_shop(sender, instance, **kwargs):
+    Shop.objects.forget_default(instance.user_id)
+
+
 class UserGroup(BaseModelWithUID):
     """Create a new user group"""
 
@@ -100,6 +288,16 @@ class UserGroup(BaseModelWithUID):
 
     class Meta:
         unique_together = ("sender", "receiver")
+        indexes = [
+            models.Index(
+                fields=["receiver", "status", "created_at", "id"],
+                name="usergroup_receiver_idx",
+            ),
+            models.Index(
+                fields=["sender", "status", "created_at", "id"],
+                name="usergroup_sender_idx",
+            ),
+        ]
 
     status = models.CharField(max_length=15, choices=CHOICES)
 
@@ -107,20 +305,204 @@ class UserGroup(BaseModelWithUID):
         return f"Sender: {self.sender}, Receiver: {self.receiver}"
 
 
+class ShopConnectionManager(models.Manager):
+    """Manager for the symmetric shop friendship table."""
+
+    def friend_ids(self, shop):
+        """Return a lazy subquery of the ids of shops connected to `shop`."""
+        return self.filter(shop=shop).values("friend")
+
+    def friends_of(self, shop):
+        """Return the shops connected to `shop`."""
+        return Shop.objects.filter(id__in=self.friend_ids(shop))
+
+    def sync_pair(self, shop_id, friend_id):
+        """Make the rows for a pair of shops match their groupings."""
+        with transaction.atomic():
+            accepted = UserGroup.objects.filter(
+                Q(sender_id=shop_id, receiver_id=friend_id)
+                | Q(sender_id=friend_id, receiver_id=shop_id),
+                status="accepted",
+            ).exists()
+            pair = Q(shop_id=shop_id, friend_id=friend_id) | Q(
+                shop_id=friend_id, friend_id=shop_id
+            )
+            if accepted:
+                self.bulk_create(
+                    [
+                        self.model(shop_id=shop_id, friend_id=friend_id),
+                        self.model(shop_id=friend_id, friend_id=shop_id),
+                    ],
+                    ignore_conflicts=True,
+                )
+            else:
+                self.filter(pair).delete()
+
+
+class ShopConnection(models.Model):
+    """One direction of an accepted grouping, kept in sync with UserGroup."""
+
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name="connections")
+    friend = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name="+")
+    objects = ShopConnectionManager()
+
+    class Meta:
+        unique_together = ("shop", "friend")
+
+    def __str__(self):
+        return f"{self.shop_id} -> {self.friend_id}"
+
+
+@receiver(post_save, sender=UserGroup)
+@receiver(post_delete, sender=UserGroup)
+def sync_shop_connection(sender, instance, **kwargs):
+    ShopConnection.objects.sync_pair(instance.sender_id, instance.receiver_id)
+
+
+class ProductQuerySet(models.QuerySet):
+    """Queryset for products whose bulk updates count as modifications."""
+
+    def update(self, **kwargs):
+        # Cached representations and ETags are versioned by updated_at, which
+        # auto_now only sets on save().
+        kwargs.setdefault("updated_at", Now())
+        return super().update(**kwargs)
+
+
 class Product(BaseModelWithUID):
     """Create a new Product"""
 
     title = models.CharField(max_length=255)
-    slug = AutoSlugField(populate_from="title")
+    slug = models.SlugField(unique=True, editable=False)
     shop = models.ForeignKey(Shop, on_delete=models.CASCADE)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     quantity = models.IntegerField()
     image = VersatileImageField(upload_to="product_image/", blank=True)
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
+    external_sku = models.CharField(max_length=100, null=True, blank=True)
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["shop", "external_sku"], name="unique_product_sku_per_shop"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["shop", "created_at", "id"], name="product_shop_idx"),
+            models.Index(fields=["shop", "price", "id"], name="product_shop_price_idx"),
+            models.Index(
+                fields=["shop", "created_at", "id"],
+                name="product_in_stock_idx",
+                condition=Q(quantity__gt=0),
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
 
+product_slugs = SlugAllocator(Product)
+
+
+@receiver(pre_save, sender=Product)
+def set_product_slug(sender, instance, raw=False, **kwargs):
+    if not instance.slug and not raw:
+        instance.slug = product_slugs.allocate(instance.title)
+
+
+BLOB_FIELDS = {Product: ("image",), User: ("profile_pic",)}
+
+
+def _blob_names(instance):
+    names = {}
+    for name in BLOB_FIELDS[type(instance)]:
+        if name not in instance.__dict__:
+            continue
+        value = instance.__dict__[name]
+        if not isinstance(value, str):
+            # Not a plain name from the database, let the descriptor wrap it.
+            value = getattr(instance, name).name or ""
+        names[name] = value
+    return names
+
+
+@receiver(post_init, sender=Product)
+@receiver(post_init, sender=User)
+def remember_blob_names(sender, instance, **kwargs):
+    instance._blob_names = _blob_names(instance)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=User)
+def count_blob_references(sender, instance, created, raw=False, **kwargs):
+    """Move the references of replaced files over to the new ones."""
+    if raw:
+        return
+    previous = {} if created else instance._blob_names
+    current = _blob_names(instance)
+    changed = [name for name in current if previous.get(name, "") != current[name]]
+    MediaBlob.objects.release(previous[name] for name in changed if name in previous)
+    MediaBlob.objects.acquire(current[name] for name in changed)
+    instance._blob_names = current
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=User)
+def release_blobs(sender, instance, **kwargs):
+    MediaBlob.objects.release(_blob_names(instance).values())
+
+
+@receiver(post_save, sender=Product)
+def render_product_image(sender, instance, raw=False, **kwargs):
+    """Render the renditions of a new or replaced product image."""
+    if raw or not instance.image:
+        return
+    if instance.image_renditions.get("source") != instance.image.name:
+        images.schedule_renditions(instance)
+
+
+SEARCHED_FIELDS = {
+    Product: ("title", "shop_id"),
+    Shop: ("name", "category_id"),
+    Category: ("title",),
+}
+
+
+def _searched_values(instance):
+    return [instance.__dict__.get(name) for name in SEARCHED_FIELDS[type(instance)]]
+
+
+@receiver(post_init, sender=Shop)
+@receiver(post_init, sender=Category)
+def remember_searched_values(sender, instance, **kwargs):
+    instance._searched_values = _searched_values(instance)
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {"title", "shop"} & set(update_fields):
+        search.index_products([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    search.remove_products([instance.pk])
+
+
+@receiver(post_save, sender=Shop)
+@receiver(post_save, sender=Category)
+def reindex_products(sender, instance, created, **kwargs):
+    """Reindex the products showing a renamed shop or category."""
+    values = _searched_values(instance)
+    if not created and values != instance._searched_values:
+        if sender is Shop:
+            search.index_shop(instance.pk)
+        else:
+            search.index_category(instance.pk)
+    instance._searched_values = values
+
+
 class OrderItems(BaseModelWithUID):
     """When user add product to cart all products will here in this model.."""
 
@@ -128,6 +510,13 @@ class OrderItems(BaseModelWithUID):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.IntegerField(default=1)
+    stock_reserved = models.BooleanField(default=False)
+    reserved_until = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["shop", "created_at", "id"], name="orderitems_shop_idx"),
+        ]
 
     def get_total(self):
         total = self.product.price * self.quantity
@@ -137,24 +526,81 @@ class OrderItems(BaseModelWithUID):
         return f"{self.quantity} X {self.product}"
 
 
+def line_total(prefix=""):
+    """Return the SQL expression for price x quantity of an order item."""
+    return ExpressionWrapper(
+        F(f"{prefix}product__price") * F(f"{prefix}quantity"),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def zero_or(aggregate, output_field):
+    return Coalesce(aggregate, Value(0), output_field=output_field)
+
+
+class OrderQuerySet(models.QuerySet):
+    """Queryset for orders with totals computed by the database."""
+
+    def with_totals(self):
+        """Annotate each order with total_amount and total_items."""
+        return self.annotate(
+            total_amount=zero_or(
+                Sum(line_total("orderitem__")),
+                models.DecimalField(max_digits=12, decimal_places=2),
+            ),
+            total_items=zero_or(Sum("orderitem__quantity"), models.IntegerField()),
+        )
+
+    def revenue_by_shop(self):
+        """Return the revenue of every shop selling products in these orders."""
+        return (
+            self.values(seller=F("orderitem__product__shop"))
+            .annotate(
+                revenue=Sum(line_total("orderitem__")),
+                items_sold=Sum("orderitem__quantity"),
+            )
+            .order_by("seller")
+        )
+
+
 class Order(BaseModelWithUID):
     orderitem = models.ManyToManyField(OrderItems)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     shop = models.ForeignKey(Shop, on_delete=models.CASCADE)
     order_id = models.PositiveIntegerField(unique=True)
+    objects = OrderQuerySet.as_manager()
 
     def get_totals(self):
-        total = 0
-        for order_item in self.orderitems.all():
-            total += float(order_item.get_total())
-        return total
+        """Return the order total as a Decimal."""
+        if not hasattr(self, "total_amount"):
+            self._aggregate_totals()
+        return self.total_amount
+
+    def get_item_count(self):
+        """Return the number of units in the order."""
+        if not hasattr(self, "total_items"):
+            self._aggregate_totals()
+        return self.total_items
+
+    def _aggregate_totals(self):
+        totals = self.orderitem.aggregate(
+            total_amount=zero_or(
+                Sum(line_total()),
+                models.DecimalField(max_digits=12, decimal_places=2),
+            ),
+            total_items=zero_or(Sum("quantity"), models.IntegerField()),
+        )
+        self.total_amount = totals["total_amount"]
+        self.total_items = totals["total_items"]
+
+
+order_id_sequence = SequenceAllocator(
+    "order_id", seed=max_value_seed(Order, "order_id")
+)
 
 
 def generate_order_id():
-    last_order = Order.objects.all().order_by("order_id").last()
-    if not last_order:
-        return 1
-    return last_order.order_id + 1
+    return order_id_sequence.next_value()
 
 
 @receiver(pre_save, sender=Order)
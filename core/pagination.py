@@ -0,0 +1,287 @@
+"""
+Keyset (cursor) pagination for the list endpoints.
+"""
+import base64
+import binascii
+import json
+from functools import partial, reduce
+from operator import and_, attrgetter, or_
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from core import fanout
+from core.serializers import eager_load
+
+
+def get_page_size(request, query_param):
+    """Return the page size asked for in `query_param`, within the limits."""
+    try:
+        page_size = int(request.query_params[query_param])
+    except (KeyError, ValueError):
+        return api_settings.PAGE_SIZE
+    if page_size <= 0:
+        return api_settings.PAGE_SIZE
+    return min(page_size, getattr(settings, "PAGINATION_MAX_PAGE_SIZE", 500))
+
+
+class KeysetPagination(BasePagination):
+    """Paginate on a unique ordering, e.g. (created_at, id), with opaque cursors.
+
+    Every page is fetched with a `WHERE (created_at, id) < (...) LIMIT n`
+    style filter, so the cost of a page does not depend on how deep it is.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering = ("-created_at", "-id")
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        return self.build_page(list(queryset))
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """Return the queryset for one page, with one extra row to detect more."""
+        self.request = request
+        self.ordering = tuple(getattr(view, "ordering", None) or self.ordering)
+        self.fields = [
+            queryset.model._meta.get_field(name.lstrip("-")) for name in self.ordering
+        ]
+        self.limit = self.get_page_size(request)
+        self.position, self.reverse = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(self._flip(name) for name in ordering)
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self._after(ordering, self.position))
+        return queryset[: self.limit + 1]
+
+    def build_page(self, rows):
+        """Trim the extra row and work out the neighbouring cursors."""
+        has_more = len(rows) > self.limit
+        rows = rows[: self.limit]
+        if self.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def merge_pages(self, pages):
+        """Merge pages of get_page_queryset() rows into one page's rows.
+
+        The ordering must run in one direction, as all product sorts do.
+        """
+        descending = {name.startswith("-") for name in self.ordering}
+        if len(descending) != 1:
+            raise ValueError("Only orderings in one direction can be merged.")
+        key = attrgetter(*(field.attname for field in self.fields))
+        return fanout.merge(
+            pages,
+            key=key,
+            reverse=descending.pop() != self.reverse,
+            limit=self.limit + 1,
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        return get_page_size(request, self.page_size_query_param)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, row, reverse):
+        position = [field.value_to_string(row) for field in self.fields]
+        payload = json.dumps({"p": position, "r": reverse}, separators=(",", ":"))
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, cursor
+        )
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            position = [
+                field.to_python(value)
+                for field, value in zip(self.fields, payload["p"], strict=True)
+            ]
+            return position, bool(payload["r"])
+        except (binascii.Error, TypeError, KeyError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _after(self, ordering, position):
+        """Return a Q matching the rows that sort after `position` in `ordering`."""
+        clauses = []
+        for index, name in enumerate(ordering):
+            lookup = "lt" if name.startswith("-") else "gt"
+            equal = [
+                Q(**{ordering[prior].lstrip("-"): position[prior]})
+                for prior in range(index)
+            ]
+            compare = Q(**{f"{name.lstrip('-')}__{lookup}": position[index]})
+            clauses.append(reduce(and_, equal + [compare]))
+        return reduce(or_, clauses)
+
+    @staticmethod
+    def _flip(name):
+        return name[1:] if name.startswith("-") else f"-{name}"
+
+
+class RankedPagination(BasePagination):
+    """Paginate ranked results, such as search hits, by offset.
+
+    Ranked results have no unique ordering to continue from, so pages are
+    addressed by ?offset=. One extra row is fetched to find out whether
+    there is a next page, rather than counting every match.
+    """
+
+    limit_query_param = "limit"
+    offset_query_param = "offset"
+
+    def paginate_ranked(self, fetch, request):
+        """Return one page of the rows `fetch(limit, offset)` returns."""
+        self.request = request
+        self.limit = get_page_size(request, self.limit_query_param)
+        try:
+            self.offset = max(int(request.query_params[self.offset_query_param]), 0)
+        except (KeyError, ValueError):
+            self.offset = 0
+        rows = fetch(self.limit + 1, self.offset)
+        self.has_next = len(rows) > self.limit
+        return rows[: self.limit]
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self._link(self.offset + self.limit)
+
+    def get_previous_link(self):
+        if self.offset <= 0:
+            return None
+        return self._link(max(self.offset - self.limit, 0))
+
+    def _link(self, offset):
+        url = replace_query_param(
+            self.request.build_absolute_uri(), self.limit_query_param, self.limit
+        )
+        return replace_query_param(url, self.offset_query_param, offset)
+
+
+def paginate(request, queryset, serializer_class, view=None):
+    """Serialize one page of `queryset` and return the paginated response."""
+    paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+    queryset = eager_load(queryset, serializer_class)
+    page = paginator.paginate_queryset(queryset, request, view=view)
+    serializer = serializer_class(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
+
+
+def _serialize(serializer_class, page):
+    return serializer_class(page, many=True).data
+
+
+_aserialize = sync_to_async(_serialize, thread_sensitive=False)
+
+
+async def apaginate(request, queryset, serializer_class, view=None):
+    """paginate() for async views, fetching the page with the async ORM."""
+    paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+    queryset = eager_load(queryset, serializer_class)
+    page_queryset = paginator.get_page_queryset(queryset, request, view=view)
+    page = paginator.build_page([row async for row in page_queryset])
+    # Serializers read and fill the representation cache, off the event loop.
+    data = await _aserialize(serializer_class, page)
+    return paginator.get_paginated_response(data)
+
+
+
+def _shard_pages(paginator, request, shards, serializer_class, view):
+    return {
+        shard: partial(
+            list,
+            paginator.get_page_queryset(
+                eager_load(queryset, serializer_class), request, view=view
+            ),
+        )
+        for shard, queryset in shards.items()
+    }
+
+
+def _merged_response(paginator, data, timed_out):
+    response = paginator.get_paginated_response(data)
+    if timed_out:
+        response.data["partial"] = True
+    return response
+
+
+def paginate_shards(request, shards, serializer_class, view=None):
+    """paginate() over the union of `shards`, a {shard: queryset}.
+
+    Every shard fetches its own page concurrently, and the pages are merged
+    in order, so the page matches paginating the union. Shards that time
+    out are left out and the response is marked "partial".
+    """
+    paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+    calls = _shard_pages(paginator, request, shards, serializer_class, view)
+    pages, timed_out = fanout.gather(calls)
+    page = paginator.build_page(paginator.merge_pages(pages.values()))
+    data = _serialize(serializer_class, page)
+    return _merged_response(paginator, data, timed_out)
+
+
+async def apaginate_shards(request, shards, serializer_class, view=None):
+    """paginate_shards() for async views."""
+    paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+    calls = _shard_pages(paginator, request, shards, serializer_class, view)
+    pages, timed_out = await fanout.agather(calls)
+    page = paginator.build_page(paginator.merge_pages(pages.values()))
+    data = await _aserialize(serializer_class, page)
+    return _merged_response(paginator, data, timed_out)
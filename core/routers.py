@@ -0,0 +1,119 @@
+"""
+Route the reads of read-only views to replicas and everything else to the
+primary database.
+
+Views opt in with @read_replica. A user who just wrote is pinned to the
+primary for DATABASE_REPLICA_PIN_SECONDS, so they read their own writes
+while the replicas catch up. Pins live in DATABASE_REPLICA_PIN_CACHE_ALIAS,
+which must be shared by all workers: the read after a write is often served
+by another worker than the write.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+def pin_key(user_id):
+    return f"db-pin:{user_id}"
+
+
+def pin_cache():
+    return caches[settings.DATABASE_REPLICA_PIN_CACHE_ALIAS]
+
+
+def pin_to_primary(user_id):
+    """Send the reads of `user_id` to the primary for a while."""
+    pin_cache().set(pin_key(user_id), True, settings.DATABASE_REPLICA_PIN_SECONDS)
+
+
+def request_user_id(request):
+    return getattr(getattr(request, "user", None), "pk", None)
+
+
+def is_pinned(request):
+    user_id = request_user_id(request)
+    return user_id is not None and pin_cache().get(pin_key(user_id), False)
+
+
+async def ais_pinned(request):
+    """is_pinned() for async views."""
+    user_id = request_user_id(request)
+    return user_id is not None and await pin_cache().aget(pin_key(user_id), False)
+
+
+@contextmanager
+def replica_reads():
+    """Let the reads made inside the block go to a replica."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def read_replica(view):
+    """Serve a view method or function view, sync or async, from a replica.
+
+    Requests of users pinned to the primary are served from the primary.
+    """
+
+    def request_of(args):
+        # Function views get the request first, view methods after self.
+        return args[0] if hasattr(args[0], "method") else args[1]
+
+    def use_replica(args):
+        return settings.DATABASE_REPLICAS and not is_pinned(request_of(args))
+
+    async def ause_replica(args):
+        return settings.DATABASE_REPLICAS and not await ais_pinned(request_of(args))
+
+    if iscoroutinefunction(view):
+
+        @wraps(view)
+        async def async_wrapper(*args, **kwargs):
+            if not await ause_replica(args):
+                return await view(*args, **kwargs)
+            with replica_reads():
+                return await view(*args, **kwargs)
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not use_replica(args):
+            return view(*args, **kwargs)
+        with replica_reads():
+            return view(*args, **kwargs)
+
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    """Database router for DATABASE_REPLICAS, aliases of read-only copies."""
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or not _replica_reads.get():
+            return DEFAULT_DB_ALIAS
+        # Reads inside a transaction must see its writes.
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,212 @@
+"""
+Full-text product search over product titles, shop names and categories.
+
+The index lives in its own table, keyed by product id: an FTS5 virtual
+table on SQLite and a tsvector column with a GIN index on PostgreSQL.
+Model signals keep it up to date, row by row or per shop or category.
+"""
+import re
+
+from django.db import NotSupportedError, connection
+
+TABLE = "core_product_search"
+TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+# Weights of the title, shop name and category title columns.
+WEIGHTS = (10.0, 3.0, 1.0)
+
+# Rows to index, filtered by a WHERE clause appended by the caller.
+SOURCE = """
+    FROM core_product p
+    JOIN core_shop s ON s.id = p.shop_id
+    LEFT JOIN core_category c ON c.id = s.category_id
+"""
+
+
+class SQLiteBackend:
+    """FTS5 table with a prefix index, ranked with bm25()."""
+
+    def create(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE {TABLE} USING fts5("
+            "title, shop, category, shop_id UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+
+    def drop(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+    def index(self, cursor, where, params):
+        self.remove(cursor, where, params)
+        cursor.execute(
+            f"INSERT INTO {TABLE} (rowid, title, shop, category, shop_id) "
+            f"SELECT p.id, p.title, s.name, COALESCE(c.title, ''), p.shop_id "
+            f"{SOURCE} WHERE {where}",
+            params,
+        )
+
+    def remove(self, cursor, where, params):
+        cursor.execute(
+            f"DELETE FROM {TABLE} WHERE rowid IN "
+            f"(SELECT p.id {SOURCE} WHERE {where})",
+            params,
+        )
+
+    def remove_ids(self, cursor, product_ids):
+        placeholders = ", ".join(["%s"] * len(product_ids))
+        cursor.execute(
+            f"DELETE FROM {TABLE} WHERE rowid IN ({placeholders})", product_ids
+        )
+
+    def query(self, terms):
+        # Quoting every term keeps FTS5 syntax in the input from being parsed.
+        return " ".join('"%s"*' % term.replace('"', '""') for term in terms)
+
+    def search(self, cursor, terms, shop_ids_sql, shop_params, limit, offset):
+        scope, params = "", [self.query(terms)]
+        if shop_ids_sql:
+            scope = f"AND shop_id IN ({shop_ids_sql})"
+            params += shop_params
+        cursor.execute(
+            f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s {scope} "
+            f"ORDER BY bm25({TABLE}, %s, %s, %s) LIMIT %s OFFSET %s",
+            params + list(WEIGHTS) + [limit, offset],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+class PostgreSQLBackend:
+    """Weighted tsvector column with a GIN index, ranked with ts_rank_cd()."""
+
+    def create(self, cursor):
+        cursor.execute(
+            f"CREATE TABLE {TABLE} ("
+            "product_id bigint PRIMARY KEY, "
+            "shop_id bigint NOT NULL, "
+            "document tsvector NOT NULL)"
+        )
+        cursor.execute(f"CREATE INDEX {TABLE}_document ON {TABLE} USING gin (document)")
+        cursor.execute(f"CREATE INDEX {TABLE}_shop ON {TABLE} (shop_id)")
+
+    def drop(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+    def index(self, cursor, where, params):
+        cursor.execute(
+            f"INSERT INTO {TABLE} (product_id, shop_id, document) "
+            "SELECT p.id, p.shop_id, "
+            "setweight(to_tsvector('simple', p.title), 'A') || "
+            "setweight(to_tsvector('simple', s.name), 'B') || "
+            "setweight(to_tsvector('simple', COALESCE(c.title, '')), 'C') "
+            f"{SOURCE} WHERE {where} "
+            "ON CONFLICT (product_id) DO UPDATE "
+            "SET shop_id = EXCLUDED.shop_id, document = EXCLUDED.document",
+            params,
+        )
+
+    def remove(self, cursor, where, params):
+        cursor.execute(
+            f"DELETE FROM {TABLE} WHERE product_id IN "
+            f"(SELECT p.id {SOURCE} WHERE {where})",
+            params,
+        )
+
+    def remove_ids(self, cursor, product_ids):
+        cursor.execute(
+            f"DELETE FROM {TABLE} WHERE product_id = ANY(%s)", [list(product_ids)]
+        )
+
+    def query(self, terms):
+        return " & ".join(f"{term}:*" for term in terms)
+
+    def search(self, cursor, terms, shop_ids_sql, shop_params, limit, offset):
+        scope, params = "", [self.query(terms)]
+        if shop_ids_sql:
+            scope = f"AND shop_id IN ({shop_ids_sql})"
+            params += shop_params
+        cursor.execute(
+            f"SELECT product_id FROM {TABLE}, to_tsquery('simple', %s) query "
+            f"WHERE document @@ query {scope} "
+            "ORDER BY ts_rank_cd(ARRAY[0.1, %s, %s, %s]::float4[], document, query) "
+            "DESC, product_id LIMIT %s OFFSET %s",
+            params + [weight / WEIGHTS[0] for weight in reversed(WEIGHTS)]
+            + [limit, offset],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+BACKENDS = {"sqlite": SQLiteBackend, "postgresql": PostgreSQLBackend}
+
+
+def get_backend(vendor=None):
+    backend = BACKENDS.get(vendor or connection.vendor)
+    return backend() if backend else None
+
+
+def _reindex(where, params):
+    backend = get_backend()
+    if backend:
+        with connection.cursor() as cursor:
+            backend.index(cursor, where, params)
+
+
+def index_products(product_ids):
+    """Add or refresh the index rows of the given products."""
+    product_ids = list(product_ids)
+    if product_ids:
+        _reindex(f"p.id IN ({', '.join(['%s'] * len(product_ids))})", product_ids)
+
+
+def index_shop(shop_id):
+    """Refresh the index rows of every product of a shop."""
+    _reindex("p.shop_id = %s", [shop_id])
+
+
+def index_category(category_id):
+    """Refresh the index rows of every product in a category."""
+    _reindex("s.category_id = %s", [category_id])
+
+
+def rebuild():
+    """Index every product again."""
+    backend = get_backend()
+    if backend:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLE}")
+            backend.index(cursor, "1 = 1", [])
+
+
+def remove_products(product_ids):
+    """Drop the index rows of deleted products."""
+    product_ids = list(product_ids)
+    backend = get_backend()
+    if backend and product_ids:
+        with connection.cursor() as cursor:
+            backend.remove_ids(cursor, product_ids)
+
+
+def search_terms(text):
+    return TERM_RE.findall(text or "")
+
+
+def search_product_ids(text, shop_ids=None, limit=50, offset=0):
+    """Return the ids of products matching every term of `text`, best first.
+
+    Every term matches as a prefix. `shop_ids` is an optional queryset
+    of shop ids limiting the search, such as ShopConnection.friend_ids().
+    """
+    backend = get_backend()
+    if backend is None:
+        raise NotSupportedError(
+            f"Product search is not available on {connection.vendor}"
+        )
+    terms = search_terms(text)
+    if not terms:
+        return []
+    shop_ids_sql, shop_params = "", []
+    if shop_ids is not None:
+        shop_ids_sql, shop_params = shop_ids.query.sql_with_params()
+    with connection.cursor() as cursor:
+        return backend.search(
+            cursor, terms, shop_ids_sql, list(shop_params), limit, offset
+        )
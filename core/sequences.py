@@ -0,0 +1,137 @@
+"""
+Block-reserving sequence allocator backed by the Sequence table.
+"""
+import os
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Max
+
+
+def reserve_range(name, count, seed=None, using="default"):
+    """Reserve `count` consecutive values of a sequence and return (first, last).
+
+    The counter row is bumped with a single conditional UPDATE, so concurrent
+    callers always receive disjoint ranges without scanning any table.
+    `seed` is called once, when the sequence row does not exist yet, to
+    find the value the sequence should continue from.
+    """
+    from core.models import Sequence
+
+    with transaction.atomic(using=using):
+        updated = (
+            Sequence.objects.using(using)
+            .filter(name=name)
+            .update(value=F("value") + count)
+        )
+        if not updated:
+            start = seed() if seed else 0
+            sequence, created = Sequence.objects.using(using).get_or_create(
+                name=name, defaults={"value": start + count}
+            )
+            if not created:
+                Sequence.objects.using(using).filter(name=name).update(
+                    value=F("value") + count
+                )
+        value = Sequence.objects.using(using).values_list("value", flat=True).get(
+            name=name
+        )
+    return value - count + 1, value
+
+
+def reserve_ranges(counts, seed=None, using="default"):
+    """Reserve values of many sequences at once; return {name: (first, last)}.
+
+    `counts` maps sequence names to the number of values wanted. Missing
+    sequence rows are created together, starting from `seed(names)`, a
+    mapping of name to start value, and the counters are bumped with one
+    UPDATE per distinct count.
+    """
+    from core.models import Sequence
+
+    sequences = Sequence.objects.using(using)
+    with transaction.atomic(using=using):
+        missing = set(counts) - set(
+            sequences.filter(name__in=list(counts)).values_list("name", flat=True)
+        )
+        if missing:
+            starts = seed(missing) if seed else {}
+            sequences.bulk_create(
+                [Sequence(name=name, value=starts.get(name, 0)) for name in missing],
+                ignore_conflicts=True,
+            )
+        by_count = {}
+        for name, count in counts.items():
+            by_count.setdefault(count, []).append(name)
+        for count, names in by_count.items():
+            sequences.filter(name__in=names).update(value=F("value") + count)
+        values = dict(
+            sequences.filter(name__in=list(counts)).values_list("name", "value")
+        )
+    return {
+        name: (values[name] - count + 1, values[name])
+        for name, count in counts.items()
+    }
+
+
+class SequenceAllocator:
+    """Hand out sequence values from a block reserved once per worker process.
+
+    Blocks are reserved on the SEQUENCE_DATABASE connection. When that is a
+    connection of its own, each block commits at once, in a transaction of
+    its own, and the caller's transaction never locks the counter. On the
+    caller's connection a block cannot outlive a transaction that may roll
+    back, so inside a transaction only the value asked for is reserved.
+    """
+
+    def __init__(self, name, block_size=None, seed=None, using=None):
+        self.name = name
+        self._block_size = block_size
+        self.seed = seed
+        self._using = using
+        self._lock = threading.Lock()
+        self._pid = None
+        self._next = 0
+        self._last = -1
+
+    @property
+    def block_size(self):
+        if self._block_size is not None:
+            return self._block_size
+        return getattr(settings, "SEQUENCE_BLOCK_SIZE", 50)
+
+    @property
+    def using(self):
+        return self._using or getattr(settings, "SEQUENCE_DATABASE", "default")
+
+    def next_value(self):
+        """Return the next value, reserving a new block when the current one runs out."""
+        with self._lock:
+            # A forked worker must not keep drawing from its parent's block.
+            if self._pid != os.getpid() or self._next > self._last:
+                if connections[self.using].in_atomic_block:
+                    return self._reserve(1)[0]
+                self._next, self._last = self._reserve(self.block_size)
+                self._pid = os.getpid()
+            value = self._next
+            self._next += 1
+            return value
+
+    def reset(self):
+        """Drop the cached block so the next call reserves a fresh one."""
+        with self._lock:
+            self._pid = None
+            self._next, self._last = 0, -1
+
+    def _reserve(self, count):
+        return reserve_range(self.name, count, seed=self.seed, using=self.using)
+
+
+def max_value_seed(model, field):
+    """Return a seed callable continuing from the highest value of `field`."""
+
+    def seed():
+        return model.objects.aggregate(value=Max(field))["value"] or 0
+
+    return seed
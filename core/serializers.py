@@ -0,0 +1,28 @@
+"""
+Shared serializer helpers.
+"""
+
+
+class EagerLoadingMixin:
+    """Let a serializer declare the relations its fields read.
+
+    Views pass their querysets through `eager_load()`, so the relations are
+    joined or prefetched up front instead of being fetched once per row.
+    """
+
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        if cls.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*cls.prefetch_related_fields)
+        return queryset
+
+
+def eager_load(queryset, serializer_class):
+    """Apply the relations declared by `serializer_class` to `queryset`."""
+    setup = getattr(serializer_class, "setup_eager_loading", None)
+    return setup(queryset) if setup else queryset
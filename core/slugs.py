@@ -0,0 +1,136 @@
+"""
+Unique slugs numbered from a per-base counter in the Sequence table.
+
+The first product titled "Dell Inspiron" gets "dell-inspiron", the next
+ones "dell-inspiron-2", "dell-inspiron-3" and so on. The suffixes come
+from a counter per base slug, so allocating never probes for free slugs.
+"""
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from django.utils.text import slugify
+
+from core.sequences import reserve_ranges
+
+# Room kept at the end of a base slug for its numeric suffix.
+SUFFIX_LENGTH = 8
+
+# Bases seeded per query; SQLite limits the depth of a chain of ORs.
+SEED_BATCH_SIZE = 200
+
+
+def slug_base(text, max_length, default):
+    """Return the slug of `text`, short enough to take a suffix."""
+    base = slugify(text)[: max_length - SUFFIX_LENGTH].strip("-")
+    return base or default
+
+
+def numbered_slug(base, number):
+    return base if number == 1 else f"{base}-{number}"
+
+
+class SlugAllocator:
+    """Hand out unique values for a slug field of `model`."""
+
+    def __init__(self, model, field="slug"):
+        self.model = model
+        self.field = field
+
+    @property
+    def max_length(self):
+        return self.model._meta.get_field(self.field).max_length
+
+    @property
+    def prefix(self):
+        return f"{self.model._meta.label_lower}.{self.field}:"
+
+    def base(self, text):
+        return slug_base(text, self.max_length, self.model._meta.model_name)
+
+    def highest_suffixes(self, bases):
+        """Return the highest suffix each of `bases` already uses.
+
+        Only bases taken as a slug themselves can have numbered ones in
+        use. Slugs starting with "<base>-" sort between "<base>-" and
+        "<base>.", so those are range scans over the unique slug index,
+        OR-ed together SEED_BATCH_SIZE bases at a time. Numbered slugs left
+        without their base are caught by the check in allocate_many().
+        """
+        field, manager = self.field, self.model._default_manager
+        highest = dict.fromkeys(bases, 0)
+        lookup = {f"{field}__in": list(highest)}
+        taken = list(manager.filter(**lookup).values_list(field, flat=True))
+        for start in range(0, len(taken), SEED_BATCH_SIZE):
+            batch = taken[start : start + SEED_BATCH_SIZE]
+            ranges = reduce(
+                or_,
+                (
+                    Q(**{f"{field}__gte": f"{base}-", f"{field}__lt": f"{base}."})
+                    for base in batch
+                ),
+            )
+            highest.update(dict.fromkeys(batch, 1))
+            for slug in manager.filter(ranges).values_list(field, flat=True):
+                base, _, suffix = slug.rpartition("-")
+                if base in highest and suffix.isdigit():
+                    highest[base] = max(highest[base], int(suffix))
+        return highest
+
+    def seed(self, names):
+        bases = [name[len(self.prefix) :] for name in names]
+        return {
+            self.prefix + base: value
+            for base, value in self.highest_suffixes(bases).items()
+        }
+
+    def reserve(self, counts):
+        """Reserve `count` numbered slugs of each base in `counts`."""
+        ranges = reserve_ranges(
+            {self.prefix + base: count for base, count in counts.items()},
+            seed=self.seed,
+        )
+        reserved = {}
+        for base in counts:
+            first, last = ranges[self.prefix + base]
+            reserved[base] = [
+                numbered_slug(base, number) for number in range(first, last + 1)
+            ]
+        return reserved
+
+    def allocate(self, text):
+        """Return a free slug for `text`."""
+        return self.allocate_many([text])[0]
+
+    def allocate_many(self, texts):
+        """Return a free slug for each of `texts`, in order.
+
+        All the counters are bumped together. Titles ending in a number can
+        still produce a slug that another base got first ("item 2" and the
+        second "item"), so the candidates are checked in one query and
+        taken ones are replaced.
+        """
+        bases = [self.base(text) for text in texts]
+        wanted = Counter(bases)
+        free = {base: [] for base in wanted}
+        while wanted:
+            candidates = self.reserve(wanted)
+            taken = set(
+                self.model._default_manager.filter(
+                    **{
+                        f"{self.field}__in": [
+                            slug for slugs in candidates.values() for slug in slugs
+                        ]
+                    }
+                ).values_list(self.field, flat=True)
+            )
+            wanted = Counter()
+            for base, slugs in candidates.items():
+                for slug in slugs:
+                    if slug in taken:
+                        wanted[base] += 1
+                    else:
+                        free[base].append(slug)
+        free = {base: iter(slugs) for base, slugs in free.items()}
+        return [next(free[base]) for base in bases]
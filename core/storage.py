@@ -0,0 +1,78 @@
+"""
+Content-addressed file storage for uploads.
+"""
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+BLOB_DIR = "blobs"
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Store every upload once, under the SHA-256 of its content.
+
+    Saving content that is already stored returns the existing name, so
+    any number of rows can point at one file, and a name never changes its
+    content, so its URL can be cached forever. core.MediaBlob counts the
+    references and collect_media_blobs removes files nobody points at.
+    store_legacy_uploads moves files uploaded under their own names here.
+    """
+
+    def _save(self, name, content):
+        name = self.blob_name(name, content)
+        if self.claim(name):
+            return name
+        path = self.path(name)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        if self.directory_permissions_mode is not None:
+            os.chmod(directory, self.directory_permissions_mode)
+        # Write to a temporary file and move it into place, so concurrent
+        # uploads of the same content never see a partial file.
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                for chunk in content.chunks():
+                    tmp_file.write(chunk)
+            os.chmod(tmp_path, self.file_permissions_mode or 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return name
+
+    def claim(self, name):
+        """Keep the stored file `name` from collection, if it exists.
+
+        Touching its MediaBlob row waits for a collect_media_blobs run
+        that is deleting the file, and restarts the grace period of an
+        unreferenced one, so the file is either gone or kept.
+        """
+        MediaBlob = apps.get_model("core", "MediaBlob")
+        MediaBlob.objects.filter(name=name).update(updated_at=timezone.now())
+        if not self.exists(name):
+            return False
+        # Files without a row are collected by their modification time.
+        os.utime(self.path(name))
+        return True
+
+    @staticmethod
+    def blob_name(name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        extension = posixpath.splitext(name)[1].lower()
+        return posixpath.join(BLOB_DIR, digest[:2], digest[2:4], digest + extension)
+
+    @staticmethod
+    def is_blob(name):
+        return bool(name) and name.startswith(BLOB_DIR + "/")
@@ -0,0 +1,55 @@
+"""
+Streaming exports of whole querysets.
+"""
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.serializers import eager_load
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+
+def export_format(request):
+    """Return the requested ?export= format, or None for a normal response."""
+    fmt = request.query_params.get("export")
+    if fmt is not None and fmt not in EXPORT_FORMATS:
+        raise ValidationError({"export": f"Choose one of {', '.join(EXPORT_FORMATS)}."})
+    return fmt
+
+
+def stream_queryset(queryset, serializer_class, fmt, chunk_size=None):
+    """Stream `queryset` as NDJSON or a JSON array, one row at a time.
+
+    Rows are read with a server-side iterator and serialized one by one, so
+    memory stays flat and the first row is sent before the query finishes.
+    Serializers get {"export": True} as context; each row is read once, so
+    they should not go through caches of their representation.
+    """
+    chunk_size = chunk_size or getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+    queryset = eager_load(queryset, serializer_class)
+    rows = encode_rows(queryset.iterator(chunk_size=chunk_size), serializer_class)
+    if fmt == "json":
+        rows = as_json_array(rows)
+    else:
+        rows = (row + "\n" for row in rows)
+    response = StreamingHttpResponse(rows, content_type=EXPORT_FORMATS[fmt])
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+def encode_rows(objects, serializer_class):
+    encoder = JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    for obj in objects:
+        yield encoder.encode(serializer_class(obj, context={"export": True}).data)
+
+
+def as_json_array(rows):
+    yield "["
+    for index, row in enumerate(rows):
+        yield row if index == 0 else "," + row
+    yield "]"
@@ -0,0 +1,61 @@
+"""
+Tests for cache settings built from URLs.
+"""
+from django.test import SimpleTestCase, override_settings
+
+from core.caches import cache_from_url
+from core.checks import check_shared_caches
+
+LOCMEM = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+REDIS = {
+    "BACKEND": "django.core.cache.backends.redis.RedisCache",
+    "LOCATION": "redis://cache.internal:6379/1",
+}
+
+
+class CacheURLTests(SimpleTestCase):
+    """Test building CACHES entries from URLs."""
+
+    def test_shared_backends(self):
+        """Test Redis, Memcached and database caches."""
+        self.assertEqual(cache_from_url("redis://cache.internal:6379/1"), REDIS)
+        self.assertEqual(
+            cache_from_url("memcached://m1:11211,m2:11211", TIMEOUT=60),
+            {
+                "BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache",
+                "LOCATION": ["m1:11211", "m2:11211"],
+                "TIMEOUT": 60,
+            },
+        )
+        self.assertEqual(
+            cache_from_url("db://cache_table?MAX_ENTRIES=1000"),
+            {
+                "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                "LOCATION": "cache_table",
+                "OPTIONS": {"MAX_ENTRIES": "1000"},
+            },
+        )
+
+    def test_local_backends(self):
+        """Test file and per-process caches."""
+        self.assertEqual(cache_from_url("locmem://"), LOCMEM)
+        config = cache_from_url("file:///var/tmp/app-cache")
+        self.assertEqual(config["LOCATION"], "/var/tmp/app-cache")
+
+    def test_unsupported_scheme(self):
+        with self.assertRaises(ValueError):
+            cache_from_url("couchbase://host")
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    """Test the deployment check for per-process caches."""
+
+    @override_settings(CACHES={"default": LOCMEM})
+    def test_warns_about_locmem(self):
+        self.assertEqual(
+            [warning.id for warning in check_shared_caches(None)], ["core.W001"]
+        )
+
+    @override_settings(CACHES={"default": REDIS})
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_shared_caches(None), [])
@@ -0,0 +1,74 @@
+"""
+Tests for scatter-gather over shards.
+"""
+import asyncio
+import threading
+
+from django.test import SimpleTestCase, override_settings
+
+from core import fanout
+from core.routers import _replica_reads, replica_reads
+
+
+@override_settings(FANOUT_MAX_WORKERS=2, FANOUT_TIMEOUT=5)
+class GatherTests(SimpleTestCase):
+    """Test calls run concurrently and slow shards are left out."""
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def slow(self):
+        self.release.wait(5)
+        return "slow"
+
+    def test_results_by_shard(self):
+        """Test every result comes back under its shard."""
+        results, timed_out = fanout.gather({1: lambda: "a", 2: lambda: "b"})
+
+        self.assertEqual(results, {1: "a", 2: "b"})
+        self.assertEqual(timed_out, [])
+
+    def test_slow_shard_times_out(self):
+        """Test a shard missing the deadline is reported, not waited for."""
+        results, timed_out = fanout.gather(
+            {"fast": lambda: "fast", "slow": self.slow}, timeout=0.05
+        )
+
+        self.assertEqual(results, {"fast": "fast"})
+        self.assertEqual(timed_out, ["slow"])
+
+    def test_async_slow_shard_times_out(self):
+        """Test agather() leaves out slow shards like gather()."""
+        results, timed_out = asyncio.run(
+            fanout.agather({"fast": lambda: "fast", "slow": self.slow}, timeout=0.05)
+        )
+
+        self.assertEqual(results, {"fast": "fast"})
+        self.assertEqual(timed_out, ["slow"])
+
+    def test_calls_see_caller_context(self):
+        """Test replica routing carries over to the worker threads."""
+        with replica_reads():
+            results, _ = fanout.gather({1: _replica_reads.get})
+
+        self.assertEqual(results, {1: True})
+
+    @override_settings(FANOUT_MAX_WORKERS=0)
+    def test_inline(self):
+        """Test no workers runs the calls in the calling thread."""
+        results, timed_out = fanout.gather({1: threading.get_ident})
+
+        self.assertEqual(results, {1: threading.get_ident()})
+        self.assertEqual(timed_out, [])
+
+
+class MergeTests(SimpleTestCase):
+    """Test the k-way merge of sorted shard results."""
+
+    def test_merge_in_order_up_to_limit(self):
+        merged = fanout.merge(
+            [[9, 4, 1], [8, 7], [], [6, 5, 3]], key=None, reverse=True, limit=5
+        )
+
+        self.assertEqual(merged, [9, 8, 7, 6, 5])
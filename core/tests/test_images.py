@@ -0,0 +1,107 @@
+"""
+Tests for rendering product image renditions.
+"""
+import os
+import shutil
+from io import StringIO
+import tempfile
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core import images, models
+
+RENDITIONS = {
+    "thumbnail": {"size": (150, 150), "format": "JPEG"},
+    "webp": {"size": (400, 400), "format": "WEBP"},
+}
+
+
+def jpeg_upload(size=(800, 600)):
+    with tempfile.TemporaryFile() as image_file:
+        Image.new("RGB", size, "red").save(image_file, format="JPEG")
+        image_file.seek(0)
+        return SimpleUploadedFile("photo.jpg", image_file.read(), "image/jpeg")
+
+
+@override_settings(IMAGE_WORKERS=0, IMAGE_RENDITIONS=RENDITIONS)
+class ImageRenditionTest(TestCase):
+    """Test renditions are rendered after an image is saved."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        user = get_user_model().objects.create_user(
+            email="test@example.com", password="test1234"
+        )
+        cat = models.Category.objects.create(title="clothes")
+        self.shop = models.Shop.objects.create(
+            name="Khan Store", user=user, category=cat
+        )
+
+    def create_product(self, **fields):
+        return models.Product.objects.create(
+            title="shirt", shop=self.shop, price=Decimal("50.5"), quantity=1, **fields
+        )
+
+    def test_render_derivatives(self):
+        """Test every rendition fits its box and keeps the aspect ratio."""
+        with tempfile.TemporaryDirectory() as root:
+            Image.new("RGB", (800, 600)).save(os.path.join(root, "a.jpg"))
+            sizes = images.render_derivatives(root, "a.jpg", RENDITIONS)
+
+            self.assertEqual(
+                sizes["thumbnail"],
+                {"name": "__renditions__/a.thumbnail.jpg", "width": 150, "height": 113},
+            )
+            with Image.open(os.path.join(root, sizes["webp"]["name"])) as webp:
+                self.assertEqual(webp.format, "WEBP")
+                self.assertEqual(webp.size, (400, 300))
+            self.assertEqual(
+                sorted(os.listdir(os.path.join(root, "__renditions__"))),
+                ["a.thumbnail.jpg", "a.webp.webp"],
+            )
+
+    def test_renditions_rendered_on_commit(self):
+        """Test saving an image renders its renditions after commit."""
+        with self.captureOnCommitCallbacks(execute=True):
+            product = self.create_product(image=jpeg_upload())
+        product.refresh_from_db()
+
+        self.assertEqual(product.image_renditions["source"], product.image.name)
+        self.assertEqual(
+            images.current_renditions(product)["thumbnail"]["width"], 150
+        )
+
+    def test_replaced_image_is_rendered_again(self):
+        """Test stale renditions are not served for a new image."""
+        with self.captureOnCommitCallbacks(execute=True):
+            product = self.create_product(image=jpeg_upload())
+        product.refresh_from_db()
+        product.image = jpeg_upload((300, 300))
+
+        self.assertEqual(images.current_renditions(product), {})
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        product.refresh_from_db()
+        self.assertEqual(
+            images.current_renditions(product)["thumbnail"]["height"], 150
+        )
+
+    def test_render_image_renditions_command(self):
+        """Test the command renders products that have no renditions."""
+        with self.captureOnCommitCallbacks(execute=False):
+            product = self.create_product(image=jpeg_upload())
+
+        call_command("render_image_renditions", stdout=StringIO())
+
+        product.refresh_from_db()
+        self.assertIn("webp", images.current_renditions(product))
@@ -0,0 +1,125 @@
+"""
+Tests for stock reservation.
+"""
+import threading
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from core import inventory, models
+
+
+def create_product(quantity):
+    user = get_user_model().objects.create_user("test@example.com", "test123")
+    shop = models.Shop.objects.create(name="Khan Store", user=user, default=True)
+    product = models.Product.objects.create(
+        title="shirt", shop=shop, price=Decimal("50.5"), quantity=quantity
+    )
+    return user, shop, product
+
+
+class InventoryTests(TestCase):
+    """Test taking and returning stock."""
+
+    def setUp(self):
+        self.user, self.shop, self.product = create_product(quantity=5)
+        self.other = models.Product.objects.create(
+            title="pant", shop=self.shop, price=Decimal("10"), quantity=1
+        )
+
+    def add_to_cart(self, product, quantity):
+        return models.OrderItems.objects.create(
+            user=self.user, shop=self.shop, product=product, quantity=quantity
+        )
+
+    def test_take_stock_is_all_or_nothing(self):
+        """Test a shortage on one product leaves every product untouched."""
+        with self.assertRaises(inventory.InsufficientStock) as error:
+            inventory.take_stock({self.product.id: 2, self.other.id: 2})
+
+        self.assertEqual(error.exception.product_ids, [self.other.id])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 5)
+
+    def test_reserve_and_commit_items(self):
+        """Test a reservation is taken once and kept when the order is placed."""
+        item = self.add_to_cart(self.product, 3)
+        inventory.reserve_items([item])
+        inventory.commit_items([item.id])
+
+        item.refresh_from_db()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 2)
+        self.assertTrue(item.stock_reserved)
+        self.assertIsNone(item.reserved_until)
+
+    def test_sold_items_cannot_be_committed_again(self):
+        """Test committing a sold item again is refused and takes no stock."""
+        item = self.add_to_cart(self.product, 3)
+        inventory.commit_items([item.id])
+
+        with self.assertRaises(inventory.AlreadyOrdered) as error:
+            # Callers order inside a transaction of their own.
+            with transaction.atomic():
+                inventory.commit_items([item.id])
+
+        self.assertEqual(error.exception.item_ids, [item.id])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 2)
+
+    def test_release_expired_reservations(self):
+        """Test abandoned carts give their stock back and can be reserved again."""
+        item = self.add_to_cart(self.product, 3)
+        inventory.reserve_items([item])
+        sold = self.add_to_cart(self.product, 1)
+        inventory.commit_items([sold.id])
+
+        released = inventory.release_expired(now=timezone.now() + timedelta(days=1))
+
+        self.assertEqual(released, 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 4)
+
+        inventory.commit_items([item.id])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 1)
+
+
+class InventoryContentionTests(TransactionTestCase):
+    """Test stock under concurrent checkouts."""
+
+    def test_no_overselling_under_contention(self):
+        """Test many threads buying the same product never oversell it."""
+        _, _, product = create_product(quantity=20)
+        sold, failed = [], []
+
+        def buy():
+            try:
+                for _ in range(10):
+                    while True:
+                        try:
+                            inventory.take_stock({product.id: 1})
+                            sold.append(1)
+                        except inventory.InsufficientStock:
+                            failed.append(1)
+                        except OperationalError:
+                            # SQLite reports a lock instead of waiting for it.
+                            continue
+                        break
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        product.refresh_from_db()
+        self.assertEqual(len(sold), 20)
+        self.assertEqual(len(failed), 60)
+        self.assertEqual(product.quantity, 0)
@@ -0,0 +1,102 @@
+"""
+Tests for serving media files.
+"""
+import hashlib
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+CONTENT = b"0123456789" * 10
+
+
+class ServeMediaTest(TestCase):
+    """Test media files are served with validators, ranges and offload."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.name = default_storage.save("photo.jpg", ContentFile(CONTENT))
+        self.url = f"/media/{self.name}"
+        self.digest = hashlib.sha256(CONTENT).hexdigest()
+
+    def test_hashed_file_is_immutable(self):
+        """Test a blob gets its hash as ETag and a long-lived cache header."""
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b"".join(res.streaming_content), CONTENT)
+        self.assertEqual(res["ETag"], f'"{self.digest}"')
+        self.assertEqual(res["Content-Type"], "image/jpeg")
+        self.assertIn("immutable", res["Cache-Control"])
+        self.assertEqual(res["Accept-Ranges"], "bytes")
+
+    def test_unhashed_file_etag_is_content_hash(self):
+        """Test files outside the blob store still get a strong ETag."""
+        with open(f"{self.media_root}/legacy.jpg", "wb") as legacy:
+            legacy.write(CONTENT)
+
+        res = self.client.get("/media/legacy.jpg")
+
+        self.assertEqual(res["ETag"], f'"{self.digest}"')
+        self.assertNotIn("immutable", res["Cache-Control"])
+
+    def test_if_none_match(self):
+        """Test a matching If-None-Match gets 304 without a body."""
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'W/"x", "{self.digest}"')
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res["ETag"], f'"{self.digest}"')
+        self.assertEqual(res.content, b"")
+
+    def test_byte_ranges(self):
+        """Test single byte ranges get a 206 with the requested bytes."""
+        cases = {
+            "bytes=0-9": (b"0123456789", "bytes 0-9/100"),
+            "bytes=95-": (b"56789", "bytes 95-99/100"),
+            "bytes=-3": (b"789", "bytes 97-99/100"),
+            "bytes=98-500": (b"89", "bytes 98-99/100"),
+        }
+        for header, (body, content_range) in cases.items():
+            with self.subTest(header):
+                res = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(res.status_code, 206)
+                self.assertEqual(b"".join(res.streaming_content), body)
+                self.assertEqual(res["Content-Range"], content_range)
+                self.assertEqual(res["Content-Length"], str(len(body)))
+
+    def test_unsatisfiable_range(self):
+        """Test a range past the end of the file gets a 416."""
+        res = self.client.get(self.url, HTTP_RANGE="bytes=100-")
+
+        self.assertEqual(res.status_code, 416)
+        self.assertEqual(res["Content-Range"], "bytes */100")
+
+    def test_stale_if_range_ignores_range(self):
+        """Test a range for another version of the file returns all of it."""
+        res = self.client.get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"old"')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b"".join(res.streaming_content), CONTENT)
+
+    def test_sendfile_offload(self):
+        """Test the body is left to the web server when offloading."""
+        with self.settings(MEDIA_SENDFILE="x-accel-redirect"):
+            res = self.client.get(self.url)
+        self.assertEqual(res["X-Accel-Redirect"], f"/protected-media/{self.name}")
+        self.assertEqual(res.content, b"")
+
+        with self.settings(MEDIA_SENDFILE="x-sendfile"):
+            res = self.client.get(self.url)
+        self.assertEqual(res["X-Sendfile"], default_storage.path(self.name))
+
+    def test_missing_and_outside_files(self):
+        """Test missing files and paths outside MEDIA_ROOT are not found."""
+        self.assertEqual(self.client.get("/media/missing.jpg").status_code, 404)
+        self.assertEqual(self.client.get("/media/../app/settings.py").status_code, 404)
+        self.assertEqual(self.client.post(self.url).status_code, 405)
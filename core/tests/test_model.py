@@ -1,6 +1,7 @@
 """
 Tests for model
 """
+from django.db import IntegrityError
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -58,3 +59,12 @@ class ModelTests(TestCase):
         category = models.Category.objects.create(title="electronic")
         self.assertEqual(str(category), category.title)
 
+
+    def test_one_default_shop_per_user(self):
+        """Test a user cannot be logged in to two shops at once."""
+        user = create_user()
+        models.Shop.objects.create(name="shop1", user=user, default=True)
+        models.Shop.objects.create(name="shop2", user=user)
+
+        with self.assertRaises(IntegrityError):
+            models.Shop.objects.create(name="shop3", user=user, default=True)
@@ -0,0 +1,65 @@
+"""
+Tests for keyset pagination.
+"""
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core import models
+from core.pagination import KeysetPagination
+
+
+def paginate(url, queryset):
+    request = Request(APIRequestFactory().get(url))
+    paginator = KeysetPagination()
+    page = paginator.paginate_queryset(queryset, request)
+    return [category.title for category in page], paginator
+
+
+class KeysetPaginationTests(TestCase):
+    """Test walking through pages with cursors."""
+
+    def setUp(self):
+        for index in range(5):
+            models.Category.objects.create(title=f"cat{index}")
+        # Equal timestamps make the id the only tie breaker.
+        models.Category.objects.update(created_at=timezone.now())
+        self.queryset = models.Category.objects.all()
+
+    def test_walk_forward_and_back(self):
+        """Test next and previous cursors return stable, disjoint pages."""
+        titles, paginator = paginate("/?page_size=2", self.queryset)
+        self.assertEqual(titles, ["cat4", "cat3"])
+        self.assertIsNone(paginator.get_previous_link())
+
+        titles, paginator = paginate(paginator.get_next_link(), self.queryset)
+        self.assertEqual(titles, ["cat2", "cat1"])
+
+        last_titles, last = paginate(paginator.get_next_link(), self.queryset)
+        self.assertEqual(last_titles, ["cat0"])
+        self.assertIsNone(last.get_next_link())
+
+        titles, paginator = paginate(last.get_previous_link(), self.queryset)
+        self.assertEqual(titles, ["cat2", "cat1"])
+        titles, paginator = paginate(paginator.get_previous_link(), self.queryset)
+        self.assertEqual(titles, ["cat4", "cat3"])
+        self.assertIsNone(paginator.get_previous_link())
+
+    @override_settings(PAGINATION_MAX_PAGE_SIZE=3)
+    def test_page_size_is_capped(self):
+        """Test clients cannot ask for more rows than the configured cap."""
+        titles, _ = paginate("/?page_size=100", self.queryset)
+        self.assertEqual(len(titles), 3)
+
+    def test_page_query_count_is_constant(self):
+        """Test a page is fetched with one query."""
+        _, paginator = paginate("/?page_size=1", self.queryset)
+        with self.assertNumQueries(1):
+            paginate(paginator.get_next_link(), self.queryset)
+
+    def test_invalid_cursor(self):
+        """Test a tampered cursor is rejected."""
+        with self.assertRaises(NotFound):
+            paginate("/?cursor=not-a-cursor", self.queryset)
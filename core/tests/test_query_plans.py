@@ -0,0 +1,72 @@
+"""
+Query plan regression tests for the hot endpoints.
+"""
+import re
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import models
+
+FULL_SCAN = re.compile(r"\bSCAN (core_\w+)")
+
+
+class QueryPlanTests(TestCase):
+    """Test the hot endpoints only read the core tables through indexes."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("test@example.com", "test123")
+        category = models.Category.objects.create(title="clothes")
+        self.shop = models.Shop.objects.create(
+            name="Khan Store", user=self.user, category=category, default=True
+        )
+        friend = models.Shop.objects.create(
+            name="Goni Store", user=self.user, category=category
+        )
+        models.UserGroup.objects.create(
+            sender=friend, receiver=self.shop, status="accepted"
+        )
+        self.product = models.Product.objects.create(
+            title="shirt", shop=friend, price=Decimal("50.5"), quantity=100
+        )
+        models.OrderItems.objects.create(
+            user=self.user, shop=self.shop, product=self.product
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def assertUsesIndexes(self, url):
+        with CaptureQueriesContext(connection) as captured:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        with connection.cursor() as cursor:
+            for query in captured:
+                if not query["sql"].startswith("SELECT"):
+                    continue
+                cursor.execute("EXPLAIN QUERY PLAN " + query["sql"])
+                plan = "\n".join(row[-1] for row in cursor.fetchall())
+                self.assertIsNone(
+                    FULL_SCAN.search(plan), f"{url}\n{query['sql']}\n{plan}"
+                )
+
+    def test_hot_endpoints_use_indexes(self):
+        """Test listing and detail endpoints avoid sequential scans."""
+        urls = [
+            reverse("store:product_list"),
+            reverse("store:product_list") + "?sort=price&in_stock=true",
+            reverse("store:find_product"),
+            reverse("store:find_shop"),
+            reverse("store:my_friends"),
+            reverse("store:my_requests"),
+            reverse("store:request_list"),
+            reverse("store:product_detail", args=[self.product.slug]),
+            reverse("order:orderItem_list"),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertUsesIndexes(url)
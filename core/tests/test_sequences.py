@@ -0,0 +1,110 @@
+"""
+Tests for the sequence allocator.
+"""
+from unittest import skipUnless
+
+from django.conf import settings
+from django.test import TestCase, TransactionTestCase
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from core import models
+from core.sequences import SequenceAllocator, reserve_range, reserve_ranges
+
+
+class SequenceTests(TestCase):
+    """Test reserving sequence values."""
+
+    def test_reserve_range_returns_disjoint_ranges(self):
+        """Test consecutive reservations never overlap."""
+        first = reserve_range("test", 10)
+        second = reserve_range("test", 5)
+
+        self.assertEqual(first, (1, 10))
+        self.assertEqual(second, (11, 15))
+
+    def test_reserve_range_uses_seed_once(self):
+        """Test a new sequence continues from its seed."""
+        self.assertEqual(reserve_range("seeded", 1, seed=lambda: 41), (42, 42))
+        self.assertEqual(reserve_range("seeded", 1, seed=lambda: 0), (43, 43))
+
+    def test_reserve_ranges(self):
+        """Test many sequences are reserved together, seeding only new ones."""
+        reserve_range("old", 3)
+
+        ranges = reserve_ranges(
+            {"old": 2, "new": 3}, seed=lambda names: dict.fromkeys(names, 10)
+        )
+
+        self.assertEqual(ranges, {"old": (4, 5), "new": (11, 13)})
+
+    def test_order_id_continues_after_existing_orders(self):
+        """Test order ids are unique and follow the existing ones."""
+        user = get_user_model().objects.create_user("test@example.com", "test123")
+        shop = models.Shop.objects.create(name="Khan Store", user=user)
+        models.Order.objects.create(user=user, shop=shop, order_id=100)
+        models.order_id_sequence.reset()
+
+        orders = [models.Order.objects.create(user=user, shop=shop) for _ in range(3)]
+
+        self.assertEqual([order.order_id for order in orders], [101, 102, 103])
+
+
+class SequenceAllocatorTests(TransactionTestCase):
+    """Test handing out values from reserved blocks."""
+
+    def test_allocator_hits_database_once_per_block(self):
+        """Test values inside a reserved block need no queries."""
+        allocator = SequenceAllocator("block", block_size=5)
+        allocator.next_value()
+
+        with self.assertNumQueries(0):
+            values = [allocator.next_value() for _ in range(4)]
+
+        self.assertEqual(values, [2, 3, 4, 5])
+        self.assertEqual(allocator.next_value(), 6)
+
+    def test_rolled_back_transaction_shares_no_values(self):
+        """Test a value reserved in a rolled back transaction is not kept."""
+        allocator = SequenceAllocator("rollback", block_size=5)
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.assertEqual(allocator.next_value(), 1)
+                raise RuntimeError
+
+        other = SequenceAllocator("rollback", block_size=5)
+        taken = [other.next_value() for _ in range(5)]
+        values = [allocator.next_value() for _ in range(5)]
+
+        self.assertEqual(taken, [1, 2, 3, 4, 5])
+        self.assertEqual(values, [6, 7, 8, 9, 10])
+
+    def test_block_outlives_rolled_back_transaction(self):
+        """Test a block reserved beforehand stays reserved after a rollback."""
+        allocator = SequenceAllocator("committed", block_size=5)
+        self.assertEqual(allocator.next_value(), 1)
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.assertEqual(allocator.next_value(), 2)
+                raise RuntimeError
+
+        self.assertEqual(reserve_range("committed", 1), (6, 6))
+        self.assertEqual(allocator.next_value(), 3)
+
+
+@skipUnless("sequences" in settings.DATABASES, "needs a second connection")
+class SequenceConnectionTests(TransactionTestCase):
+    """Test blocks reserved on the connection of their own."""
+
+    databases = "__all__"
+
+    def test_block_commits_on_its_own(self):
+        """Test a block reserved inside a transaction survives its rollback."""
+        allocator = SequenceAllocator("own", block_size=5, using="sequences")
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.assertEqual(allocator.next_value(), 1)
+                raise RuntimeError
+
+        self.assertEqual(reserve_range("own", 1), (6, 6))
+        self.assertEqual(allocator.next_value(), 2)
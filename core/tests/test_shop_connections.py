@@ -0,0 +1,94 @@
+"""
+Tests for the shop connection table.
+"""
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core import models
+
+
+class ShopConnectionTests(TestCase):
+    """Test keeping shop connections in sync with groupings."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user("test@example.com", "test123")
+        self.shop1 = models.Shop.objects.create(name="shop1", user=user)
+        self.shop2 = models.Shop.objects.create(name="shop2", user=user)
+
+    def connections(self):
+        return set(models.ShopConnection.objects.values_list("shop", "friend"))
+
+    def test_accepting_request_connects_both_shops(self):
+        """Test an accepted grouping adds a row in each direction."""
+        group = models.UserGroup.objects.create(
+            sender=self.shop1, receiver=self.shop2, status="pending"
+        )
+        self.assertEqual(self.connections(), set())
+
+        group.status = "accepted"
+        group.save()
+
+        self.assertEqual(
+            self.connections(),
+            {(self.shop1.id, self.shop2.id), (self.shop2.id, self.shop1.id)},
+        )
+        self.assertEqual(
+            list(models.ShopConnection.objects.friends_of(self.shop2)), [self.shop1]
+        )
+
+    def test_rejecting_or_deleting_request_disconnects_shops(self):
+        """Test leaving the accepted state removes both rows."""
+        group = models.UserGroup.objects.create(
+            sender=self.shop1, receiver=self.shop2, status="accepted"
+        )
+        group.status = "rejected"
+        group.save()
+        self.assertEqual(self.connections(), set())
+
+        group.status = "accepted"
+        group.save()
+        group.delete()
+        self.assertEqual(self.connections(), set())
+
+    def test_reverse_request_keeps_connection(self):
+        """Test removing one of two accepted groupings keeps the pair connected."""
+        group = models.UserGroup.objects.create(
+            sender=self.shop1, receiver=self.shop2, status="accepted"
+        )
+        models.UserGroup.objects.create(
+            sender=self.shop2, receiver=self.shop1, status="accepted"
+        )
+
+        group.delete()
+
+        self.assertEqual(len(self.connections()), 2)
+
+    def test_backfill_command(self):
+        """Test the backfill command creates rows for accepted groupings."""
+        models.UserGroup.objects.create(
+            sender=self.shop1, receiver=self.shop2, status="accepted"
+        )
+        models.ShopConnection.objects.all().delete()
+
+        call_command("backfill_shop_connections", stdout=StringIO())
+
+        self.assertEqual(len(self.connections()), 2)
+
+    def test_check_command_reports_and_repairs(self):
+        """Test the checker finds rows changed behind the signals' back."""
+        models.UserGroup.objects.create(
+            sender=self.shop1, receiver=self.shop2, status="accepted"
+        )
+        models.UserGroup.objects.update(status="rejected")
+
+        with self.assertRaises(CommandError):
+            call_command("check_shop_connections", stdout=StringIO())
+
+        call_command("check_shop_connections", "--repair", stdout=StringIO())
+
+        self.assertEqual(self.connections(), set())
+        call_command("check_shop_connections", stdout=StringIO())
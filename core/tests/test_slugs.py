@@ -0,0 +1,69 @@
+"""
+Tests for the product slug allocator.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core import models
+
+
+class ProductSlugTests(TestCase):
+    """Test allocating unique product slugs."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user("test@example.com", "test123")
+        self.shop = models.Shop.objects.create(name="Khan Store", user=user)
+
+    def create_product(self, title, **fields):
+        return models.Product.objects.create(
+            title=title, shop=self.shop, price=10, quantity=1, **fields
+        )
+
+    def test_duplicate_titles_get_numbered_slugs(self):
+        """Test products with the same title get unique slugs."""
+        slugs = [self.create_product("Dell Inspiron").slug for _ in range(3)]
+
+        self.assertEqual(slugs, ["dell-inspiron", "dell-inspiron-2", "dell-inspiron-3"])
+
+    def test_slug_query_count_does_not_grow_with_duplicates(self):
+        """Test a new slug costs the same queries however many duplicates exist."""
+        for _ in range(5):
+            self.create_product("Dell Inspiron")
+
+        # Counter lookup, update and read in a savepoint, then the taken check.
+        with self.assertNumQueries(6):
+            slug = models.product_slugs.allocate("Dell Inspiron")
+
+        self.assertEqual(slug, "dell-inspiron-6")
+
+    def test_counter_continues_from_existing_slugs(self):
+        """Test a new counter starts after the suffixes already in use."""
+        self.create_product("Desk", slug="desk")
+        self.create_product("Desk", slug="desk-7")
+        self.create_product("Desk lamp", slug="desk-lamp")
+
+        self.assertEqual(self.create_product("Desk").slug, "desk-8")
+
+    def test_slugs_taken_by_other_titles_are_skipped(self):
+        """Test a numbered slug already used by another title is not reused."""
+        self.create_product("Item")
+        self.create_product("Item 2")
+
+        self.assertEqual(self.create_product("Item").slug, "item-3")
+
+    def test_allocate_many(self):
+        """Test many slugs are reserved at once, in order."""
+        self.create_product("Chair")
+
+        slugs = models.product_slugs.allocate_many(["Chair", "Table", "Chair", ""])
+
+        self.assertEqual(slugs, ["chair-2", "table", "chair-3", "product"])
+
+    def test_long_titles_leave_room_for_the_suffix(self):
+        """Test numbered slugs of long titles fit the slug column."""
+        title = "very long product title " * 5
+        slugs = [self.create_product(title).slug for _ in range(2)]
+
+        self.assertEqual(slugs[1], f"{slugs[0]}-2")
+        max_length = models.Product._meta.get_field("slug").max_length
+        self.assertLessEqual(len(slugs[1]), max_length)
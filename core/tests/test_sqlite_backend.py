@@ -0,0 +1,76 @@
+"""
+Tests for the tuned SQLite backend.
+"""
+import os
+import tempfile
+from unittest import skipUnless
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.backends.sqlite3.base import DatabaseWrapper
+
+
+@skipUnless(connection.vendor == "sqlite", "SQLite only")
+class SQLiteBackendTests(TestCase):
+    """Test the pragmas set on new connections."""
+
+    def test_pragmas(self):
+        with connection.cursor() as cursor:
+            values = {}
+            for name in ("synchronous", "busy_timeout", "temp_store", "cache_size"):
+                cursor.execute(f"PRAGMA {name}")
+                values[name] = cursor.fetchone()[0]
+
+        # NORMAL synchronous, MEMORY temp_store, cache_size in KiB.
+        self.assertEqual(
+            values,
+            {
+                "synchronous": 1,
+                "busy_timeout": 5000,
+                "temp_store": 2,
+                "cache_size": -65536,
+            },
+        )
+
+
+class TransactionModeTests(SimpleTestCase):
+    """Test the BEGIN used by atomic blocks."""
+
+    def make_connection(self, **options):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_dict = {
+            **connection.settings_dict,
+            "NAME": os.path.join(directory.name, "test.sqlite3"),
+            "OPTIONS": options,
+        }
+        wrapper = DatabaseWrapper(settings_dict, alias="tuned")
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_file_database_uses_wal(self):
+        wrapper = self.make_connection()
+        with wrapper.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+
+    def test_immediate_transactions(self):
+        """Test atomic blocks take the write lock when they start."""
+        wrapper = self.make_connection(transaction_mode="immediate")
+
+        wrapper.ensure_connection()
+
+        with CaptureQueriesContext(wrapper) as queries:
+            wrapper._start_transaction_under_autocommit()
+        wrapper.connection.rollback()
+
+        self.assertEqual([query["sql"] for query in queries], ["BEGIN IMMEDIATE"])
+
+    def test_unknown_transaction_mode(self):
+        wrapper = self.make_connection(transaction_mode="eventually")
+
+        with self.assertRaises(ImproperlyConfigured):
+            wrapper.ensure_connection()
@@ -0,0 +1,148 @@
+"""
+Tests for content-addressed media storage.
+"""
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import models
+from core.storage import ContentAddressedStorage
+
+
+class ContentAddressedStorageTest(TestCase):
+    """Test files are stored once under the hash of their content."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root, IMAGE_WORKERS=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        user = get_user_model().objects.create_user(
+            email="test@example.com", password="test1234"
+        )
+        cat = models.Category.objects.create(title="clothes")
+        self.shop = models.Shop.objects.create(
+            name="Khan Store", user=user, category=cat
+        )
+
+    def create_product(self, content=b"photo"):
+        return models.Product.objects.create(
+            title="shirt",
+            shop=self.shop,
+            price=Decimal("50.5"),
+            quantity=1,
+            image=ContentFile(content, name="Photo.JPG"),
+        )
+
+    def ref_count(self, name):
+        return models.MediaBlob.objects.get(name=name).ref_count
+
+    def test_same_content_is_stored_once(self):
+        """Test saving identical content twice returns the same name."""
+        first = default_storage.save("a.jpg", ContentFile(b"data"))
+        second = default_storage.save("product_image/b.jpg", ContentFile(b"data"))
+
+        self.assertEqual(first, second)
+        self.assertTrue(ContentAddressedStorage.is_blob(first))
+        self.assertTrue(first.endswith(".jpg"))
+        self.assertEqual(default_storage.open(first).read(), b"data")
+
+    def test_products_share_counted_blob(self):
+        """Test products with the same image share one counted file."""
+        first = self.create_product()
+        second = self.create_product()
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(self.ref_count(first.image.name), 2)
+
+        first.delete()
+        self.assertEqual(self.ref_count(second.image.name), 1)
+
+    def test_replacing_image_moves_reference(self):
+        """Test replacing an image releases the old file."""
+        product = models.Product.objects.get(pk=self.create_product(b"old").pk)
+        old_name = product.image.name
+        product.image = ContentFile(b"new", name="new.jpg")
+        product.save()
+
+        self.assertEqual(self.ref_count(old_name), 0)
+        self.assertEqual(self.ref_count(product.image.name), 1)
+
+        product.title = "pants"
+        product.save()
+        self.assertEqual(self.ref_count(product.image.name), 1)
+
+    def test_collect_media_blobs(self):
+        """Test only unreferenced files past the grace period are deleted."""
+        kept = self.create_product(b"kept").image.name
+        dropped = self.create_product(b"dropped")
+        dropped_name = dropped.image.name
+        dropped.delete()
+        orphan = default_storage.save("orphan.jpg", ContentFile(b"orphan"))
+
+        call_command("collect_media_blobs", stdout=StringIO())
+        self.assertTrue(default_storage.exists(dropped_name))
+
+        models.MediaBlob.objects.update(updated_at=timezone.now() - timedelta(days=2))
+        call_command("collect_media_blobs", "--grace-hours=0", stdout=StringIO())
+
+        self.assertTrue(default_storage.exists(kept))
+        self.assertFalse(default_storage.exists(dropped_name))
+        self.assertFalse(default_storage.exists(orphan))
+        self.assertFalse(models.MediaBlob.objects.filter(name=dropped_name).exists())
+
+    def test_upload_claims_unreferenced_blob(self):
+        """Test uploading unreferenced content again keeps it from collection."""
+        product = self.create_product(b"again")
+        name = product.image.name
+        product.delete()
+        models.MediaBlob.objects.update(updated_at=timezone.now() - timedelta(days=2))
+
+        self.assertEqual(default_storage.save("again.jpg", ContentFile(b"again")), name)
+        call_command("collect_media_blobs", stdout=StringIO())
+
+        self.assertTrue(default_storage.exists(name))
+        self.assertTrue(models.MediaBlob.objects.filter(name=name).exists())
+
+    def test_store_legacy_uploads(self):
+        """Test files saved under their upload names are moved into blobs."""
+        legacy = FileSystemStorage(location=self.media_root)
+        names = [
+            legacy.save("product_image/photo.jpg", ContentFile(b"legacy")),
+            legacy.save("product_image/photo.jpg", ContentFile(b"legacy")),
+        ]
+        products = [self.create_product() for _ in names]
+        for product, name in zip(products, names):
+            models.Product.objects.filter(pk=product.pk).update(image=name)
+
+        call_command("store_legacy_uploads", stdout=StringIO())
+
+        blob = default_storage.save("photo.jpg", ContentFile(b"legacy"))
+        for product in products:
+            product.refresh_from_db()
+            self.assertEqual(product.image.name, blob)
+        self.assertEqual(self.ref_count(blob), 2)
+        self.assertFalse(any(legacy.exists(name) for name in names))
+
+    def test_recount(self):
+        """Test --recount rebuilds the counts from the referencing rows."""
+        name = self.create_product().image.name
+        self.create_product()
+        models.MediaBlob.objects.all().delete()
+
+        call_command(
+            "collect_media_blobs", "--recount", "--dry-run", stdout=StringIO()
+        )
+
+        self.assertEqual(self.ref_count(name), 2)
@@ -0,0 +1,28 @@
+"""
+Helpers shared by the API tests.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Assertions about the number of queries an endpoint runs."""
+
+    def assertQueryBudget(self, budget, url, add_rows, sizes=(1, 25)):
+        """Assert GET `url` runs at most `budget` queries for every size.
+
+        `add_rows(n)` creates n more rows for the endpoint to return, so an
+        endpoint that queries once per row blows the budget on the larger
+        size.
+        """
+        for size in sizes:
+            add_rows(size)
+            with CaptureQueriesContext(connection) as captured:
+                res = self.client.get(url)
+            self.assertEqual(res.status_code, 200)
+            queries = "\n".join(query["sql"] for query in captured)
+            self.assertLessEqual(
+                len(captured),
+                budget,
+                f"{url} ran {len(captured)} queries for {size} new rows:\n{queries}",
+            )
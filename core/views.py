@@ -0,0 +1,166 @@
+"""
+Serving of uploaded media files.
+"""
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags
+from django.views.decorators.http import require_safe
+
+from core.images import RENDITIONS_DIR
+from core.storage import ContentAddressedStorage
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve a file from MEDIA_ROOT with ETags, byte ranges and sendfile.
+
+    Blobs are named after the hash of their content, so their ETag comes
+    from the name and they may be cached forever. With MEDIA_SENDFILE set,
+    the body is left to the web server through X-Sendfile or
+    X-Accel-Redirect and no worker is held while it is sent.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    stat = os.stat(full_path)
+    etag = media_etag(path, full_path, stat)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(stat.st_mtime),
+        "Cache-Control": cache_control(path),
+    }
+
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        response = HttpResponseNotModified()
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or "application/octet-stream"
+    mode = getattr(settings, "MEDIA_SENDFILE", None)
+    if mode:
+        response = HttpResponse(content_type=content_type)
+        if mode == "x-accel-redirect":
+            response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + path
+        else:
+            response["X-Sendfile"] = full_path
+    else:
+        byte_range = requested_range(request, etag, stat.st_size)
+        if byte_range == "unsatisfiable":
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stat.st_size}"
+            return response
+        if byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                read_range(full_path, start, end - start + 1),
+                status=206,
+                content_type=content_type,
+            )
+            response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+            response["Content-Length"] = str(end - start + 1)
+        else:
+            response = FileResponse(open(full_path, "rb"), content_type=content_type)
+            response["Content-Length"] = str(stat.st_size)
+        response["Accept-Ranges"] = "bytes"
+    if encoding:
+        response["Content-Encoding"] = encoding
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+def is_hashed(path):
+    """Tell whether the content of `path` can never change."""
+    return ContentAddressedStorage.is_blob(path) and RENDITIONS_DIR not in path
+
+
+def cache_control(path):
+    if is_hashed(path):
+        return IMMUTABLE
+    return f"public, max-age={getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600)}"
+
+
+def media_etag(path, full_path, stat):
+    """Return a strong ETag for the file, hashing it at most once per version."""
+    if is_hashed(path):
+        return '"%s"' % posixpath.splitext(posixpath.basename(path))[0]
+    key = f"media-etag:{path}:{stat.st_mtime_ns}:{stat.st_size}"
+    etag = cache.get(key)
+    if etag is None:
+        digest = hashlib.sha256()
+        with open(full_path, "rb") as media_file:
+            for chunk in iter(lambda: media_file.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        etag = f'"{digest.hexdigest()}"'
+        cache.set(key, etag, None)
+    return etag
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    etags = parse_etags(header)
+    # If-None-Match uses weak comparison, so W/"x" matches "x".
+    return "*" in etags or etag in (tag.removeprefix("W/") for tag in etags)
+
+
+def requested_range(request, etag, size):
+    """Return (first, last) byte of the requested range, None for all of it.
+
+    Only single ranges are supported; anything else gets the whole file.
+    """
+    header = request.headers.get("Range")
+    if not header or request.method != "GET":
+        return None
+    if_range = request.headers.get("If-Range")
+    if if_range and if_range != etag:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        start, end = max(size - int(last), 0), size - 1
+    if start >= size or end < start:
+        return "unsatisfiable"
+    return start, end
+
+
+def read_range(full_path, start, length):
+    with open(full_path, "rb") as media_file:
+        media_file.seek(start)
+        while length > 0:
+            chunk = media_file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
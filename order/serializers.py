@@ -1,26 +1,80 @@
+from decimal import Decimal
+from django.db import transaction
 from rest_framework import serializers
-from core import models
+from core import inventory, models
+from core.serializers import EagerLoadingMixin
 
-class OrederItemsSerializer(serializers.ModelSerializer):
+class OrederItemsSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ('user', 'shop')
     user = serializers.CharField(read_only=True)
     shop = serializers.CharField(read_only=True)
     class Meta:
         model = models.OrderItems
         fields = ('user','shop','product','quantity')
+        extra_kwargs = {'quantity': {'min_value': 1}}
 
-class OrderSerializer(serializers.ModelSerializer):
-    orderitem = serializers.PrimaryKeyRelatedField(queryset=models.OrderItems.objects.all(), many=True)
+class OrderItemIdsField(serializers.ListField):
+    """Ids of the order's items, taken from the rows the order was built from."""
+    child = serializers.IntegerField(min_value=1)
+
+    def get_attribute(self, instance):
+        ids = getattr(instance, '_orderitem_ids', None)
+        if ids is None:
+            ids = [item.pk for item in instance.orderitem.all()]
+        return ids
+
+class OrderSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ('user', 'shop')
+    prefetch_related_fields = ('orderitem',)
+    orderitem = OrderItemIdsField(allow_empty=False)
     shop = serializers.CharField(read_only=True)
     user = serializers.CharField(read_only=True)
     order_id = serializers.IntegerField(read_only=True)
+    total = serializers.DecimalField(source='get_totals', max_digits=12, decimal_places=2, read_only=True)
+    item_count = serializers.IntegerField(source='get_item_count', read_only=True)
 
     class Meta:
         model = models.Order
-        fields = ('orderitem', 'shop', 'user', 'order_id')
+        fields = ('orderitem', 'shop', 'user', 'order_id', 'total', 'item_count')
+
+    def validate_orderitem(self, value):
+        """Check every id and read the line totals with a single IN query."""
+        ids = list(dict.fromkeys(value))
+        lines = {
+            pk: (total, quantity)
+            for pk, total, quantity in models.OrderItems.objects.filter(id__in=ids)
+            .annotate(line_total=models.line_total())
+            .values_list('id', 'line_total', 'quantity')
+        }
+        missing = [pk for pk in ids if pk not in lines]
+        if missing:
+            raise serializers.ValidationError(f'Invalid pk "{missing[0]}" - object does not exist.')
+        self._totals = (
+            sum((total for total, _ in lines.values()), Decimal('0.00')),
+            sum(quantity for _, quantity in lines.values()),
+        )
+        return ids
 
     def create(self, validated_data):
         order_items = validated_data.pop('orderitem')
-        order = models.Order.objects.create(**validated_data)
-        for item in order_items:
-            order.orderitem.add(item)
-        return order
\ No newline at end of file
+        through = models.Order.orderitem.through
+        # Drawn before the transaction, so the id block commits on its own.
+        validated_data['order_id'] = models.generate_order_id()
+        with transaction.atomic():
+            try:
+                inventory.commit_items(order_items)
+            except inventory.InsufficientStock as error:
+                raise serializers.ValidationError(
+                    {'orderitem': [f'Not enough stock for products {error.product_ids}.']}
+                )
+            except inventory.AlreadyOrdered as error:
+                raise serializers.ValidationError(
+                    {'orderitem': [f'Cart items {error.item_ids} are already ordered.']}
+                )
+            order = models.Order.objects.create(**validated_data)
+            through.objects.bulk_create(
+                through(order_id=order.id, orderitems_id=pk) for pk in order_items
+            )
+        order._orderitem_ids = order_items
+        order.total_amount, order.total_items = self._totals
+        return order
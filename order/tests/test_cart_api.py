@@ -54,7 +54,7 @@ class CartAPITest(TestCase):
         )
         res = self.client.get(orderItem_list_url)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data["results"]), 1)
 
     def test_place_order(self):
         """Test create place order."""
@@ -71,3 +71,136 @@ class CartAPITest(TestCase):
         res = self.client.post(order_url, payload)
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
         self.assertTrue(models.Order.objects.all().exists())
+
+    def test_place_order_is_constant_queries(self):
+        """Test placing an order does not query once per cart item."""
+        items = models.OrderItems.objects.bulk_create(
+            models.OrderItems(user=self.user, shop=self.shop, product=self.product)
+            for _ in range(20)
+        )
+        payload = {"orderitem": [item.id for item in items]}
+        self.client.get(orderItem_list_url)
+        models.order_id_sequence.reset()
+        models.order_id_sequence.next_value()
+
+        # Inside the test's transaction the order id is reserved on its own,
+        # with a SAVEPOINT, UPDATE, SELECT and RELEASE.
+        with self.assertNumQueries(14):
+            res = self.client.post(order_url, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["orderitem"], payload["orderitem"])
+        order = models.Order.objects.get(order_id=res.data["order_id"])
+        self.assertEqual(order.orderitem.count(), 20)
+
+    def test_place_order_with_unknown_item(self):
+        """Test an unknown cart item id rejects the whole order."""
+        item = models.OrderItems.objects.create(
+            user=self.user, shop=self.shop, product=self.product
+        )
+        payload = {"orderitem": [item.id, item.id + 100]}
+
+        res = self.client.post(order_url, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(models.Order.objects.exists())
+
+    def test_order_totals_are_exact(self):
+        """Test order totals are summed in SQL without losing precision."""
+        cheap = models.Product.objects.create(
+            title="button", shop=self.shop, price=Decimal("0.10"), quantity=100
+        )
+        item1 = models.OrderItems.objects.create(
+            user=self.user, shop=self.shop, product=cheap, quantity=3
+        )
+        item2 = models.OrderItems.objects.create(
+            user=self.user, shop=self.shop, product=self.product, quantity=2
+        )
+        payload = {"orderitem": [item1.id, item2.id]}
+
+        res = self.client.post(order_url, payload, format="json")
+
+        self.assertEqual(res.data["total"], "101.30")
+        self.assertEqual(res.data["item_count"], 5)
+        with self.assertNumQueries(1):
+            order = models.Order.objects.with_totals().get()
+        self.assertEqual(order.get_totals(), Decimal("101.30"))
+        self.assertEqual(order.get_item_count(), 5)
+        order = models.Order.objects.get()
+        self.assertEqual(order.get_totals(), Decimal("101.30"))
+
+        res = self.client.get(order_url)
+        self.assertEqual(res.data["total"], "101.30")
+
+    def test_revenue_by_shop(self):
+        """Test revenue is grouped by the shop selling the products."""
+        seller = models.Shop.objects.create(
+            name="seller", user=self.user, category=self.cat
+        )
+        product = models.Product.objects.create(
+            title="hat", shop=seller, price=Decimal("9.99"), quantity=100
+        )
+        item1 = models.OrderItems.objects.create(
+            user=self.user, shop=self.shop, product=product, quantity=2
+        )
+        item2 = models.OrderItems.objects.create(
+            user=self.user, shop=self.shop, product=self.product
+        )
+        self.client.post(order_url, {"orderitem": [item1.id, item2.id]}, format="json")
+
+        revenue = {
+            row["seller"]: row["revenue"]
+            for row in models.Order.objects.revenue_by_shop()
+        }
+
+        self.assertEqual(
+            revenue, {self.shop.id: Decimal("50.50"), seller.id: Decimal("19.98")}
+        )
+
+    def test_add_to_cart_reserves_stock(self):
+        """Test adding to cart takes stock and rejects what is not there."""
+        res = self.client.post(
+            orderItem_list_url, {"product": self.product.id, "quantity": 60}
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 40)
+
+        res = self.client.post(
+            orderItem_list_url, {"product": self.product.id, "quantity": 41}
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(models.OrderItems.objects.count(), 1)
+
+    def test_place_order_rejects_out_of_stock_items(self):
+        """Test an order is refused atomically when stock ran out."""
+        item = models.OrderItems.objects.create(
+            user=self.user, shop=self.shop, product=self.product, quantity=101
+        )
+
+        res = self.client.post(order_url, {"orderitem": [item.id]}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(models.Order.objects.exists())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 100)
+
+    def test_cart_cannot_be_ordered_twice(self):
+        """Test re-posting an ordered cart is refused and takes no stock."""
+        self.product.quantity = 1
+        self.product.save()
+        item = models.OrderItems.objects.create(
+            user=self.user, shop=self.shop, product=self.product
+        )
+        payload = {"orderitem": [item.id]}
+
+        res = self.client.post(order_url, payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        for _ in range(2):
+            res = self.client.post(order_url, payload, format="json")
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("already ordered", res.data["orderitem"][0])
+        self.assertEqual(models.Order.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 0)
@@ -4,7 +4,10 @@ from rest_framework import permissions
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from core import models
+from django.db import transaction
+from core import inventory, models
+from core.pagination import paginate
+from core.serializers import eager_load
 from . import serializers
 
 
@@ -13,20 +16,27 @@ class OrderItemsAV(APIView):
     perimission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        loged_in_shop = models.Shop.objects.get(user=request.user, default=True)
+        loged_in_shop = request.shop
         orderitems = models.OrderItems.objects.filter(shop=loged_in_shop)
-        serializer = serializers.OrederItemsSerializer(orderitems, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return paginate(request, orderitems, serializers.OrederItemsSerializer, self)
 
     def post(self, request):
         serializer = serializers.OrederItemsSerializer(data=request.data)
-        loged_in_shop = models.Shop.objects.get(user=request.user, default=True)
+        loged_in_shop = request.shop
 
         if serializer.is_valid():
             validated_data = serializer.validated_data
             validated_data["user"] = request.user
             validated_data["shop"] = loged_in_shop
-            serializer.create(validated_data)
+            try:
+                with transaction.atomic():
+                    item = serializer.create(validated_data)
+                    inventory.reserve_items([item])
+            except inventory.InsufficientStock:
+                return Response(
+                    {"quantity": ["Not enough stock for this product."]},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -36,13 +46,14 @@ class OrderAV(APIView):
     perimission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        loged_in_shop = models.Shop.objects.get(user=request.user, default=True)
-        order = models.Order.objects.get(shop=loged_in_shop)
+        loged_in_shop = request.shop
+        orders = eager_load(models.Order.objects.with_totals(), serializers.OrderSerializer)
+        order = orders.get(shop=loged_in_shop)
         serializer = serializers.OrderSerializer(order)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
     def post(self,request):
-        loged_in_shop = models.Shop.objects.get(user=request.user, default=True)
+        loged_in_shop = request.shop
         serializer = serializers.OrderSerializer(data=request.data)
         if serializer.is_valid():
             validated_data = serializer.validated_data
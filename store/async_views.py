@@ -0,0 +1,151 @@
+"""
+Async variants of the read-heavy store endpoints, for ASGI deployments.
+
+They answer the same queries as their APIView counterparts in
+store.views, but authenticate from the token claims and fetch rows with
+the async ORM, so a slow client holds no worker thread. They only serve
+reads; exports and writes stay on the synchronous endpoints.
+"""
+from django.conf import settings
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.views import exception_handler
+
+from core import models
+from core.authentication import StatelessJWTAuthentication
+from core.pagination import apaginate, apaginate_shards
+from core.routers import read_replica
+from core.streaming import export_format
+
+from . import serializers
+from .filters import ProductFilter
+
+
+class AsyncListView(View):
+    """Authenticate a GET request, then answer it with a page of rows.
+
+    Subclasses set serializer_class and define async get_queryset(request).
+    """
+
+    authentication = StatelessJWTAuthentication()
+    renderer = JSONRenderer()
+    serializer_class = None
+
+    async def get(self, request, *args, **kwargs):
+        request = Request(request)
+        try:
+            auth = await self.authentication.aauthenticate(request)
+            if auth is None:
+                raise exceptions.NotAuthenticated()
+            request.user, request.auth = auth
+            response = await self.list(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            if isinstance(
+                exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+            ):
+                exc.auth_header = self.authentication.authenticate_header(request)
+            response = exception_handler(exc, {"view": self, "request": request})
+        return self.render(response)
+
+    @read_replica
+    async def list(self, request):
+        return await self.paginate(request, await self.get_queryset(request))
+
+    async def paginate(self, request, queryset):
+        return await apaginate(request, queryset, self.serializer_class, self)
+
+    def render(self, response):
+        # A plain HttpResponse, as Django renders a DRF Response in a thread.
+        rendered = HttpResponse(
+            self.renderer.render(response.data),
+            status=response.status_code,
+            content_type=self.renderer.media_type,
+        )
+        for name, value in response.items():
+            if name != "Content-Type":
+                rendered[name] = value
+        return rendered
+
+
+async def current_shop(request):
+    try:
+        return await models.Shop.objects.aget_default(request.user)
+    except models.Shop.DoesNotExist:
+        raise exceptions.NotFound("Log in to a shop first.")
+
+
+class AsyncProductListView(AsyncListView):
+    """Filter, sort and page products, like ProductListMixin."""
+
+    serializer_class = serializers.ProductSerializer
+
+    @read_replica
+    async def list(self, request):
+        if export_format(request):
+            raise exceptions.ValidationError(
+                {"export": "Exports are served by the synchronous endpoint."}
+            )
+        products = await self.get_queryset(request)
+        product_filter = ProductFilter(request)
+        products = product_filter.filter(products)
+        self.ordering = product_filter.get_ordering()
+        response = await self.paginate(request, products)
+        if product_filter.params["facets"]:
+            rows = [row async for row in product_filter.facet_queryset(products)]
+            response.data["facets"] = product_filter.count_facets(rows)
+        return response
+
+
+class ProductListView(AsyncProductListView):
+    """Async ProductListAV.get: the products of the current shop."""
+
+    async def get_queryset(self, request):
+        shop = await current_shop(request)
+        return models.Product.objects.filter(shop=shop)
+
+
+class FindProductView(AsyncProductListView):
+    """Async FindProductAV.get: the products of connected shops."""
+
+    async def get_queryset(self, request):
+        self.shop = await current_shop(request)
+        return models.Product.objects.filter(
+            shop__in=models.ShopConnection.objects.friend_ids(self.shop)
+        )
+
+    async def paginate(self, request, products):
+        if settings.FIND_PRODUCT_FANOUT_MIN_SHOPS is None:
+            return await super().paginate(request, products)
+        shop_ids = [
+            shop_id
+            async for shop_id in models.ShopConnection.objects.friend_ids(
+                self.shop
+            ).values_list("friend", flat=True)
+        ]
+        if len(shop_ids) < settings.FIND_PRODUCT_FANOUT_MIN_SHOPS:
+            return await super().paginate(request, products)
+        shards = {shop_id: products.filter(shop_id=shop_id) for shop_id in shop_ids}
+        return await apaginate_shards(request, shards, self.serializer_class, self)
+
+
+class FriendShopListView(AsyncListView):
+    """Async MyFriendListAV.get: the shops connected to the current shop."""
+
+    serializer_class = serializers.ShopSerializer
+
+    async def get_queryset(self, request):
+        shop = await current_shop(request)
+        return models.ShopConnection.objects.friends_of(shop)
+
+
+class FindShopView(AsyncListView):
+    """Async shop_list: the shops in the category of the current shop."""
+
+    serializer_class = serializers.ShopSerializer
+
+    async def get_queryset(self, request):
+        shop = await current_shop(request)
+        return models.Shop.objects.filter(category_id=shop.category_id)
@@ -0,0 +1,133 @@
+"""
+Filters, sort options and facet counts for product listings.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Case, Count, IntegerField, Value, When
+from rest_framework import serializers
+
+SORTS = {
+    "newest": ("-created_at", "-id"),
+    "oldest": ("created_at", "id"),
+    "price": ("price", "id"),
+    "-price": ("-price", "-id"),
+}
+
+
+class ProductFilterSerializer(serializers.Serializer):
+    """Serializer for the query parameters of product listings."""
+
+    min_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0, required=False
+    )
+    max_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0, required=False
+    )
+    in_stock = serializers.BooleanField(required=False, allow_null=True, default=None)
+    shop = serializers.UUIDField(required=False)
+    category = serializers.IntegerField(required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    sort = serializers.ChoiceField(choices=list(SORTS), required=False)
+    facets = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        low, high = attrs.get("min_price"), attrs.get("max_price")
+        if low is not None and high is not None and low > high:
+            raise serializers.ValidationError(
+                {"max_price": "Must not be lower than min_price."}
+            )
+        return attrs
+
+
+LOOKUPS = {
+    "min_price": "price__gte",
+    "max_price": "price__lte",
+    "shop": "shop__uid",
+    "category": "shop__category_id",
+    "created_after": "created_at__gte",
+    "created_before": "created_at__lt",
+}
+
+
+class ProductFilter:
+    """Apply the filters and sort order asked for in the query string."""
+
+    def __init__(self, request):
+        serializer = ProductFilterSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        self.params = serializer.validated_data
+
+    def get_ordering(self, default="newest"):
+        return SORTS[self.params.get("sort", default)]
+
+    def filter(self, queryset):
+        filters = {
+            lookup: self.params[name]
+            for name, lookup in LOOKUPS.items()
+            if name in self.params
+        }
+        queryset = queryset.filter(**filters)
+        if self.params["in_stock"] is True:
+            queryset = queryset.filter(quantity__gt=0)
+        elif self.params["in_stock"] is False:
+            queryset = queryset.filter(quantity__lte=0)
+        return queryset
+
+    def facets(self, queryset):
+        """Count `queryset` per category and per price bucket in one query."""
+        if not self.params["facets"]:
+            return None
+        return self.count_facets(self.facet_queryset(queryset))
+
+    def facet_queryset(self, queryset):
+        """Return the counts of `queryset` per category and price bucket."""
+        bounds = self.price_bounds
+        bucket = Case(
+            *(
+                When(price__lt=upper, then=Value(index))
+                for index, upper in enumerate(bounds[1:])
+            ),
+            default=Value(len(bounds) - 1),
+            output_field=IntegerField(),
+        )
+        return (
+            queryset.order_by()
+            .annotate(bucket=bucket)
+            .values("shop__category_id", "shop__category__title", "bucket")
+            .annotate(count=Count("id"))
+        )
+
+    @property
+    def price_bounds(self):
+        return [Decimal(bound) for bound in settings.PRODUCT_PRICE_BUCKETS]
+
+    def count_facets(self, rows):
+        """Sum the rows of facet_queryset() into the facets of the response."""
+        bounds = self.price_bounds
+        categories, prices = {}, [0] * len(bounds)
+        for row in rows:
+            category = categories.setdefault(
+                row["shop__category_id"],
+                {
+                    "id": row["shop__category_id"],
+                    "title": row["shop__category__title"],
+                    "count": 0,
+                },
+            )
+            category["count"] += row["count"]
+            prices[row["bucket"]] += row["count"]
+        return {
+            "category": sorted(
+                categories.values(), key=lambda category: -category["count"]
+            ),
+            "price": [
+                {
+                    "min": bounds[index],
+                    "max": bounds[index + 1] if index + 1 < len(bounds) else None,
+                    "count": count,
+                }
+                for index, count in enumerate(prices)
+            ],
+        }
@@ -0,0 +1,160 @@
+"""
+Bulk import of product catalogs from CSV or NDJSON.
+"""
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+
+from core import models, search
+
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+}
+
+
+class ProductImportSerializer(serializers.Serializer):
+    """Serializer for one imported product row."""
+
+    external_sku = serializers.CharField(max_length=100)
+    title = serializers.CharField(max_length=255)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    quantity = serializers.IntegerField(min_value=0)
+
+
+def iter_lines(stream, block_size=64 * 1024):
+    """Yield the lines of a binary stream, reading it in large blocks.
+
+    Django's request stream reads line by line in small steps, which
+    costs more than parsing the rows themselves.
+    """
+    pending = b""
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        lines = (pending + block).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line + b"\n"
+    if pending:
+        yield pending
+
+
+def read_csv(lines):
+    """Yield (row number, row) from CSV lines with a header row."""
+    reader = csv.DictReader(codecs.iterdecode(lines, "utf-8-sig"))
+    try:
+        for row in reader:
+            yield reader.line_num, row
+    except (csv.Error, UnicodeDecodeError) as exc:
+        yield reader.line_num + 1, exc
+
+
+def read_ndjson(lines):
+    """Yield (line number, object) from NDJSON lines, skipping blank lines."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except (ValueError, UnicodeDecodeError) as exc:
+            yield number, exc
+            continue
+        yield number, row if isinstance(row, dict) else ValueError("Expected an object")
+
+
+READERS = {"csv": read_csv, "ndjson": read_ndjson}
+
+
+class ProductImport:
+    """Upsert the rows of a catalog into a shop, keyed by external_sku.
+
+    Rows are read lazily from the stream and handled in chunks of
+    IMPORT_CHUNK_SIZE: every chunk is validated, then written with one
+    INSERT ... ON CONFLICT DO UPDATE in its own transaction and added to
+    the search index. New rows get their slugs in one batch, existing rows
+    keep theirs. Invalid rows are reported and skipped.
+    """
+
+    update_fields = ["title", "price", "quantity", "updated_at"]
+
+    def __init__(self, shop, chunk_size=None, max_errors=None):
+        self.shop = shop
+        self.chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+        self.max_errors = max_errors or settings.IMPORT_MAX_ERRORS
+        self.created = self.updated = self.error_count = 0
+        self.errors = []
+        self.validator = ProductImportSerializer()
+
+    def run(self, stream, fmt):
+        rows = READERS[fmt](iter_lines(stream))
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                return self.report()
+            self.import_chunk(chunk)
+
+    def report(self):
+        return {
+            "created": self.created,
+            "updated": self.updated,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+    def add_error(self, number, detail):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": number, "errors": detail})
+
+    def validate(self, chunk):
+        """Return the valid rows of `chunk` by SKU; the last row of a SKU wins."""
+        valid = {}
+        for number, row in chunk:
+            if isinstance(row, Exception):
+                self.add_error(number, {"non_field_errors": [str(row)]})
+                continue
+            try:
+                data = self.validator.run_validation(row)
+            except serializers.ValidationError as exc:
+                self.add_error(number, exc.detail)
+                continue
+            valid[data["external_sku"]] = data
+        return valid
+
+    def import_chunk(self, chunk):
+        rows = self.validate(chunk)
+        if not rows:
+            return
+        skus = self.shop.product_set.filter(external_sku__in=list(rows))
+        with transaction.atomic():
+            slugs = dict(skus.values_list("external_sku", "slug"))
+            existing = len(slugs)
+            new = [sku for sku in rows if sku not in slugs]
+            slugs.update(
+                zip(
+                    new,
+                    models.product_slugs.allocate_many(
+                        rows[sku]["title"] for sku in new
+                    ),
+                )
+            )
+            products = [
+                models.Product(shop=self.shop, slug=slugs[sku], **data)
+                for sku, data in rows.items()
+            ]
+            models.Product.objects.bulk_create(
+                products,
+                update_conflicts=True,
+                unique_fields=["shop", "external_sku"],
+                update_fields=self.update_fields,
+            )
+            search.index_products(skus.values_list("id", flat=True))
+        self.updated += existing
+        self.created += len(products) - existing
@@ -1,5 +1,9 @@
+from django.db.models import Manager
 from rest_framework import serializers
 from core import models
+from core.images import current_renditions
+from core.cache import RepresentationCache
+from core.serializers import EagerLoadingMixin
 
 
 class CategorySerializer(serializers.Serializer):
@@ -17,9 +21,11 @@ class CategorySerializer(serializers.Serializer):
         return instance
 
 
-class ShopSerializer(serializers.ModelSerializer):
+class ShopSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for Shop."""
 
+    select_related_fields = ("user",)
+
     uid = serializers.CharField(read_only=True)
     name = serializers.CharField()
     category = serializers.PrimaryKeyRelatedField(
@@ -32,9 +38,11 @@ class ShopSerializer(serializers.ModelSerializer):
         fields = ("uid", "name", "category", "user")
 
 
-class GroupingSerializer(serializers.Serializer):
+class GroupingSerializer(EagerLoadingMixin, serializers.Serializer):
     """Serializer for grouping with one shop to another."""
 
+    select_related_fields = ("sender",)
+
     uid = serializers.CharField(read_only=True)
     sender = serializers.CharField(read_only=True)
     receiver = serializers.PrimaryKeyRelatedField(queryset=models.Shop.objects.all())
@@ -51,13 +59,75 @@ class GroupingSerializer(serializers.Serializer):
         return instance
 
 
-class ProductSerializer(serializers.ModelSerializer):
-    """Serializer for Product..."""
+class ProductFieldsSerializer(serializers.ModelSerializer):
+    """Serializer for the Product's own fields, without its shop."""
 
     slug = serializers.CharField(read_only=True)
     image = serializers.ImageField(max_length=None, allow_empty_file=True, use_url=True)
-    shop = ShopSerializer(read_only=True)
+    images = serializers.SerializerMethodField()
 
     class Meta:
         model = models.Product
-        fields = ("slug", "title", "price", "quantity", "shop", "image")
+        fields = ("slug", "title", "price", "quantity", "image", "images")
+
+    def get_images(self, product):
+        """Return the rendered sizes of the image, keyed by rendition."""
+        storage = models.Product._meta.get_field("image").storage
+        request = self.context.get("request")
+        sizes = {}
+        for rendition, size in current_renditions(product).items():
+            url = storage.url(size["name"])
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            sizes[rendition] = {
+                "url": url,
+                "width": size["width"],
+                "height": size["height"],
+            }
+        return sizes
+
+
+shop_cache = RepresentationCache("shop", ShopSerializer)
+product_cache = RepresentationCache("product", ProductFieldsSerializer)
+
+
+class CachedProductListSerializer(serializers.ListSerializer):
+    """Build product lists from cached fragments with one multi-get."""
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, Manager) else data
+        return self.child.cached_representations(list(iterable))
+
+
+class ProductSerializer(EagerLoadingMixin, ProductFieldsSerializer):
+    """Serializer for Product..."""
+
+    select_related_fields = ("shop__user",)
+
+    shop = ShopSerializer(read_only=True)
+
+    class Meta(ProductFieldsSerializer.Meta):
+        fields = ("slug", "title", "price", "quantity", "shop", "image", "images")
+        list_serializer_class = CachedProductListSerializer
+
+    def to_representation(self, instance):
+        if not isinstance(instance, models.Product):
+            return super().to_representation(instance)
+        return self.cached_representations([instance])[0]
+
+    def cached_representations(self, products):
+        """Combine the cached product and shop fragments of `products`."""
+        if self.context.get("request") is not None or self.context.get("export"):
+            # Absolute image URLs depend on the request, and an export reads
+            # every row once and would only fill the cache with the catalog.
+            render = super().to_representation
+            return [render(product) for product in products]
+        fragments = product_cache.get_many(products)
+        shops = shop_cache.get_many([product.shop for product in products])
+        return [
+            {
+                name: shop if name == "shop" else fragment[name]
+                for name in self.Meta.fields
+            }
+            for fragment, shop in zip(fragments, shops)
+        ]
@@ -0,0 +1,30 @@
+"""
+Signal handlers keeping the store caches fresh.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core import models
+from store.serializers import product_cache, shop_cache
+
+
+@receiver(post_save, sender=models.Product)
+@receiver(post_delete, sender=models.Product)
+def invalidate_product(sender, instance, **kwargs):
+    product_cache.invalidate(instance.uid)
+
+
+@receiver(post_save, sender=models.Shop)
+@receiver(post_delete, sender=models.Shop)
+def invalidate_shop(sender, instance, **kwargs):
+    shop_cache.invalidate(instance.uid)
+
+
+@receiver(post_save, sender=get_user_model())
+def touch_user_shops(sender, instance, created, update_fields=None, **kwargs):
+    """Bump the version of shops whose representation shows the owner."""
+    if created or (update_fields is not None and "email" not in update_fields):
+        return
+    models.Shop.objects.filter(user=instance).update(updated_at=timezone.now())
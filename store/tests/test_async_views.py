@@ -0,0 +1,141 @@
+"""
+Tests for the async list endpoints.
+"""
+import asyncio
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import models, routers
+from core.authentication import revocations
+from store import serializers
+from user.serializers import TokenObtainPairSerializer
+
+# (async endpoint, sync endpoint) pairs that must answer alike.
+ENDPOINTS = [
+    ("store:async_product_list", "store:product_list"),
+    ("store:async_find_product", "store:find_product"),
+    ("store:async_my_friends", "store:my_friends"),
+    ("store:async_find_shop", "store:find_shop"),
+]
+
+
+class AsyncListTests(TestCase):
+    """Test the async lists answer like their synchronous counterparts."""
+
+    def setUp(self):
+        revocations.invalidate()
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="test1234"
+        )
+        category = models.Category.objects.create(title="clothes")
+        self.shop = models.Shop.objects.create(
+            name="Khan Store", user=self.user, category=category, default=True
+        )
+        friend = models.Shop.objects.create(
+            name="Friend Store", user=self.user, category=category
+        )
+        models.UserGroup.objects.create(
+            sender=self.shop, receiver=friend, status="accepted"
+        )
+        for number in range(4):
+            for shop in (self.shop, friend):
+                models.Product.objects.create(
+                    title=f"Shirt {number}", shop=shop, price=number * 20, quantity=1
+                )
+        token = TokenObtainPairSerializer.get_token(self.user).access_token
+        self.authorization = f"Bearer {token}"
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=self.authorization)
+
+    async def get_both(self, name, sync_name, query=""):
+        res = await self.async_client.get(
+            f"{reverse(name)}{query}", AUTHORIZATION=self.authorization
+        )
+        expected = await sync_to_async(self.client.get)(f"{reverse(sync_name)}{query}")
+        # Links point at the endpoint that served the page.
+        content = res.content.decode().replace(reverse(name), reverse(sync_name))
+        return json.loads(content), expected.json()
+
+    async def test_lists_match_sync_endpoints(self):
+        """Test every async list returns the same page as the sync one."""
+        for name, sync_name in ENDPOINTS:
+            with self.subTest(name=name):
+                data, expected = await self.get_both(name, sync_name)
+
+                self.assertEqual(data, expected)
+                self.assertTrue(data["results"])
+
+    async def test_filters_sorts_facets_and_cursors(self):
+        """Test query parameters and next links work like the sync list."""
+        data, expected = await self.get_both(
+            "store:async_product_list",
+            "store:product_list",
+            "?sort=price&min_price=10&facets=true&page_size=2",
+        )
+
+        self.assertEqual(data, expected)
+        self.assertEqual(data["facets"]["category"][0]["count"], 3)
+
+        cursor = data["next"].split("?", 1)[1]
+        data, expected = await self.get_both(
+            "store:async_product_list", "store:product_list", f"?{cursor}"
+        )
+        self.assertEqual(data, expected)
+
+    @override_settings(FANOUT_MAX_WORKERS=0, FIND_PRODUCT_FANOUT_MIN_SHOPS=1)
+    async def test_find_product_fan_out(self):
+        """Test paging friend shops one by one answers like the sync list."""
+        data, expected = await self.get_both(
+            "store:async_find_product", "store:find_product", "?sort=price&page_size=3"
+        )
+
+        self.assertEqual(data, expected)
+        self.assertEqual(len(data["results"]), 3)
+
+    async def test_errors(self):
+        """Test bad parameters and missing tokens get the usual API errors."""
+        url = reverse("store:async_product_list")
+
+        res = await self.async_client.get(url)
+        self.assertEqual(res.status_code, 401)
+        self.assertIn("WWW-Authenticate", res.headers)
+
+        res = await self.async_client.get(
+            f"{url}?min_price=5&max_price=1", AUTHORIZATION=self.authorization
+        )
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("max_price", json.loads(res.content))
+
+        res = await self.async_client.get(
+            f"{url}?cursor=broken", AUTHORIZATION=self.authorization
+        )
+        self.assertEqual(res.status_code, 404)
+
+    @override_settings(DATABASE_REPLICAS=["replica1"])
+    async def test_cache_is_not_read_on_the_event_loop(self):
+        """Test pins and cached representations are read without blocking."""
+        on_loop = []
+
+        def get_many(instances):
+            try:
+                on_loop.append(asyncio.get_running_loop() is not None)
+            except RuntimeError:
+                on_loop.append(False)
+            return [serializers.ShopSerializer(shop).data for shop in instances]
+
+        with mock.patch.object(
+            routers, "is_pinned", side_effect=AssertionError
+        ), mock.patch.object(serializers.shop_cache, "get_many", get_many):
+            res = await self.async_client.get(
+                reverse("store:async_product_list"), AUTHORIZATION=self.authorization
+            )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(on_loop)
+        self.assertFalse(any(on_loop))
@@ -0,0 +1,185 @@
+"""
+Tests for conditional GET on the catalog and shop endpoints.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+from store import serializers
+
+PRODUCT_LIST_URL = reverse("store:product_list")
+MY_FRIENDS_URL = reverse("store:my_friends")
+
+
+class ConditionalGetTests(TestCase):
+    """Test clients with a current copy get a 304 without a body."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="test1234", is_staff=True
+        )
+        self.cat = models.Category.objects.create(title="clothes")
+        self.shop = models.Shop.objects.create(
+            name="Khan Store", user=self.user, category=self.cat, default=True
+        )
+        self.product = models.Product.objects.create(
+            title="shirt", shop=self.shop, price=Decimal("10"), quantity=1
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def revalidate(self, url, **headers):
+        """GET `url`, then GET it again with the ETag it answered with."""
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return self.client.get(url, HTTP_IF_NONE_MATCH=res["ETag"], **headers)
+
+    def test_details_answer_304_while_current(self):
+        """Test product, shop and category details revalidate by ETag."""
+        for url in (
+            reverse("store:product_detail", args=[self.product.slug]),
+            reverse("store:shop_detail", args=[self.shop.uid]),
+            reverse("store:category_detail", args=[self.cat.uid]),
+        ):
+            with self.subTest(url=url):
+                res = self.client.get(url)
+                self.assertTrue(res["ETag"].startswith('W/"'))
+                self.assertIn("Last-Modified", res)
+                self.assertIn("Authorization", res["Vary"])
+                self.assertEqual(res["Cache-Control"], "private, no-cache")
+
+                res = self.revalidate(url)
+                self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(res.content, b"")
+                self.assertIn("ETag", res)
+
+    def test_304_skips_serialization(self):
+        """Test a current copy is answered without rendering the product."""
+        url = reverse("store:product_detail", args=[self.product.slug])
+        etag = self.client.get(url)["ETag"]
+
+        with mock.patch.object(
+            serializers.ProductSerializer, "to_representation"
+        ) as render:
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        render.assert_not_called()
+
+    def test_changes_invalidate_details(self):
+        """Test editing the product or its embedded shop changes the ETag."""
+        url = reverse("store:product_detail", args=[self.product.slug])
+        etag = self.client.get(url)["ETag"]
+
+        self.shop.name = "Renamed Store"
+        self.shop.save()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["shop"]["name"], "Renamed Store")
+
+        self.client.patch(url, {"title": "blouse"})
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["title"], "blouse")
+
+    def test_checkout_invalidates_product(self):
+        """Test the stock taken by an order changes the product's ETags."""
+        detail_url = reverse("store:product_detail", args=[self.product.slug])
+        detail_etag = self.client.get(detail_url)["ETag"]
+        list_etag = self.client.get(PRODUCT_LIST_URL)["ETag"]
+        item = models.OrderItems.objects.create(
+            user=self.user, shop=self.shop, product=self.product
+        )
+
+        res = self.client.post(reverse("order:order_create"), {"orderitem": [item.id]})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["quantity"], 0)
+        res = self.client.get(PRODUCT_LIST_URL, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_if_modified_since(self):
+        """Test details also revalidate by Last-Modified."""
+        yesterday = timezone.now() - timedelta(days=1)
+        models.Shop.objects.filter(pk=self.shop.pk).update(updated_at=yesterday)
+        get_user_model().objects.filter(pk=self.user.pk).update(updated_at=yesterday)
+        url = reverse("store:shop_detail", args=[self.shop.uid])
+        last_modified = self.client.get(url)["Last-Modified"]
+
+        res = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.shop.save()
+        res = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_lists_answer_304_with_one_probe(self):
+        """Test a current list costs one probe query and nothing else."""
+        etag = self.client.get(PRODUCT_LIST_URL)["ETag"]
+        self.assertNotIn("Last-Modified", self.client.get(PRODUCT_LIST_URL))
+
+        # The shop is cached by the first request.
+        with self.assertNumQueries(1):
+            res = self.client.get(PRODUCT_LIST_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_changes_invalidate(self):
+        """Test edits, additions and removals all change a list's ETag."""
+        changes = [
+            lambda: self.product.save(),
+            lambda: models.Product.objects.create(
+                title="socks", shop=self.shop, price=Decimal("1"), quantity=1
+            ),
+            lambda: models.Product.objects.filter(title="socks").delete(),
+        ]
+        for change in changes:
+            etag = self.client.get(PRODUCT_LIST_URL)["ETag"]
+            change()
+            res = self.client.get(PRODUCT_LIST_URL, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_etag_depends_on_query(self):
+        """Test every page and filter of a list has an ETag of its own."""
+        etag = self.client.get(PRODUCT_LIST_URL)["ETag"]
+
+        res = self.client.get(
+            PRODUCT_LIST_URL, {"sort": "price"}, HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_replaced_friend_changes_friend_list(self):
+        """Test a list whose members change at the same size is refreshed."""
+        owner = get_user_model().objects.create_user(
+            email="friend@example.com", password="test1234"
+        )
+        old, new = (
+            models.Shop.objects.create(name=name, user=owner, category=self.cat)
+            for name in ("old friend", "new friend")
+        )
+        group = models.UserGroup.objects.create(
+            sender=self.shop, receiver=old, status="accepted"
+        )
+        etag = self.client.get(MY_FRIENDS_URL)["ETag"]
+
+        group.delete()
+        models.UserGroup.objects.create(
+            sender=self.shop, receiver=new, status="accepted"
+        )
+        # The new friend is not newer than the list the client has.
+        models.Shop.objects.filter(pk=new.pk).update(updated_at=old.updated_at)
+        res = self.client.get(MY_FRIENDS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"][0]["name"], "new friend")
@@ -2,12 +2,14 @@
 Tests Product API.
 """
 from decimal import Decimal
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from core import models
+import json
 import tempfile
 import os
+import shutil
 from PIL import Image
 
 from rest_framework.test import APIClient
@@ -30,6 +32,12 @@ class ProductAPITest(TestCase):
     """Test all private api of product model.."""
 
     def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
         self.user = create_user(
             email="test@example.com",
             password="test1234",
@@ -75,7 +83,7 @@ class ProductAPITest(TestCase):
 
         res = self.client.get(product_list_url)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 4)
+        self.assertEqual(len(res.data["results"]), 4)
 
     def test_get_product_detail(self):
         """Test get single product detail."""
@@ -138,4 +146,67 @@ class ProductAPITest(TestCase):
 
         res = self.client.get(find_product_url)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 4)
+        self.assertEqual(len(res.data["results"]), 4)
+
+    def test_get_product_by_friendship_query_count_is_constant(self):
+        """Test friend products are fetched without a query per friend shop."""
+        for index in range(4):
+            friend = models.Shop.objects.create(
+                name=f"friend{index}", user=self.user, category=self.cat
+            )
+            models.UserGroup.objects.create(
+                sender=self.shop if index % 2 else friend,
+                receiver=friend if index % 2 else self.shop,
+                status="accepted",
+            )
+            models.Product.objects.create(
+                title="shirt", shop=friend, price=Decimal("50.5"), quantity=100
+            )
+
+        # The shop, the conditional GET probe and the page.
+        with self.assertNumQueries(3):
+            res = self.client.get(find_product_url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 4)
+
+    def test_export_products_as_ndjson(self):
+        """Test streaming every product of the shop as NDJSON."""
+        for title in ("shirt", "pants", "shorts"):
+            models.Product.objects.create(
+                title=title, shop=self.shop, price=Decimal("50.5"), quantity=100
+            )
+
+        res = self.client.get(product_list_url, {"export": "ndjson"})
+        rows = [
+            json.loads(line)
+            for line in b"".join(res.streaming_content).decode().splitlines()
+        ]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        self.assertEqual([row["title"] for row in rows], ["shirt", "pants", "shorts"])
+
+    def test_export_friend_products_as_json_array(self):
+        """Test streaming friend shop products as one JSON array."""
+        friend = models.Shop.objects.create(
+            name="goni store", user=self.user, category=self.cat
+        )
+        models.UserGroup.objects.create(
+            sender=friend, receiver=self.shop, status="accepted"
+        )
+        models.Product.objects.create(
+            title="shirt", shop=friend, price=Decimal("50.5"), quantity=100
+        )
+
+        res = self.client.get(find_product_url, {"export": "json"})
+        rows = json.loads(b"".join(res.streaming_content))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([row["title"] for row in rows], ["shirt"])
+        self.assertEqual(rows[0]["shop"]["name"], "goni store")
+
+    def test_export_rejects_unknown_format(self):
+        """Test asking for an unsupported export format."""
+        res = self.client.get(product_list_url, {"export": "xml"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,179 @@
+"""
+Tests for filtering, sorting and facets of product lists.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+
+PRODUCT_LIST_URL = reverse("store:product_list")
+FIND_PRODUCT_URL = reverse("store:find_product")
+
+
+class ProductFilterTest(TestCase):
+    """Test the query parameters of the product lists."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="test1234"
+        )
+        self.clothes = models.Category.objects.create(title="clothes")
+        self.shoes = models.Category.objects.create(title="shoes")
+        self.shop = models.Shop.objects.create(
+            name="Khan Store", user=self.user, category=self.clothes, default=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_product(self, title, price, quantity=1, shop=None):
+        return models.Product.objects.create(
+            title=title, shop=shop or self.shop, price=Decimal(price), quantity=quantity
+        )
+
+    def titles(self, url=PRODUCT_LIST_URL, **params):
+        res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        return [product["title"] for product in res.data["results"]]
+
+    def test_price_and_stock_filters(self):
+        """Test filtering by price range and stock."""
+        self.create_product("cheap", "5")
+        self.create_product("middle", "50", quantity=0)
+        self.create_product("dear", "500")
+
+        self.assertEqual(self.titles(min_price="10", max_price="100"), ["middle"])
+        self.assertEqual(self.titles(in_stock="true", sort="price"), ["cheap", "dear"])
+        self.assertEqual(self.titles(in_stock="false"), ["middle"])
+
+    def test_sorts_page_through_keyset(self):
+        """Test every sort order pages through all products in order."""
+        for price in ("30", "10", "20", "10"):
+            self.create_product(f"p{price}", price)
+
+        res = self.client.get(PRODUCT_LIST_URL, {"sort": "-price", "page_size": 3})
+        prices = [product["price"] for product in res.data["results"]]
+        res = self.client.get(res.data["next"])
+        prices += [product["price"] for product in res.data["results"]]
+
+        self.assertEqual(prices, ["30.00", "20.00", "10.00", "10.00"])
+        self.assertEqual(self.titles(sort="oldest")[0], "p30")
+
+    def test_created_and_category_filters(self):
+        """Test filtering by creation time, shop and category."""
+        old = self.create_product("old", "1")
+        models.Product.objects.filter(pk=old.pk).update(
+            created_at=timezone.now() - timedelta(days=10)
+        )
+        self.create_product("new", "1")
+        owner = get_user_model().objects.create_user(
+            email="friend@example.com", password="test1234"
+        )
+        friend = models.Shop.objects.create(
+            name="Shoe Shop", user=owner, category=self.shoes
+        )
+        models.UserGroup.objects.create(
+            sender=self.shop, receiver=friend, status="accepted"
+        )
+        self.create_product("boot", "1", shop=friend)
+
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        self.assertEqual(self.titles(created_after=since), ["new"])
+        self.assertEqual(self.titles(created_before=since), ["old"])
+        self.assertEqual(
+            self.titles(FIND_PRODUCT_URL, category=self.shoes.id), ["boot"]
+        )
+        self.assertEqual(self.titles(FIND_PRODUCT_URL, shop=str(friend.uid)), ["boot"])
+        self.assertEqual(self.titles(FIND_PRODUCT_URL, category=self.clothes.id), [])
+
+    def test_invalid_parameters(self):
+        """Test invalid parameters are rejected with a 400."""
+        for params in (
+            {"min_price": "abc"},
+            {"min_price": "10", "max_price": "5"},
+            {"sort": "random"},
+            {"shop": "not-a-uid"},
+        ):
+            with self.subTest(params):
+                res = self.client.get(PRODUCT_LIST_URL, params)
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_facets(self):
+        """Test facet counts come from one grouped query over the filters."""
+        self.create_product("a", "5")
+        self.create_product("b", "15")
+        self.create_product("c", "15")
+        self.create_product("d", "2000", quantity=0)
+
+        with CaptureQueriesContext(connection) as captured:
+            res = self.client.get(
+                PRODUCT_LIST_URL, {"facets": "true", "in_stock": "true"}
+            )
+        facets = res.data["facets"]
+
+        self.assertEqual(
+            facets["category"],
+            [{"id": self.clothes.id, "title": "clothes", "count": 3}],
+        )
+        counts = {str(bucket["min"]): bucket["count"] for bucket in facets["price"]}
+        self.assertEqual(counts["0"], 1)
+        self.assertEqual(counts["10"], 2)
+        self.assertEqual(counts["1000"], 0)
+        self.assertIsNone(facets["price"][-1]["max"])
+        self.assertEqual(
+            len([q for q in captured if "GROUP BY" in q["sql"]]), 1
+        )
+
+    def test_no_facets_by_default(self):
+        """Test facets are only computed when asked for."""
+        res = self.client.get(PRODUCT_LIST_URL)
+
+        self.assertNotIn("facets", res.data)
+
+    def walk(self, url, params):
+        """Return the ids of every page of `url`, forward then backward."""
+        res = self.client.get(url, params)
+        forward = [[product["slug"] for product in res.data["results"]]]
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            forward.append([product["slug"] for product in res.data["results"]])
+        backward = []
+        while res.data["previous"]:
+            res = self.client.get(res.data["previous"])
+            backward.append([product["slug"] for product in res.data["results"]])
+        return forward, backward
+
+    def test_fan_out_pages_match_single_query(self):
+        """Test paging shop by shop returns the pages of one query."""
+        owner = get_user_model().objects.create_user(
+            email="friend@example.com", password="test1234"
+        )
+        for number in range(3):
+            friend = models.Shop.objects.create(
+                name=f"Friend {number}", user=owner, category=self.clothes
+            )
+            models.UserGroup.objects.create(
+                sender=self.shop, receiver=friend, status="accepted"
+            )
+            for price in range(number, 7, 2):
+                self.create_product(f"p{price}", str(price), shop=friend)
+
+        for sort in ("newest", "oldest", "price", "-price"):
+            params = {"sort": sort, "page_size": 2, "min_price": "1"}
+            with self.subTest(sort=sort):
+                expected = self.walk(FIND_PRODUCT_URL, params)
+                with self.settings(
+                    FANOUT_MAX_WORKERS=0, FIND_PRODUCT_FANOUT_MIN_SHOPS=3
+                ), CaptureQueriesContext(connection) as captured:
+                    self.assertEqual(self.walk(FIND_PRODUCT_URL, params), expected)
+                self.assertTrue(
+                    any('."shop_id" = ' in q["sql"] for q in captured), captured
+                )
@@ -0,0 +1,122 @@
+"""
+Tests for the bulk product import API.
+"""
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models, search
+
+IMPORT_URL = reverse("store:product_import")
+
+
+class ProductImportAPITest(TestCase):
+    """Test importing catalogs into the logged in shop."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="test1234"
+        )
+        self.shop = models.Shop.objects.create(
+            name="Khan Store", user=self.user, default=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def post(self, body, content_type="text/csv"):
+        return self.client.generic("POST", IMPORT_URL, body, content_type=content_type)
+
+    def test_csv_upsert(self):
+        """Test rows are created and later updated by their SKU."""
+        res = self.post(
+            "external_sku,title,price,quantity\n"
+            "A1,Blue shirt,10.50,3\n"
+            'A2,"Jeans, slim",20,0\n'
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["created"], 2)
+        shirt = models.Product.objects.get(shop=self.shop, external_sku="A1")
+        self.assertEqual(shirt.slug, "blue-shirt")
+
+        res = self.post("external_sku,title,price,quantity\nA1,Red shirt,12,5\n")
+
+        self.assertEqual((res.data["created"], res.data["updated"]), (0, 1))
+        shirt.refresh_from_db()
+        self.assertEqual(
+            (shirt.title, shirt.price, shirt.quantity, shirt.slug),
+            ("Red shirt", Decimal("12.00"), 5, "blue-shirt"),
+        )
+        self.assertEqual(models.Product.objects.count(), 2)
+
+    def test_row_errors_are_reported(self):
+        """Test invalid rows are skipped and reported with their row number."""
+        res = self.post(
+            "external_sku,title,price,quantity\n"
+            "A1,Shirt,abc,1\n"
+            "A2,Jeans,5,-1\n"
+            "A3,Socks,1,1\n"
+        )
+
+        self.assertEqual(res.data["created"], 1)
+        self.assertEqual(res.data["error_count"], 2)
+        self.assertEqual([error["row"] for error in res.data["errors"]], [2, 3])
+        self.assertIn("price", res.data["errors"][0]["errors"])
+        self.assertIn("quantity", res.data["errors"][1]["errors"])
+
+    @override_settings(IMPORT_CHUNK_SIZE=2)
+    def test_ndjson_in_chunks(self):
+        """Test NDJSON rows are imported across chunks, later rows winning."""
+        rows = [
+            {"external_sku": f"S{number}", "title": "Hat", "price": 1, "quantity": 1}
+            for number in range(5)
+        ]
+        rows.append({"external_sku": "S0", "title": "Cap", "price": 2, "quantity": 1})
+        body = "\n".join(json.dumps(row) for row in rows) + "\nnot json\n[1]\n"
+
+        res = self.post(body, "application/x-ndjson")
+
+        self.assertEqual(res.data["created"], 5)
+        self.assertEqual(res.data["updated"], 1)
+        self.assertEqual([error["row"] for error in res.data["errors"]], [7, 8])
+        cap = models.Product.objects.get(external_sku="S0")
+        self.assertEqual(cap.title, "Cap")
+
+    def test_imported_products_are_searchable(self):
+        """Test imported rows are added to the search index."""
+        self.post("external_sku,title,price,quantity\nA1,Wool scarf,10,3\n")
+
+        ids = search.search_product_ids("scarf")
+        self.assertEqual(ids, [models.Product.objects.get(external_sku="A1").id])
+
+    def test_sku_is_per_shop(self):
+        """Test the same SKU in another shop is a different product."""
+        other = models.Shop.objects.create(name="Other", user=self.user)
+        models.Product.objects.create(
+            title="Shirt", shop=other, price=1, quantity=1, external_sku="A1"
+        )
+
+        res = self.post("external_sku,title,price,quantity\nA1,Shirt,1,1\n")
+
+        self.assertEqual(res.data["created"], 1)
+        self.assertEqual(models.Product.objects.filter(external_sku="A1").count(), 2)
+
+    def test_content_type_parameters(self):
+        """Test a charset parameter does not hide the media type."""
+        res = self.post(
+            "external_sku,title,price,quantity\nA1,Shirt,10,1\n",
+            "text/csv; charset=utf-8",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["created"], 1)
+
+    def test_unsupported_content_type(self):
+        """Test other formats are rejected."""
+        res = self.post("{}", "application/json")
+
+        self.assertEqual(res.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
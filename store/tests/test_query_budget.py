@@ -0,0 +1,104 @@
+"""
+Tests the number of queries run by the list endpoints.
+"""
+from decimal import Decimal
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import models
+from core.tests.utils import QueryBudgetMixin
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    """Test list endpoints do not query once per row."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="test1234"
+        )
+        self.cat = models.Category.objects.create(title="clothes")
+        self.shop = models.Shop.objects.create(
+            name="Khan Store", user=self.user, category=self.cat, default=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.sequence = count()
+
+    def create_shops(self, size, **group):
+        shops = []
+        for _ in range(size):
+            number = next(self.sequence)
+            owner = get_user_model().objects.create_user(
+                email=f"owner{number}@example.com", password="test1234"
+            )
+            shop = models.Shop.objects.create(
+                name=f"shop{number}", user=owner, category=self.cat
+            )
+            if group:
+                models.UserGroup.objects.create(
+                    sender=group.get("sender", shop),
+                    receiver=group.get("receiver", shop),
+                    status=group["status"],
+                )
+            shops.append(shop)
+        return shops
+
+    def create_friend_products(self, size):
+        for shop in self.create_shops(size, receiver=self.shop, status="accepted"):
+            models.Product.objects.create(
+                title="shirt", shop=shop, price=Decimal("50.5"), quantity=100
+            )
+
+    def test_product_lists(self):
+        """Test the product lists run a fixed number of queries."""
+
+        def add_products(size):
+            for _ in range(size):
+                models.Product.objects.create(
+                    title="shirt", shop=self.shop, price=Decimal("50.5"), quantity=100
+                )
+
+        # The shop, the conditional GET probe and the page.
+        self.assertQueryBudget(3, reverse("store:product_list"), add_products)
+        self.assertQueryBudget(
+            3, reverse("store:find_product"), self.create_friend_products
+        )
+
+    def test_shop_lists(self):
+        """Test the shop lists run a fixed number of queries."""
+        self.assertQueryBudget(3, reverse("store:find_shop"), self.create_shops)
+        self.assertQueryBudget(
+            3,
+            reverse("store:my_friends"),
+            lambda size: self.create_shops(
+                size, sender=self.shop, status="accepted"
+            ),
+        )
+        self.assertQueryBudget(
+            3,
+            reverse("store:my_requests"),
+            lambda size: self.create_shops(size, sender=self.shop, status="pending"),
+        )
+        self.assertQueryBudget(
+            2,
+            reverse("store:request_list"),
+            lambda size: self.create_shops(size, receiver=self.shop, status="pending"),
+        )
+
+    def test_cart_list(self):
+        """Test the cart list runs a fixed number of queries."""
+        product = models.Product.objects.create(
+            title="shirt", shop=self.shop, price=Decimal("50.5"), quantity=100
+        )
+
+        def add_items(size):
+            for _ in range(size):
+                models.OrderItems.objects.create(
+                    user=self.user, shop=self.shop, product=product
+                )
+
+        self.assertQueryBudget(2, reverse("order:orderItem_list"), add_items)
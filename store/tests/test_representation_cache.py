@@ -0,0 +1,105 @@
+"""
+Tests for the cached product and shop representations.
+"""
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase
+from django.urls import reverse
+
+from core import models
+from core.cache import RepresentationCache
+from rest_framework.test import APIClient
+from store import serializers
+
+product_list_url = reverse("store:product_list")
+cart_url = reverse("order:orderItem_list")
+
+
+class RepresentationCacheTest(TestCase):
+    """Test serving product lists from cached fragments."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="test1234"
+        )
+        self.shop = models.Shop.objects.create(
+            name="Khan Store", user=self.user, default=True
+        )
+        self.product = models.Product.objects.create(
+            title="shirt", shop=self.shop, price=Decimal("50.5"), quantity=100
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_shared_tier_is_read_with_one_multi_get(self):
+        """Test a cold process fills its local tier from the shared one."""
+        shared = LocMemCache("test-representations", {})
+        cache = RepresentationCache("test", serializers.ShopSerializer, shared=shared)
+        other = models.Shop.objects.create(name="Goni Store", user=self.user)
+        cache.get_many([self.shop, other])
+        cache.clear_local()
+
+        with mock.patch.object(shared, "get_many", wraps=shared.get_many) as get_many:
+            with mock.patch.object(serializers.ShopSerializer, "to_representation") as render:
+                data = cache.get_many([self.shop, other])
+
+        get_many.assert_called_once()
+        render.assert_not_called()
+        self.assertEqual([shop["name"] for shop in data], ["Khan Store", "Goni Store"])
+
+    def test_list_is_served_from_cache(self):
+        """Test a repeated list request does not serialize products again."""
+        self.client.get(product_list_url)
+
+        with mock.patch.object(
+            serializers.ProductFieldsSerializer, "to_representation"
+        ) as render:
+            res = self.client.get(product_list_url)
+
+        render.assert_not_called()
+        self.assertEqual(res.data["results"][0]["title"], "shirt")
+        self.assertEqual(res.data["results"][0]["shop"]["name"], "Khan Store")
+
+    def test_changes_are_visible_immediately(self):
+        """Test saving a product, its shop or the owner refreshes the list."""
+        self.client.get(product_list_url)
+
+        self.product.title = "pant"
+        self.product.save()
+        self.shop.name = "Goni Store"
+        self.shop.save()
+        self.user.email = "owner@example.com"
+        self.user.save()
+
+        product = self.client.get(product_list_url).data["results"][0]
+        self.assertEqual(product["title"], "pant")
+        self.assertEqual(product["shop"]["name"], "Goni Store")
+        self.assertEqual(product["shop"]["user"], "owner@example.com")
+
+    def test_stock_changes_are_visible_immediately(self):
+        """Test reserving stock refreshes the product detail and list."""
+        detail_url = reverse("store:product_detail", args=[self.product.slug])
+        self.client.get(detail_url)
+        self.client.get(product_list_url)
+
+        res = self.client.post(cart_url, {"product": self.product.id, "quantity": 3})
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(self.client.get(detail_url).data["quantity"], 97)
+        product = self.client.get(product_list_url).data["results"][0]
+        self.assertEqual(product["quantity"], 97)
+
+    def test_exports_skip_the_cache(self):
+        """Test streaming an export neither reads nor fills the cache."""
+        product_cache = mock.patch.object(serializers.product_cache, "get_many")
+        shop_cache = mock.patch.object(serializers.shop_cache, "get_many")
+        with product_cache as products, shop_cache as shops:
+            res = self.client.get(product_list_url, {"export": "ndjson"})
+            rows = b"".join(res.streaming_content).splitlines()
+
+        self.assertEqual(len(rows), 1)
+        products.assert_not_called()
+        shops.assert_not_called()
@@ -0,0 +1,129 @@
+"""
+Tests for the product search API.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models, search
+
+SEARCH_URL = reverse("store:search_product")
+
+
+class ProductSearchAPITest(TestCase):
+    """Test searching products of friend shops."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="test1234"
+        )
+        self.cat = models.Category.objects.create(title="clothes")
+        self.shop = models.Shop.objects.create(
+            name="Khan Store", user=self.user, category=self.cat, default=True
+        )
+        owner = get_user_model().objects.create_user(
+            email="friend@example.com", password="test1234"
+        )
+        self.friend = models.Shop.objects.create(
+            name="Denim House", user=owner, category=self.cat
+        )
+        models.UserGroup.objects.create(
+            sender=self.shop, receiver=self.friend, status="accepted"
+        )
+        stranger = get_user_model().objects.create_user(
+            email="stranger@example.com", password="test1234"
+        )
+        self.stranger = models.Shop.objects.create(name="Far Away", user=stranger)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_product(self, title, shop=None):
+        return models.Product.objects.create(
+            title=title, shop=shop or self.friend, price=Decimal("10"), quantity=1
+        )
+
+    def titles(self, **params):
+        res = self.client.get(SEARCH_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [product["title"] for product in res.data["results"]]
+
+    def test_prefix_match_ranks_title_first(self):
+        """Test terms match as prefixes and title hits rank above the rest."""
+        self.create_product("Blue shirt")
+        self.create_product("Denim jacket")
+        self.create_product("Black shoes")
+
+        self.assertEqual(self.titles(q="sh"), ["Blue shirt", "Black shoes"])
+        # "denim" is in every shop name, but only one title.
+        self.assertEqual(self.titles(q="denim")[0], "Denim jacket")
+        self.assertEqual(self.titles(q="blu shi"), ["Blue shirt"])
+
+    def test_search_shop_and_category(self):
+        """Test products are found by their shop name and category."""
+        self.create_product("Jeans")
+
+        self.assertEqual(self.titles(q="house"), ["Jeans"])
+        self.assertEqual(self.titles(q="cloth"), ["Jeans"])
+
+    def test_scope(self):
+        """Test only friend shops are searched unless scope=all."""
+        self.create_product("Red shirt")
+        self.create_product("Green shirt", shop=self.stranger)
+
+        self.assertEqual(self.titles(q="shirt"), ["Red shirt"])
+        self.assertEqual(len(self.titles(q="shirt", scope="all")), 2)
+        res = self.client.get(SEARCH_URL, {"q": "shirt", "scope": "mine"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_index_follows_changes(self):
+        """Test edits, renames and deletes are reflected in the index."""
+        product = self.create_product("Shirt")
+        product.title = "Sweater"
+        product.save()
+        self.assertEqual(self.titles(q="shirt"), [])
+        self.assertEqual(self.titles(q="sweat"), ["Sweater"])
+
+        self.friend.name = "Wool World"
+        self.friend.save()
+        self.assertEqual(self.titles(q="wool"), ["Sweater"])
+
+        self.cat.title = "knitwear"
+        self.cat.save()
+        self.assertEqual(self.titles(q="knit"), ["Sweater"])
+
+        product.delete()
+        self.assertEqual(self.titles(q="sweat"), [])
+
+    def test_pagination(self):
+        """Test results are paged by offset."""
+        for number in range(5):
+            self.create_product(f"Shirt {number}")
+
+        res = self.client.get(SEARCH_URL, {"q": "shirt", "limit": 2})
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertIsNone(res.data["previous"])
+
+        seen = [product["slug"] for product in res.data["results"]]
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            seen += [product["slug"] for product in res.data["results"]]
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_query_syntax_is_not_parsed(self):
+        """Test search operators in the input are treated as words."""
+        self.create_product("Shirt")
+
+        self.assertEqual(self.titles(q='shirt" OR "x'), [])
+        self.assertEqual(self.titles(q="NEAR(shirt)"), [])
+        self.assertEqual(self.titles(q="   "), [])
+
+    def test_rebuild(self):
+        """Test the index can be rebuilt from the tables."""
+        self.create_product("Shirt")
+        search.rebuild()
+
+        self.assertEqual(self.titles(q="shirt"), ["Shirt"])
@@ -1,7 +1,8 @@
 """
 Tests shop api.
 """
-from django.test import TestCase
+from django.core.cache import caches
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from core import models
@@ -127,7 +128,7 @@ class ShopApiTest(TestCase):
         res = self.client.get(find_shop_url)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 4)
+        self.assertEqual(len(res.data["results"]), 4)
 
     def test_login_to_shop(self):
         """Test login to a shop."""
@@ -184,7 +185,7 @@ class ShopApiTest(TestCase):
 
         res = self.client.get(request_url)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 2)
+        self.assertEqual(len(res.data["results"]), 2)
 
     def test_showing_request_details(self):
         """Test the details of a request."""
@@ -238,7 +239,7 @@ class ShopApiTest(TestCase):
         
         res = self.client.get(my_friends_url)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data),3)
+        self.assertEqual(len(res.data["results"]),3)
         
     def test_show_my_requests(self):
         """Test showing all request send by logged in user."""
@@ -253,4 +254,84 @@ class ShopApiTest(TestCase):
         
         res = self.client.get(my_requests_url)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data),3)
\ No newline at end of file
+        self.assertEqual(len(res.data["results"]),3)
+
+    def test_friend_shop_list_query_count_is_constant(self):
+        """Test the friend list does not query once per connection."""
+        shop = models.Shop.objects.create(
+            user=self.user, category=self.cat, name="testshop", default=True
+        )
+        for index in range(5):
+            test_user = create_user(
+                email=f"friend{index}@example.com", password="testpassword"
+            )
+            friend = models.Shop.objects.create(
+                user=test_user, category=self.cat, name=f"friend{index}"
+            )
+            if index % 2:
+                models.UserGroup.objects.create(
+                    sender=shop, receiver=friend, status="accepted"
+                )
+            else:
+                models.UserGroup.objects.create(
+                    sender=friend, receiver=shop, status="accepted"
+                )
+
+        # The shop, the conditional GET probe and the page.
+        with self.assertNumQueries(3):
+            res = self.client.get(my_friends_url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(shop["name"] for shop in res.data["results"]),
+            [f"friend{index}" for index in range(5)],
+        )
+
+    @override_settings(
+        CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            "shared": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "shared",
+            },
+        },
+        CURRENT_SHOP_CACHE_ALIAS="shared",
+    )
+    def test_logged_in_shop_is_cached_in_the_configured_cache(self):
+        """Test the default shop is kept in and dropped from the shared cache."""
+        shop1 = models.Shop.objects.create(
+            name="shop1", user=self.user, category=self.cat, default=True
+        )
+        shop2 = models.Shop.objects.create(
+            name="shop2", user=self.user, category=self.cat
+        )
+        key = models.Shop.objects.default_cache_key(self.user.pk)
+        for alias in ("default", "shared"):
+            caches[alias].clear()
+        self.client.get(my_requests_url)
+        self.assertEqual(caches["shared"].get(key), shop1)
+        self.assertIsNone(caches["default"].get(key))
+
+        self.client.patch(shop_login_url(shop2.uid))
+
+        self.assertIsNone(caches["shared"].get(key))
+        self.assertEqual(models.Shop.objects.get_default(self.user), shop2)
+
+    def test_logged_in_shop_is_cached_between_requests(self):
+        """Test the default shop is loaded once and reloaded after login."""
+        shop1 = models.Shop.objects.create(
+            name="shop1", user=self.user, category=self.cat, default=True
+        )
+        shop2 = models.Shop.objects.create(
+            name="shop2", user=self.user, category=self.cat
+        )
+        self.client.get(my_requests_url)
+
+        # The conditional GET probe and the page, but not the shop.
+        with self.assertNumQueries(2):
+            self.client.get(my_requests_url)
+        self.assertEqual(models.Shop.objects.get_default(self.user), shop1)
+
+        self.client.patch(shop_login_url(shop2.uid))
+
+        self.assertEqual(models.Shop.objects.get_default(self.user), shop2)
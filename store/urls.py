@@ -1,6 +1,6 @@
 """URL mapping for category API."""
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = "store"
 
@@ -24,12 +24,33 @@ urlpatterns = [
         name="request_detail",
     ),
     path("product-list/", views.ProductListAV.as_view(), name="product_list"),
+    path("product-import/", views.ProductImportAV.as_view(), name="product_import"),
     path(
         "product-detail/<str:slug>/",
         views.ProductDetailAV.as_view(),
         name="product_detail",
     ),
     path("find-product/", views.FindProductAV.as_view(), name="find_product"),
+    path("search-product/", views.ProductSearchAV.as_view(), name="search_product"),
     path("friend-shop-list/", views.MyFriendListAV.as_view(), name="my_friends"),
     path("my-requests/", views.MyRequestsListAV.as_view(), name="my_requests"),
+    # Async variants of the read-heavy lists, for ASGI deployments.
+    path(
+        "async/product-list/",
+        async_views.ProductListView.as_view(),
+        name="async_product_list",
+    ),
+    path(
+        "async/find-product/",
+        async_views.FindProductView.as_view(),
+        name="async_find_product",
+    ),
+    path(
+        "async/friend-shop-list/",
+        async_views.FriendShopListView.as_view(),
+        name="async_my_friends",
+    ),
+    path(
+        "async/find-shop/", async_views.FindShopView.as_view(), name="async_find_shop"
+    ),
 ]
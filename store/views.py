@@ -4,11 +4,34 @@ from rest_framework import permissions
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from core import models
+from django.conf import settings
+from django.db import transaction
+from django.utils.http import parse_header_parameters
+from core import models, search
+from core.conditional import conditional_detail, conditional_list
+from core.pagination import RankedPagination, paginate, paginate_shards
+from core.routers import read_replica
+from core.serializers import eager_load
+from core.streaming import export_format, stream_queryset
 from . import serializers
-from django.db.models import Q, F
+from .filters import ProductFilter
+from .importer import IMPORT_FORMATS, ProductImport
 from drf_spectacular.utils import extend_schema
 
+# Related rows embedded in the representations, for conditional GET.
+SHOP_RELATED = ("user",)
+PRODUCT_RELATED = ("shop", "shop__user")
+
+
+def list_shops(request, shops, view=None):
+    """Page `shops`, or answer 304 if the client has the current list."""
+    return conditional_list(
+        request,
+        shops,
+        lambda: paginate(request, shops, serializers.ShopSerializer, view),
+        related=SHOP_RELATED,
+    )
+
 
 class CategoryView(APIView):
     """View for getting category list and post a new category."""
@@ -16,10 +39,14 @@ class CategoryView(APIView):
     permission_classes = [permissions.IsAdminUser]
     serializer_classes = [serializers.CategorySerializer]
 
+    @read_replica
     def get(self, request):
         categories = models.Category.objects.all()
-        serializer = serializers.CategorySerializer(categories, many=True)
-        return Response(serializer.data)
+        return conditional_list(
+            request,
+            categories,
+            lambda: paginate(request, categories, serializers.CategorySerializer, self),
+        )
 
     @extend_schema(
         request=serializers.ProductSerializer,
@@ -43,8 +70,11 @@ class CategoryDetailView(APIView):
 
     def get(self, request, uid):
         category = models.Category.objects.get(uid=uid)
-        serializer = serializers.CategorySerializer(category)
-        return Response(serializer.data)
+        return conditional_detail(
+            request,
+            category,
+            lambda: Response(serializers.CategorySerializer(category).data),
+        )
 
     @extend_schema(
         request=serializers.ProductSerializer,
@@ -78,9 +108,8 @@ class ShopListAV(APIView):
 
     def get(self, request):
         """Getting all shop and return list of shop."""
-        shops = models.Shop.objects.filter(user=request.user)
-        serializer = serializers.ShopSerializer(shops, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        shops = models.Shop.objects.filter(user_id=request.user.pk)
+        return list_shops(request, shops, self)
 
     @extend_schema(
         request=serializers.ProductSerializer,
@@ -91,11 +120,13 @@ class ShopListAV(APIView):
         """Post a new shop."""
         serializer = serializers.ShopSerializer(data=request.data)
         if serializer.is_valid():
-            models.Shop.objects.filter(user=request.user).update(default=False)
             validated_data = serializer.validated_data
             validated_data["user"] = request.user
             validated_data["default"] = True
-            serializer.create(validated_data)
+            with transaction.atomic():
+                models.Shop.objects.filter(user=request.user).update(default=False)
+                models.Shop.objects.forget_default(request.user.pk)
+                serializer.create(validated_data)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -108,9 +139,15 @@ class ShopDetailAV(APIView):
 
     def get(self, request, uid):
         """Get a single item details."""
-        shop = models.Shop.objects.get(uid=uid)
-        serializer = serializers.ShopSerializer(shop)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        shop = eager_load(models.Shop.objects, serializers.ShopSerializer).get(uid=uid)
+        return conditional_detail(
+            request,
+            shop,
+            lambda: Response(
+                serializers.ShopSerializer(shop).data, status=status.HTTP_200_OK
+            ),
+            related=SHOP_RELATED,
+        )
 
     @extend_schema(
         request=serializers.ProductSerializer,
@@ -163,21 +200,23 @@ class ShopDetailAV(APIView):
 )
 def shop_login(request, uid):
     """Login to a shop."""
-    request.user.shop_set.filter().update(default=False)
     shop = models.Shop.objects.get(uid=uid)
-    shop.default = True
-    shop.save()
+    with transaction.atomic():
+        request.user.shop_set.filter().update(default=False)
+        models.Shop.objects.forget_default(request.user.pk)
+        shop.default = True
+        shop.save()
     return Response(status=status.HTTP_200_OK)
 
 
 @api_view(["GET"])
 @permission_classes([permissions.IsAuthenticated])
+@read_replica
 def shop_list(request):
     """Getting all the shops with the same category."""
-    shop = models.Shop.objects.get(user=request.user, default=True)
-    shops = models.Shop.objects.filter(category=shop.category)
-    serializer = serializers.ShopSerializer(shops, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    shop = request.shop
+    shops = models.Shop.objects.filter(category_id=shop.category_id)
+    return list_shops(request, shops)
 
 
 class GroupingRequestListAV(APIView):
@@ -187,13 +226,11 @@ class GroupingRequestListAV(APIView):
 
     def get(self, request):
         """Getting all the lists."""
-        loged_in_shop = models.Shop.objects.get(user=request.user, default=True)
+        loged_in_shop = request.shop
         requests = models.UserGroup.objects.filter(
             receiver=loged_in_shop, status="pending"
         )
-        serializer = serializers.GroupingSerializer(requests, many=True)
-
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return paginate(request, requests, serializers.GroupingSerializer, self)
 
     @extend_schema(
         request=serializers.ProductSerializer,
@@ -206,9 +243,7 @@ class GroupingRequestListAV(APIView):
 
         if serializer.is_valid():
             validated_data = serializer.validated_data
-            validated_data["sender"] = models.Shop.objects.get(
-                user=request.user, default=True
-            )
+            validated_data["sender"] = request.shop
             validated_data["status"] = "pending"
             serializer.create(validated_data)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -223,7 +258,9 @@ class GroupingRequestDetailAV(APIView):
 
     def get(self, request, uid):
         """Get a single request detail."""
-        G_request = models.UserGroup.objects.get(uid=uid)
+        G_request = eager_load(
+            models.UserGroup.objects, serializers.GroupingSerializer
+        ).get(uid=uid)
         serializer = serializers.GroupingSerializer(G_request)
 
         return Response(serializer.data)
@@ -240,7 +277,8 @@ class GroupingRequestDetailAV(APIView):
             G_request, data=request.data, partial=True
         )
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -261,40 +299,63 @@ class MyFriendListAV(APIView):
     """Get a list of connected shops."""
 
     def get(self, request):
-        loged_in_shop = models.Shop.objects.get(user=request.user, default=True)
-        groups = models.UserGroup.objects.filter(
-            (Q(sender=loged_in_shop) | Q(receiver=loged_in_shop)) & Q(status="accepted")
-        )
-        shops = [
-            group.sender if group.sender != loged_in_shop else group.receiver
-            for group in groups
-        ]
-        serializer = serializers.ShopSerializer(shops, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        loged_in_shop = request.shop
+        shops = models.ShopConnection.objects.friends_of(loged_in_shop)
+        return list_shops(request, shops, self)
 
 
 class MyRequestsListAV(APIView):
     """Get list of requests send by logged in user."""
 
     def get(self, request):
-        loged_in_shop = models.Shop.objects.get(user=request.user, default=True)
-        groups = models.UserGroup.objects.filter(sender=loged_in_shop, status="pending")
-        shops = [group.receiver for group in groups]
-        serializer = serializers.ShopSerializer(shops, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        loged_in_shop = request.shop
+        shops = models.Shop.objects.filter(
+            receivers__sender=loged_in_shop, receivers__status="pending"
+        )
+        return list_shops(request, shops, self)
+
+
+class ProductListMixin:
+    """List products with the filters, sorts and facets of store.filters."""
+
+    def list_products(self, request, products):
+        """Filter, sort and page `products` as asked in the query string."""
+        product_filter = ProductFilter(request)
+        products = product_filter.filter(products)
+        fmt = export_format(request)
+        if fmt:
+            # Exports run oldest first unless a sort is asked for.
+            products = products.order_by(*product_filter.get_ordering("oldest"))
+            return stream_queryset(products, serializers.ProductSerializer, fmt)
+        self.ordering = product_filter.get_ordering()
+        related = PRODUCT_RELATED
+        if product_filter.params["facets"]:
+            related += ("shop__category",)
+
+        def respond():
+            response = self.paginate_products(request, products)
+            facets = product_filter.facets(products)
+            if facets is not None:
+                response.data["facets"] = facets
+            return response
+
+        return conditional_list(request, products, respond, related=related)
+
+    def paginate_products(self, request, products):
+        return paginate(request, products, serializers.ProductSerializer, self)
 
 
-class ProductListAV(APIView):
+class ProductListAV(ProductListMixin, APIView):
     """API view for product list."""
 
     perimission_classes = [permissions.IsAuthenticated]
 
+    @read_replica
     def get(self, request):
         """Showing all products of a shop."""
-        loged_in_shop = models.Shop.objects.get(user=request.user, default=True)
+        loged_in_shop = request.shop
         products = models.Product.objects.filter(shop=loged_in_shop)
-        serializer = serializers.ProductSerializer(products, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self.list_products(request, products)
 
     @extend_schema(
         request=serializers.ProductSerializer,
@@ -307,15 +368,36 @@ class ProductListAV(APIView):
 
         if serializer.is_valid():
             validated_data = serializer.validated_data
-            validated_data["shop"] = models.Shop.objects.get(
-                user=request.user, default=True
-            )
+            validated_data["shop"] = request.shop
             serializer.create(validated_data)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class ProductImportAV(APIView):
+    """Create or update many products of the logged in shop at once."""
+
+    perimission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        """Import a CSV or NDJSON catalog, keyed by external_sku."""
+        media_type, _ = parse_header_parameters(request.content_type)
+        fmt = IMPORT_FORMATS.get(media_type)
+        if fmt is None:
+            return Response(
+                {"detail": f"Send one of {', '.join(IMPORT_FORMATS)}."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+        if request.stream is None:
+            return Response(
+                {"detail": "The catalog is empty."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        report = ProductImport(request.shop).run(request.stream, fmt)
+        return Response(report, status=status.HTTP_200_OK)
+
+
 class ProductDetailAV(APIView):
     """Getting single product detail."""
 
@@ -323,9 +405,17 @@ class ProductDetailAV(APIView):
 
     def get(self, request, slug):
         """Get single product details."""
-        product = models.Product.objects.get(slug=slug)
-        serializer = serializers.ProductSerializer(product)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        product = eager_load(
+            models.Product.objects, serializers.ProductSerializer
+        ).get(slug=slug)
+        return conditional_detail(
+            request,
+            product,
+            lambda: Response(
+                serializers.ProductSerializer(product).data, status=status.HTTP_200_OK
+            ),
+            related=PRODUCT_RELATED,
+        )
 
     @extend_schema(
         request=serializers.ProductSerializer,
@@ -356,32 +446,64 @@ class ProductDetailAV(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class FindProductAV(APIView):
+class FindProductAV(ProductListMixin, APIView):
     """Find all the product form friend shop.."""
 
     perimission_classes = [permissions.IsAuthenticated]
 
+    @read_replica
     def get(self, request):
         """Get the product form friend shop"""
-        loged_in_shop = models.Shop.objects.get(user=request.user, default=True)
-        groups = models.UserGroup.objects.filter(
-            (Q(sender=loged_in_shop) | Q(receiver=loged_in_shop)) & Q(status="accepted")
+        loged_in_shop = request.shop
+        product = models.Product.objects.filter(
+            shop__in=models.ShopConnection.objects.friend_ids(loged_in_shop)
+        )
+        return self.list_products(request, product)
+
+    def paginate_products(self, request, products):
+        """Page the products of many friend shops shop by shop, concurrently."""
+        if settings.FIND_PRODUCT_FANOUT_MIN_SHOPS is None:
+            return super().paginate_products(request, products)
+        shop_ids = list(
+            models.ShopConnection.objects.friend_ids(request.shop).values_list(
+                "friend", flat=True
+            )
+        )
+        if len(shop_ids) < settings.FIND_PRODUCT_FANOUT_MIN_SHOPS:
+            return super().paginate_products(request, products)
+        shards = {shop_id: products.filter(shop_id=shop_id) for shop_id in shop_ids}
+        return paginate_shards(request, shards, serializers.ProductSerializer, self)
+
+
+class ProductSearchAV(APIView):
+    """Search products by title, shop name and category."""
+
+    perimission_classes = [permissions.IsAuthenticated]
+    scopes = ("friends", "all")
+
+    def get(self, request):
+        """Get the products matching ?q=, best match first."""
+        scope = request.query_params.get("scope", "friends")
+        if scope not in self.scopes:
+            return Response(
+                {"scope": f"Choose one of {', '.join(self.scopes)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        shop_ids = None
+        if scope == "friends":
+            shop_ids = models.ShopConnection.objects.friend_ids(request.shop)
+        text = request.query_params.get("q", "")
+        paginator = RankedPagination()
+        ids = paginator.paginate_ranked(
+            lambda limit, offset: search.search_product_ids(
+                text, shop_ids, limit, offset
+            ),
+            request,
+        )
+        products = eager_load(
+            models.Product.objects, serializers.ProductSerializer
+        ).in_bulk(ids)
+        serializer = serializers.ProductSerializer(
+            [products[pk] for pk in ids if pk in products], many=True
         )
-        shops = [
-            group.sender if group.sender != loged_in_shop else group.receiver
-            for group in groups
-        ]
-        product = models.Product.objects.filter(shop__in=shops)
-        # groups = models.UserGroup.objects.filter(
-        #     Q(sender=loged_in_shop) | Q(receiver=loged_in_shop),
-        #     status='accepted'
-        # )
-
-        # product = models.Product.objects.filter(
-        #     shop__in=groups.annotate(
-        #         shop=F('sender') if F('sender') != loged_in_shop else F('receiver')
-        #     ).values('shop')
-        # )
-        serializer = serializers.ProductSerializer(product, many=True)
-
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return paginator.get_paginated_response(serializer.data)
@@ -5,13 +5,18 @@ from django.contrib.auth import (
     get_user_model,
     authenticate,
 )
+from django.utils import timezone
 from django.utils.translation import gettext as _
 
 from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.tokens import RefreshToken
 
 from django.contrib.auth.hashers import make_password
 from store.serializers import CategorySerializer
 from core import models
+from core.authentication import ISSUED_AT_CLAIM, revocations
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -41,3 +46,23 @@ class UserSerializer(serializers.ModelSerializer):
 
         return user
 
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    """Serializer for logging in, with the claims read paths trust."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[ISSUED_AT_CLAIM] = timezone.now().timestamp()
+        token["is_staff"] = user.is_staff
+        token["is_superuser"] = user.is_superuser
+        return token
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    """Serializer for refreshing an access token, unless it was revoked."""
+
+    def validate(self, attrs):
+        if revocations.is_revoked(RefreshToken(attrs["refresh"])):
+            raise InvalidToken(_("Token has been revoked"))
+        return super().validate(attrs)
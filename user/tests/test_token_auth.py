@@ -0,0 +1,141 @@
+"""
+Tests for JWT login and stateless authentication.
+"""
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core import models
+from core.authentication import revocations
+
+TOKEN_URL = reverse("user:token_obtain_pair")
+REFRESH_URL = reverse("user:token_refresh")
+ME_URL = reverse("user:me")
+SHOP_LIST_URL = reverse("store:shop_list")
+CATEGORY_URL = reverse("store:category_list")
+
+
+class TokenAuthTest(TestCase):
+    """Test tokens carry claims that read requests trust."""
+
+    def setUp(self):
+        revocations.invalidate()
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="test1234", is_staff=True
+        )
+        self.shop = models.Shop.objects.create(
+            name="Khan Store", user=self.user, default=True
+        )
+        self.client = APIClient()
+        res = self.client.post(
+            TOKEN_URL, {"email": "test@example.com", "password": "test1234"}
+        )
+        self.tokens = res.data
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {res.data['access']}")
+
+    def user_queries(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as captured:
+            res = getattr(self.client, method)(url, data)
+        return res, [q["sql"] for q in captured if 'FROM "core_user"' in q["sql"]]
+
+    def test_token_claims(self):
+        """Test the access token carries the staff flags, but no shop."""
+        token = AccessToken(self.tokens["access"])
+
+        self.assertIs(token["is_staff"], True)
+        self.assertIs(token["is_superuser"], False)
+        # The default shop changes with shop login, so it is read per request.
+        self.assertNotIn("shop", token)
+
+    def test_read_requests_skip_user_query(self):
+        """Test GET requests, including admin permission checks, load no user."""
+        res, queries = self.user_queries("get", SHOP_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(queries, [])
+
+        res, queries = self.user_queries("get", CATEGORY_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(queries, [])
+
+    def test_write_requests_load_user(self):
+        """Test unsafe requests and the profile use the database user."""
+        res, queries = self.user_queries("post", CATEGORY_URL, {"title": "shoes"})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(queries)
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.data["email"], "test@example.com")
+
+    def test_changed_credentials_revoke_tokens(self):
+        """Test deactivating a user or changing the password revokes tokens."""
+        for change in ({"is_active": False}, {"password": "changed"}):
+            with self.subTest(change):
+                models.TokenRevocation.objects.all().delete()
+                revocations.invalidate()
+                self.assertEqual(
+                    self.client.get(SHOP_LIST_URL).status_code, status.HTTP_200_OK
+                )
+
+                user = get_user_model().objects.get(pk=self.user.pk)
+                for field, value in change.items():
+                    setattr(user, field, value)
+                user.save()
+
+                res = self.client.get(SHOP_LIST_URL)
+                self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+                res = self.client.post(
+                    REFRESH_URL, {"refresh": self.tokens["refresh"]}
+                )
+                self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_login_in_the_second_of_a_revocation(self):
+        """Test a token issued right after a password change is accepted."""
+        res = self.client.patch(ME_URL, {"password": "changed1234"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.client.get(SHOP_LIST_URL).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+        res = self.client.post(
+            TOKEN_URL, {"email": "test@example.com", "password": "changed1234"}
+        )
+        access = AccessToken(res.data["access"])
+        # Revoked earlier in the very second the new token was issued.
+        models.TokenRevocation.objects.filter(jti=None).update(
+            revoked_at=datetime.fromtimestamp(access["iat"], tz=timezone.utc)
+        )
+        revocations.invalidate()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {res.data['access']}")
+
+        self.assertEqual(self.client.get(SHOP_LIST_URL).status_code, status.HTTP_200_OK)
+
+    def test_unrelated_change_keeps_tokens(self):
+        """Test saving other user fields does not revoke tokens."""
+        user = get_user_model().objects.get(pk=self.user.pk)
+        user.name = "Khan"
+        user.save()
+
+        res = self.client.get(SHOP_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_revoke_single_token(self):
+        """Test a revoked token is rejected while a new one works."""
+        access = AccessToken(self.tokens["access"])
+        models.TokenRevocation.objects.revoke_token(access)
+
+        res = self.client.get(SHOP_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        res = self.client.post(REFRESH_URL, {"refresh": self.tokens["refresh"]})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {res.data['access']}")
+        res = self.client.get(SHOP_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -6,9 +6,13 @@ from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from core import models
+from core.authentication import RevocableJWTAuthentication
 
 from user.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
     UserSerializer,
 )
 
@@ -23,8 +27,21 @@ class ManagerUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user."""
 
     serializer_class = UserSerializer
+    authentication_classes = [RevocableJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
         """Retrive and return the authenticated user."""
         return self.request.user
+
+
+class LoginView(TokenObtainPairView):
+    """Create a token pair carrying the user's claims."""
+
+    serializer_class = TokenObtainPairSerializer
+
+
+class RefreshView(TokenRefreshView):
+    """Refresh an access token."""
+
+    serializer_class = TokenRefreshSerializer